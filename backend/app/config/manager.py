@@ -6,12 +6,14 @@ from dotenv import load_dotenv
 
 from app.config.schemas import (
   AppConfig,
+  DatabasePrefs,
   ExperiencesPrefs,
   IngestionPrefs,
   ListingsPrefs,
   ModelPrefs,
   PathsPrefs,
   ResumePrefs,
+  VectorPrefs,
   get_data_dir,
 )
 from app.utils.structure import assign_path, deep_merge, flatten_structure
@@ -66,6 +68,14 @@ class ConfigManager:
   def paths(self) -> PathsPrefs:
     return self.config.paths
 
+  @property
+  def database(self) -> DatabasePrefs:
+    return self.config.database
+
+  @property
+  def vectors(self) -> VectorPrefs:
+    return self.config.vectors
+
   @property
   def model(self) -> ModelPrefs:
     return self.config.model
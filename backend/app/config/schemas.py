@@ -52,6 +52,25 @@ class PathsPrefs(BaseModel):
     description='Directory where AI embeddings for semantic search are stored. Larger datasets require more disk space here.',
     exposure='advanced',
   )
+  embedding_cache_path: str = ConfigField(
+    default_factory=lambda: str(get_data_dir() / 'embeddings.sqlite3'),
+    title='Embedding Cache Path',
+    description=(
+      'File where previously computed embeddings are kept so the same text is never sent to the '
+      'embedding model twice. Safe to delete; it is rebuilt as text is embedded again.'
+    ),
+    exposure='advanced',
+  )
+  asset_cache_path: str = ConfigField(
+    default_factory=lambda: str(get_data_dir() / 'assets.sqlite3'),
+    title='Asset Cache Path',
+    description=(
+      'File where stylesheets and images downloaded for saved copies of job postings are kept, so '
+      'postings from the same website reuse them. Safe to delete; it is refilled as postings are '
+      'imported.'
+    ),
+    exposure='advanced',
+  )
   profile_path: str = ConfigField(
     default_factory=lambda: str(get_data_dir() / 'profile.json'),
     title='Profile Data Path',
@@ -66,6 +85,116 @@ class PathsPrefs(BaseModel):
   )
 
 
+class DatabasePrefs(BaseModel):
+  pool_size: int = ConfigField(
+    default=8,
+    title='Connection Pool Size',
+    ge=1,
+    le=64,
+    description=(
+      'Maximum number of database connections kept open at once. Each worker thread holds at most '
+      'one connection, so this also caps how many queries run in parallel.'
+    ),
+    exposure='advanced',
+  )
+  journal_mode: Literal['WAL', 'DELETE', 'TRUNCATE'] = ConfigField(
+    default='WAL',
+    title='Journal Mode',
+    description=(
+      'How the database records changes before committing them. WAL lets reads continue while a '
+      'write is in progress and is the fastest option for most machines.'
+    ),
+    exposure='advanced',
+  )
+  synchronous: Literal['OFF', 'NORMAL', 'FULL'] = ConfigField(
+    default='NORMAL',
+    title='Synchronous Mode',
+    description=(
+      'How often the database waits for data to reach the disk. NORMAL is safe with WAL and avoids '
+      'a disk flush on every save. FULL is slower but survives power loss mid-write.'
+    ),
+    exposure='advanced',
+  )
+  busy_timeout_ms: int = ConfigField(
+    default=5000,
+    title='Busy Timeout (ms)',
+    ge=0,
+    le=60000,
+    description=(
+      'How long a query waits for another write to finish before giving up with a "database is '
+      'locked" error.'
+    ),
+    exposure='advanced',
+  )
+  cache_size_kb: int = ConfigField(
+    default=16384,
+    title='Page Cache Size (KiB)',
+    ge=0,
+    le=1048576,
+    description=(
+      'Memory each connection may use to cache database pages. Larger values speed up repeated '
+      'reads at the cost of memory.'
+    ),
+    exposure='advanced',
+  )
+  mmap_size_mb: int = ConfigField(
+    default=256,
+    title='Memory-Mapped I/O (MiB)',
+    ge=0,
+    le=4096,
+    description=(
+      'Amount of the database file read through memory mapping instead of regular file reads. Set '
+      'to 0 to disable.'
+    ),
+    exposure='advanced',
+  )
+
+
+class VectorPrefs(BaseModel):
+  backend: Literal['chroma', 'numpy'] = ConfigField(
+    default='chroma',
+    title='Vector Index Backend',
+    description=(
+      'Where semantic search vectors are stored. chroma uses an approximate HNSW index. numpy '
+      'keeps vectors in a memory-mapped matrix and compares against all of them, which is exact, '
+      'starts faster and is quicker for collections of up to tens of thousands of items. Switching '
+      'backends starts the index from scratch.'
+    ),
+    exposure='advanced',
+  )
+  precision: Literal['float32', 'float16', 'int8'] = ConfigField(
+    default='float32',
+    title='Vector Precision',
+    description=(
+      'Storage precision for the numpy backend. float16 halves and int8 quarters the disk and '
+      'memory used, at a small loss of ranking accuracy.'
+    ),
+    exposure='advanced',
+  )
+  outbox_batch_size: int = ConfigField(
+    default=64,
+    ge=1,
+    le=1000,
+    title='Index Write Batch Size',
+    description=(
+      'How many queued index writes are sent to the vector index at once. Saved listings and '
+      'experiences are queued and embedded in the background.'
+    ),
+    exposure='advanced',
+  )
+  outbox_max_attempts: int = ConfigField(
+    default=8,
+    ge=1,
+    le=100,
+    title='Index Write Attempts',
+    description=(
+      'How many times a queued index write is retried, with growing delays, before it is set aside '
+      'for the reconcile command.'
+    ),
+    exposure='advanced',
+  )
+
+
 class ModelPrefs(BaseModel):
   llm: Literal['gpt-4o', 'gpt-4o-mini', 'gpt-4-turbo', 'gpt-4', 'gpt-3.5-turbo'] = ConfigField(
     default='gpt-4o-mini',
@@ -73,12 +202,64 @@ class ModelPrefs(BaseModel):
     description='The AI model used for generating resume content, matching experiences to jobs, and answering questions. More powerful models give better results but cost more.',
     exposure='normal',
   )
-  embedding: Literal['text-embedding-3-small', 'text-embedding-3-large', 'text-embedding-ada-002'] = ConfigField(
+  embedding: Literal[
+    'text-embedding-3-small', 'text-embedding-3-large', 'text-embedding-ada-002', 'local-hashing'
+  ] = ConfigField(
     default='text-embedding-3-small',
     title='Embedding Model',
-    description='Model used to convert text into vectors for semantic search. This affects how well the system finds relevant experiences for job applications.',
+    description=(
+      'Model used to convert text into vectors for semantic search. This affects how well the '
+      'system finds relevant experiences for job applications. local-hashing runs offline on this '
+      'machine with no API calls, at lower matching quality. Each model keeps its own search '
+      'index. After switching, the index is rebuilt in the background and searches keep using the '
+      'previous one until it is ready.'
+    ),
     exposure='normal',
   )
+  embedding_dimensions: int = ConfigField(
+    default=0,
+    title='Embedding Dimensions',
+    ge=0,
+    le=3072,
+    description=(
+      'Shorten embeddings to this many dimensions, which makes the search index smaller and faster '
+      'at a small cost in matching quality. Only text-embedding-3 models and local-hashing support '
+      'this. Set to 0 for the model default. Changing it rebuilds the search index in the '
+      'background.'
+    ),
+    exposure='advanced',
+  )
+  embedding_cache_mb: int = ConfigField(
+    default=256,
+    title='Embedding Cache Size (MiB)',
+    ge=0,
+    le=16384,
+    description=(
+      'Disk space kept for previously computed embeddings. When full, the ones used least recently '
+      'are dropped. Set to 0 to disable the cache.'
+    ),
+    exposure='advanced',
+  )
+  embedding_batch_window_ms: int = ConfigField(
+    default=10,
+    title='Embedding Batch Window (ms)',
+    ge=0,
+    le=1000,
+    description=(
+      'How long to wait for other embedding requests to send along with one that just arrived. '
+      'Fewer, larger requests save round trips and stay under rate limits. Set to 0 to never wait; '
+      'requests that are already queued are still combined.'
+    ),
+    exposure='advanced',
+  )
+  embedding_batch_size: int = ConfigField(
+    default=256,
+    title='Embedding Batch Size',
+    ge=1,
+    le=2048,
+    description='The most texts sent to the embedding API in one request.',
+    exposure='advanced',
+  )
   temperature: float = ConfigField(
     default=0.3,
     title='Temperature',
@@ -129,6 +310,17 @@ class ListingsPrefs(BaseModel):
     description='How similar company names must be to be considered the same. Helps prevent duplicate listings from the same company with slight name variations.',
     exposure='advanced',
   )
+  search_k: int = ConfigField(
+    default=5,
+    title='Semantic Duplicate Candidates',
+    ge=1,
+    le=50,
+    description=(
+      'How many of the most similar saved listings are compared against a new listing when looking '
+      'for duplicates.'
+    ),
+    exposure='advanced',
+  )
 
 
 class ExperiencesPrefs(BaseModel):
@@ -171,6 +363,143 @@ class IngestionPrefs(BaseModel):
     description='Maximum amount of text to extract from each webpage. Larger values capture more content but increase processing time and API costs.',
     exposure='advanced',
   )
+  http_first: bool = ConfigField(
+    default=True,
+    title='Try Plain HTTP First',
+    description=(
+      'Download job postings with a plain web request before opening a browser. Most job boards '
+      'send the full posting this way, which is much faster. Pages with too little text are opened '
+      'in the browser instead, and their website goes straight to the browser from then on.'
+    ),
+    exposure='advanced',
+  )
+  http_min_text_length: int = ConfigField(
+    default=1000,
+    title='Minimum Text Without Browser',
+    ge=0,
+    le=50000,
+    description=(
+      'How many characters of text a page downloaded without the browser must have to be used. '
+      'Pages with less are opened in the browser, since their content is probably loaded by '
+      'scripts.'
+    ),
+    exposure='advanced',
+  )
+  http_timeout_seconds: float = ConfigField(
+    default=10.0,
+    title='Plain HTTP Timeout (s)',
+    ge=1.0,
+    le=120.0,
+    description=(
+      'How long to wait for a job posting downloaded without the browser before opening it in the '
+      'browser instead.'
+    ),
+    exposure='advanced',
+  )
+  blocked_resource_types: str = ConfigField(
+    default='image, media, font, stylesheet',
+    title='Blocked Resource Types',
+    description=(
+      'Comma-separated kinds of browser requests to skip while reading a job posting, such as '
+      'image, media, font, stylesheet, script or xhr. Pages are ready sooner and download less. '
+      'Stylesheets and images are still fetched afterwards for the saved copy of the posting.'
+    ),
+    exposure='advanced',
+  )
+  blocked_hosts: str = ConfigField(
+    default=(
+      'google-analytics.com, googletagmanager.com, googlesyndication.com, doubleclick.net, '
+      'googleadservices.com, facebook.net, connect.facebook.net, analytics.twitter.com, '
+      'ads-twitter.com, snap.licdn.com, px.ads.linkedin.com, bat.bing.com, clarity.ms, '
+      'hotjar.com, hotjar.io, segment.com, segment.io, mixpanel.com, amplitude.com, '
+      'fullstory.com, heap.io, heapanalytics.com, intercom.io, intercomcdn.com, '
+      'newrelic.com, nr-data.net, quantserve.com, scorecardresearch.com, taboola.com, '
+      'outbrain.com, criteo.com, adsrvr.org, onetrust.com, cookielaw.org'
+    ),
+    title='Blocked Hosts',
+    description=(
+      'Comma-separated analytics, advertising and tracking domains, including their subdomains, '
+      'whose requests are skipped while reading a job posting and left out of its saved copy.'
+    ),
+    exposure='advanced',
+  )
+  asset_connections_per_host: int = ConfigField(
+    default=6,
+    title='Asset Downloads per Host',
+    ge=1,
+    le=32,
+    description=(
+      'How many stylesheets and images are downloaded at once from each website while saving a '
+      'copy of a job posting.'
+    ),
+    exposure='advanced',
+  )
+  asset_timeout_seconds: float = ConfigField(
+    default=5.0,
+    title='Asset Download Timeout (s)',
+    ge=0.5,
+    le=60.0,
+    description=(
+      'How long to wait for a single stylesheet or image. Assets that take longer keep linking to '
+      'the website.'
+    ),
+    exposure='advanced',
+  )
+  snapshot_budget_seconds: float = ConfigField(
+    default=15.0,
+    title='Snapshot Time Budget (s)',
+    ge=1.0,
+    le=120.0,
+    description=(
+      'The most time spent downloading stylesheets and images for one saved copy of a job posting. '
+      'Whatever is still downloading then keeps linking to the website.'
+    ),
+    exposure='advanced',
+  )
+  asset_cache_mb: int = ConfigField(
+    default=128,
+    title='Asset Cache Size (MiB)',
+    ge=0,
+    le=16384,
+    description=(
+      'Disk space kept for stylesheets and images of saved job postings. Assets are reused while '
+      'the website allows it and otherwise only downloaded again if they changed. When full, the '
+      'ones used least recently are dropped. Set to 0 to disable the cache.'
+    ),
+    exposure='advanced',
+  )
+  browser_pages: int = ConfigField(
+    default=2,
+    title='Browser Pages',
+    ge=1,
+    le=16,
+    description=(
+      'How many webpages the shared browser loads at once. Further imports wait for a free page.'
+    ),
+    exposure='advanced',
+  )
+  browser_context_max_pages: int = ConfigField(
+    default=20,
+    title='Pages per Browser Context',
+    ge=1,
+    le=1000,
+    description=(
+      'Webpages loaded in one browser context before it is replaced by a fresh one, which bounds '
+      'leaked memory and cookies carried between sites.'
+    ),
+    exposure='advanced',
+  )
+  browser_context_max_memory_mb: int = ConfigField(
+    default=256,
+    title='Browser Context Memory Limit (MiB)',
+    ge=16,
+    le=4096,
+    description=(
+      'A browser context whose page uses more JavaScript memory than this after an import is '
+      'replaced by a fresh one.'
+    ),
+    exposure='advanced',
+  )
 
 
 class AppConfig(BaseModel):
@@ -179,6 +508,16 @@ class AppConfig(BaseModel):
     title='File Paths',
     description='File system paths configuration',
   )
+  database: DatabasePrefs = Field(
+    default_factory=DatabasePrefs,
+    title='Database',
+    description='Database connection settings',
+  )
+  vectors: VectorPrefs = Field(
+    default_factory=VectorPrefs,
+    title='Vector Index',
+    description='Semantic search index settings',
+  )
   model: ModelPrefs = Field(
     default_factory=ModelPrefs,
     title='AI Models',
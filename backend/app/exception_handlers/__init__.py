@@ -1,9 +1,11 @@
 from .application_error import application_error_exception_handler
 from .not_found import not_found_exception_handler
 from .service_error import service_error_exception_handler
+from .validation_error import validation_error_exception_handler
 
 __all__ = [
   'application_error_exception_handler',
   'not_found_exception_handler',
   'service_error_exception_handler',
+  'validation_error_exception_handler',
 ]
@@ -0,0 +1,9 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+
+async def validation_error_exception_handler(request, exc):
+  return JSONResponse(
+    status_code=status.HTTP_400_BAD_REQUEST,
+    content={'detail': str(exc)},
+  )
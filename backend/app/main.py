@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from starlette.middleware.base import BaseHTTPMiddleware
 
@@ -5,35 +7,60 @@ from app.exception_handlers import (
   application_error_exception_handler,
   not_found_exception_handler,
   service_error_exception_handler,
+  validation_error_exception_handler,
 )
 from app.middleware import exception_logging_middleware
+from app.repositories.vector_outbox import outbox_worker
+from app.repositories.vector_repository import close_embedding_batchers, flush_vector_stores
 from app.routers import (
   applications_router,
   config_router,
   experiences_router,
   listings_router,
+  metrics_router,
   profile_router,
   resumes_router,
 )
+from app.seed import create_tables
+from app.services import reembedding_service, scraping_service
 from app.utils.errors import (
   ApplicationError,
   NotFoundError,
   ServiceError,
+  ValidationError,
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  create_tables()
+  outbox_worker.start()
+  reembedding_service.start()
+  scraping_service.start()
+  try:
+    yield
+  finally:
+    await scraping_service.close()
+    await reembedding_service.stop()
+    await outbox_worker.stop()
+    flush_vector_stores()
+    close_embedding_batchers()
+
+
 def create_app() -> FastAPI:
-  app = FastAPI()
+  app = FastAPI(lifespan=lifespan)
 
   app.include_router(applications_router, prefix='/api')
   app.include_router(config_router, prefix='/api')
   app.include_router(experiences_router, prefix='/api')
   app.include_router(listings_router, prefix='/api')
+  app.include_router(metrics_router, prefix='/api')
   app.include_router(profile_router, prefix='/api')
   app.include_router(resumes_router, prefix='/api')
 
   app.add_exception_handler(NotFoundError, not_found_exception_handler)
   app.add_exception_handler(ServiceError, service_error_exception_handler)
+  app.add_exception_handler(ValidationError, validation_error_exception_handler)
   app.add_exception_handler(ApplicationError, application_error_exception_handler)
 
   app.add_middleware(BaseHTTPMiddleware, dispatch=exception_logging_middleware)
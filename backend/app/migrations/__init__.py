@@ -0,0 +1,7 @@
+from .runner import get_schema_version, migrate, run_migrations
+
+__all__ = [
+  'get_schema_version',
+  'migrate',
+  'run_migrations',
+]
@@ -0,0 +1,330 @@
+"""
+EXPLAIN QUERY PLAN assertions for the queries on the request hot path.
+
+The SQL is not restated here. Each scenario calls a service method against a freshly
+migrated, seeded database, and the statements it sends are recorded through the
+connection's trace callback, with their parameters bound, so the plans checked are the
+plans the services get.
+
+Run from backend/:
+  python -m app.migrations.query_plans
+
+Exits non-zero when a hot query falls back to a full table scan, or when a cursor page
+sorts or materializes its rows instead of seeking to them.
+"""
+
+import asyncio
+import sqlite3
+import sys
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.migrations.runner import migrate, run_migrations
+
+# Listings seeded, and the page size used, so every sort has a second page to seek to
+_LISTINGS = 30
+_PAGE_SIZE = 10
+_SORTS = ['title', 'company', 'posted_at']
+
+# Plan steps that mean a cursor page is not a plain index seek
+_NOT_A_SEEK = ('USE TEMP B-TREE', 'CO-ROUTINE', 'MATERIALIZE')
+
+
+@dataclass
+class Seed:
+  listing_ids: list[str] = field(default_factory=list)
+  application_id: str = ''
+  resume_id: str = ''
+  experience_ids: list[str] = field(default_factory=list)
+  # next_cursor of the first page, per sort
+  cursors: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class Scenario:
+  name: str
+  run: Callable[[Seed], Awaitable[Any]]
+  # Cursor pages must seek, without a temp B-tree or a materialized subquery
+  seek: bool = False
+  # Tables the scenario reads in full by design, e.g. to count every match
+  scans: tuple[str, ...] = ()
+
+
+def _scenarios() -> list[Scenario]:
+  from app.schemas import StatusEnum, StatusEvent
+  from app.services import applications_service, experience_service, listings_service
+
+  async def update_application(seed: Seed) -> None:
+    application = await applications_service.get(uuid.UUID(seed.application_id))
+    application.add_status_event(StatusEvent(status=StatusEnum.APPLIED, stage=0))
+    await applications_service.update(application)
+
+  async def reorder_bullets(seed: Seed) -> None:
+    experience = await experience_service.get(uuid.UUID(seed.experience_ids[0]))
+    experience.bullets.reverse()
+    await experience_service.update(experience)
+
+  scenarios = [
+    Scenario(
+      'listing_by_url',
+      lambda seed: listings_service.get_by_url('https://example.com/jobs/1'),
+    ),
+    Scenario('listing_detail', lambda seed: listings_service.get(seed.listing_ids[0])),
+    # Offset pages count every match in the same pass
+    Scenario(
+      'listing_page',
+      lambda seed: listings_service.list_all(2, _PAGE_SIZE),
+      scans=('l',),
+    ),
+    Scenario(
+      'listing_page_by_status',
+      lambda seed: listings_service.list_all(
+        2, _PAGE_SIZE, status=[StatusEnum.SAVED, StatusEnum.APPLIED], sort_by='updated_at'
+      ),
+    ),
+    Scenario(
+      'listing_search',
+      lambda seed: listings_service.list_all(2, _PAGE_SIZE, search='engineer'),
+    ),
+    Scenario(
+      'listing_search_by_relevance',
+      lambda seed: listings_service.list_all(
+        1, _PAGE_SIZE, search='backend engineer', sort_by='relevance'
+      ),
+    ),
+    Scenario(
+      'listing_page_after_cursor',
+      lambda seed: listings_service.list_all(1, _PAGE_SIZE, cursor=seed.cursors['id']),
+      seek=True,
+    ),
+    *(
+      Scenario(
+        f'listing_page_after_cursor_by_{sort}',
+        lambda seed, sort=sort: listings_service.list_all(
+          1, _PAGE_SIZE, sort_by=sort, cursor=seed.cursors[sort]
+        ),
+        seek=True,
+      )
+      for sort in _SORTS
+    ),
+    Scenario(
+      'application_by_id',
+      lambda seed: applications_service.get(uuid.UUID(seed.application_id)),
+    ),
+    Scenario(
+      'application_by_resume',
+      lambda seed: applications_service.get_by_resume_id(uuid.UUID(seed.resume_id)),
+    ),
+    Scenario(
+      'application_by_listing',
+      lambda seed: applications_service.get_by_listing_id(uuid.UUID(seed.listing_ids[0])),
+    ),
+    Scenario('application_status_update', update_application),
+    Scenario(
+      'experience_by_id',
+      lambda seed: experience_service.get(uuid.UUID(seed.experience_ids[0])),
+    ),
+    Scenario('experience_update', reorder_bullets),
+  ]
+  return scenarios
+
+
+def _seed(db_path: str) -> Seed:
+  seed = Seed()
+  db = sqlite3.connect(db_path, isolation_level=None)
+  try:
+    db.execute('BEGIN')
+    seed.resume_id = str(uuid.uuid4())
+    db.execute(
+      'INSERT INTO resumes (id, template, data) VALUES (?, ?, ?)',
+      (seed.resume_id, 'default.html', '{}'),
+    )
+    for i in range(_LISTINGS):
+      listing_id = str(uuid.uuid4())
+      seed.listing_ids.append(listing_id)
+      db.execute(
+        """
+        INSERT INTO listings (id, url, title, company, domain, description, posted_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+          listing_id,
+          f'https://example.com/jobs/{i}',
+          f'Backend Engineer {i}',
+          f'Company {i % 7}',
+          'example.com',
+          'Design, build and operate backend services.',
+          f'2024-01-{i % 28 + 1:02d}' if i % 3 else None,
+        ),
+      )
+
+    # Every third listing has an application, the first one linked to the resume
+    for i, listing_id in enumerate(seed.listing_ids[::3]):
+      application_id = str(uuid.uuid4())
+      if i == 0:
+        seed.application_id = application_id
+      db.execute(
+        'INSERT INTO applications (id, listing_id, resume_id) VALUES (?, ?, ?)',
+        (application_id, listing_id, seed.resume_id if i == 0 else None),
+      )
+      created_at = f'2024-02-{i + 1:02d}T00:00:00'
+      db.execute(
+        """
+        INSERT INTO status_events (id, application_id, status, stage, created_at)
+        VALUES (?, ?, 'SAVED', 0, ?)
+        """,
+        (str(uuid.uuid4()), application_id, created_at),
+      )
+      db.execute(
+        """
+        INSERT INTO application_status (application_id, listing_id, status, stage, last_updated)
+        VALUES (?, ?, 'SAVED', 0, ?)
+        """,
+        (application_id, listing_id, created_at),
+      )
+
+    for i in range(2):
+      experience_id = str(uuid.uuid4())
+      seed.experience_ids.append(experience_id)
+      db.execute(
+        """
+        INSERT INTO experiences (id, title, organization, type, start_date)
+        VALUES (?, ?, ?, 'Full-time', ?)
+        """,
+        (experience_id, f'Engineer {i}', f'Organization {i}', f'202{i}-01'),
+      )
+      db.executemany(
+        """
+        INSERT INTO experience_bullets (experience_id, text, position, doc_id)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(experience_id, f'Built service {j}', j, uuid.uuid4().hex) for j in range(3)],
+      )
+    db.execute('COMMIT')
+  finally:
+    db.close()
+  return seed
+
+
+async def _first_pages(seed: Seed) -> None:
+  from app.services import listings_service
+
+  # Issued before tracing starts, as a client would before following a cursor. This also
+  # caches the totals, so the cursor pages only run their own query.
+  for sort in [None, *_SORTS]:
+    page = await listings_service.list_all(1, _PAGE_SIZE, sort_by=sort)
+    assert page.next_cursor is not None
+    seed.cursors[sort or 'id'] = page.next_cursor
+
+
+def explain(db: sqlite3.Connection, statement: str) -> list[str]:
+  """
+  Return the plan steps of a statement whose parameters are already bound.
+  """
+  return [row[3] for row in db.execute(f'EXPLAIN QUERY PLAN {statement}')]
+
+
+def find_violations(scenario: Scenario, plan: list[str]) -> list[str]:
+  """
+  Report every plan step that scans a whole table or index the scenario does not expect
+  to read in full, and, for cursor pages, every step that is not part of a seek.
+  """
+  violations = []
+  for detail in plan:
+    if detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW':
+      # FTS5 lookups are reported as scans of the virtual table but use its own index
+      if 'VIRTUAL TABLE INDEX' in detail:
+        continue
+      # Reads a subquery's result, whose own steps are checked on their own lines
+      if detail.startswith('SCAN (subquery-'):
+        continue
+      if detail.split()[1] in scenario.scans:
+        continue
+      violations.append(detail)
+    elif scenario.seek and detail.startswith(_NOT_A_SEEK):
+      violations.append(detail)
+  return violations
+
+
+def capture_statements(scenarios: list[Scenario] | None = None) -> dict[str, list[str]]:
+  """
+  Run each scenario against a temporary seeded database and record its SQL.
+
+  Args:
+    scenarios: Scenarios to run. Defaults to the hot path of every service.
+
+  Returns:
+    The statements each scenario sent, by scenario name, with parameters bound.
+  """
+  from app.repositories.database_repository import get_pool
+
+  scenarios = scenarios if scenarios is not None else _scenarios()
+  paths, database = settings.config.paths, settings.config.database
+  saved = (paths.db_path, paths.vector_path, database.pool_size)
+  captured: dict[str, list[str]] = {}
+
+  with tempfile.TemporaryDirectory() as data_dir:
+    paths.db_path = str(Path(data_dir) / 'db.sqlite3')
+    paths.vector_path = str(Path(data_dir) / 'vectors')
+    # A single pooled connection carries the trace callback for every query
+    database.pool_size = 1
+    try:
+      run_migrations(paths.db_path)
+      seed = _seed(paths.db_path)
+
+      async def run() -> None:
+        await _first_pages(seed)
+        statements: list[str] = []
+
+        def record(statement: str) -> None:
+          # Statements run by triggers arrive as '-- ' comments, and FTS5 reads its shadow
+          # tables with schema-qualified names the services never use
+          if not statement.startswith('--') and "'main'." not in statement:
+            statements.append(statement)
+
+        with get_pool().connection() as conn:
+          conn.set_trace_callback(record)
+        for scenario in scenarios:
+          statements.clear()
+          await scenario.run(seed)
+          captured[scenario.name] = list(statements)
+
+      asyncio.run(run())
+    finally:
+      get_pool().close()
+      paths.db_path, paths.vector_path, database.pool_size = saved
+
+  return captured
+
+
+def main() -> int:
+  scenarios = _scenarios()
+  captured = capture_statements(scenarios)
+
+  db = sqlite3.connect(':memory:', isolation_level=None)
+  migrate(db)
+
+  checked = 0
+  violations = []
+  for scenario in scenarios:
+    for statement in captured[scenario.name]:
+      plan = explain(db, statement)
+      if not plan:
+        continue
+      checked += 1
+      violations.extend(f'{scenario.name}: {detail}' for detail in find_violations(scenario, plan))
+
+  for violation in violations:
+    print(f'NOT INDEXED  {violation}')
+  print(f'{checked} statements from {len(scenarios)} scenarios checked, {len(violations)} problems')
+
+  return 1 if violations else 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -0,0 +1,96 @@
+import os
+import sqlite3
+from datetime import UTC, datetime
+from types import ModuleType
+
+from app.migrations.versions import MIGRATIONS
+from app.utils.errors import ServiceError
+
+
+def get_schema_version(db: sqlite3.Connection) -> int:
+  """
+  Return the highest applied migration version, or 0 for an unversioned database.
+  """
+  row = db.execute(
+    "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+  ).fetchone()
+  if not row:
+    return 0
+
+  version = db.execute('SELECT MAX(version) FROM schema_version').fetchone()[0]
+  return version or 0
+
+
+def migrate(db: sqlite3.Connection, migrations: list[ModuleType] = MIGRATIONS) -> list[int]:
+  """
+  Apply pending migrations in version order, each in its own transaction.
+
+  Args:
+    db: Connection in autocommit mode (isolation_level=None).
+    migrations: Migration modules exposing VERSION, DESCRIPTION and STATEMENTS.
+
+  Returns:
+    Versions that were applied.
+
+  Raises:
+    ServiceError: If migrations are misordered or one fails to apply.
+  """
+  versions = [m.VERSION for m in migrations]
+  if versions != sorted(set(versions)):
+    raise ServiceError(f'Migration versions must be unique and ascending: {versions}')
+
+  db.execute(
+    """
+    CREATE TABLE IF NOT EXISTS schema_version (
+      version INTEGER PRIMARY KEY,
+      description TEXT NOT NULL,
+      applied_at TEXT NOT NULL
+    )
+    """
+  )
+  current = get_schema_version(db)
+
+  applied = []
+  for migration in migrations:
+    if migration.VERSION <= current:
+      continue
+
+    try:
+      db.execute('BEGIN IMMEDIATE')
+      for statement in migration.STATEMENTS:
+        db.execute(statement)
+      db.execute(
+        'INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)',
+        (migration.VERSION, migration.DESCRIPTION, datetime.now(UTC).isoformat()),
+      )
+      db.execute('COMMIT')
+    except sqlite3.Error as e:
+      db.execute('ROLLBACK')
+      raise ServiceError(f'Migration {migration.VERSION} failed: {e}') from e
+
+    applied.append(migration.VERSION)
+
+  return applied
+
+
+def run_migrations(db_path: str) -> list[int]:
+  """
+  Bring the database at db_path up to the latest schema version.
+
+  Args:
+    db_path: Path to the SQLite database file. Parent directories are created.
+
+  Returns:
+    Versions that were applied.
+  """
+  os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+  db = sqlite3.connect(db_path, isolation_level=None)
+  try:
+    applied = migrate(db)
+    if applied:
+      # Refresh planner statistics so new indexes are picked up straight away
+      db.execute('PRAGMA optimize')
+    return applied
+  finally:
+    db.close()
@@ -0,0 +1,22 @@
+from . import (
+  v001_initial_schema,
+  v002_hot_query_indexes,
+  v003_application_status,
+  v004_listing_sort_indexes,
+  v005_listings_fts,
+  v006_stable_bullet_ids,
+  v007_vector_outbox,
+)
+
+# Listed explicitly rather than discovered so frozen builds bundle every migration
+MIGRATIONS = [
+  v001_initial_schema,
+  v002_hot_query_indexes,
+  v003_application_status,
+  v004_listing_sort_indexes,
+  v005_listings_fts,
+  v006_stable_bullet_ids,
+  v007_vector_outbox,
+]
+
+__all__ = ['MIGRATIONS']
@@ -0,0 +1,24 @@
+VERSION = 2
+DESCRIPTION = 'Indexes for status event, application and bullet lookups'
+
+STATEMENTS = [
+  # Serves the per-application event subqueries and "latest event" lookups without
+  # touching the table for everything except notes
+  """
+  CREATE INDEX IF NOT EXISTS idx_status_events_application
+  ON status_events (application_id, created_at, id, status, stage)
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_status_events_created_at
+  ON status_events (created_at)
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_applications_resume
+  ON applications (resume_id)
+  """,
+  # The rowid (bullet id) is implicitly part of the index, so ORDER BY id is free
+  """
+  CREATE INDEX IF NOT EXISTS idx_experience_bullets_experience
+  ON experience_bullets (experience_id)
+  """,
+]
@@ -0,0 +1,38 @@
+VERSION = 3
+DESCRIPTION = 'Materialized current status per application'
+
+STATEMENTS = [
+  """
+  CREATE TABLE IF NOT EXISTS application_status (
+    application_id TEXT PRIMARY KEY,
+    listing_id TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL,
+    stage INTEGER NOT NULL,
+    last_updated TEXT NOT NULL,
+    FOREIGN KEY (application_id) REFERENCES applications (id) ON DELETE CASCADE
+  )
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_application_status_status
+  ON application_status (status, last_updated)
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_application_status_last_updated
+  ON application_status (last_updated)
+  """,
+  # Backfill from the event history, using the same tie-break as the services
+  """
+  INSERT OR REPLACE INTO application_status (
+    application_id, listing_id, status, stage, last_updated
+  )
+  SELECT a.id, a.listing_id, se.status, se.stage, se.created_at
+  FROM applications a
+  JOIN status_events se ON se.id = (
+    SELECT latest.id
+    FROM status_events latest
+    WHERE latest.application_id = a.id
+    ORDER BY latest.created_at DESC, latest.id DESC
+    LIMIT 1
+  )
+  """,
+]
@@ -0,0 +1,19 @@
+VERSION = 4
+DESCRIPTION = 'Listing sort indexes for keyset pagination'
+
+# Each index matches an ORDER BY used by ListingsService.list_all, with the id tie-break,
+# so cursor pages seek straight to their first row
+STATEMENTS = [
+  """
+  CREATE INDEX IF NOT EXISTS idx_listings_title
+  ON listings (title, id)
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_listings_company
+  ON listings (company, id)
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_listings_posted_date
+  ON listings (COALESCE(posted_date, ''), id)
+  """,
+]
@@ -0,0 +1,56 @@
+VERSION = 5
+DESCRIPTION = 'Full-text index over listings'
+
+# External-content FTS5 table: the text lives only in listings and the triggers keep the
+# inverted index in step with every insert, update and delete
+STATEMENTS = [
+  """
+  CREATE VIRTUAL TABLE IF NOT EXISTS listings_fts USING fts5(
+    title, company, domain, description, skills, requirements,
+    content = 'listings',
+    content_rowid = 'rowid',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+  )
+  """,
+  """
+  CREATE TRIGGER IF NOT EXISTS listings_fts_insert AFTER INSERT ON listings BEGIN
+    INSERT INTO listings_fts (rowid, title, company, domain, description, skills, requirements)
+    VALUES (
+      new.rowid, new.title, new.company, new.domain, new.description, new.skills,
+      new.requirements
+    );
+  END
+  """,
+  """
+  CREATE TRIGGER IF NOT EXISTS listings_fts_delete AFTER DELETE ON listings BEGIN
+    INSERT INTO listings_fts (
+      listings_fts, rowid, title, company, domain, description, skills, requirements
+    )
+    VALUES (
+      'delete', old.rowid, old.title, old.company, old.domain, old.description, old.skills,
+      old.requirements
+    );
+  END
+  """,
+  """
+  CREATE TRIGGER IF NOT EXISTS listings_fts_update AFTER UPDATE ON listings BEGIN
+    INSERT INTO listings_fts (
+      listings_fts, rowid, title, company, domain, description, skills, requirements
+    )
+    VALUES (
+      'delete', old.rowid, old.title, old.company, old.domain, old.description, old.skills,
+      old.requirements
+    );
+    INSERT INTO listings_fts (rowid, title, company, domain, description, skills, requirements)
+    VALUES (
+      new.rowid, new.title, new.company, new.domain, new.description, new.skills,
+      new.requirements
+    );
+  END
+  """,
+  # Index listings saved before this migration
+  """
+  INSERT INTO listings_fts (listings_fts) VALUES ('rebuild')
+  """,
+]
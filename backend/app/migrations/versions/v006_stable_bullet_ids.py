@@ -0,0 +1,23 @@
+VERSION = 6
+DESCRIPTION = 'Bullet positions and content-derived vector document ids'
+
+# doc_id stays NULL for bullets whose vector documents still carry random ids; the next
+# update of their experience re-indexes them once under stable ids
+STATEMENTS = [
+  'ALTER TABLE experience_bullets ADD COLUMN position INTEGER NOT NULL DEFAULT 0',
+  'ALTER TABLE experience_bullets ADD COLUMN doc_id TEXT',
+  """
+  UPDATE experience_bullets
+  SET position = (
+    SELECT COUNT(*)
+    FROM experience_bullets earlier
+    WHERE earlier.experience_id = experience_bullets.experience_id
+      AND earlier.id < experience_bullets.id
+  )
+  """,
+  'DROP INDEX IF EXISTS idx_experience_bullets_experience',
+  """
+  CREATE INDEX IF NOT EXISTS idx_experience_bullets_position
+  ON experience_bullets (experience_id, position)
+  """,
+]
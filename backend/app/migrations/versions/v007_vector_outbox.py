@@ -0,0 +1,24 @@
+VERSION = 7
+DESCRIPTION = 'Transactional outbox for vector index writes'
+
+# Rows are applied in id order; available_at holds a retrying row back and failed_at parks
+# one that ran out of attempts until the reconcile command re-queues it
+STATEMENTS = [
+  """
+  CREATE TABLE IF NOT EXISTS vector_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    action TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    last_error TEXT,
+    failed_at REAL,
+    created_at REAL NOT NULL
+  )
+  """,
+  """
+  CREATE INDEX IF NOT EXISTS idx_vector_outbox_pending
+  ON vector_outbox (id) WHERE failed_at IS NULL
+  """,
+]
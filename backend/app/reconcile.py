@@ -0,0 +1,64 @@
+"""
+Repair drift between SQLite and the vector index.
+
+Run from backend/, with the app stopped or running:
+  python -m app.reconcile [--dry-run]
+
+Applies any queued index writes first, then compares each collection with the rows it is
+built from and queues and applies the writes that close the gap. Writes the outbox had
+given up on are dropped once the repair covers them. Exits non-zero if the index cannot
+be written.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.repositories.vector_outbox import outbox_worker
+from app.seed import create_tables
+from app.services import experience_service, listings_service
+
+
+async def reconcile(dry_run: bool) -> int:
+  outbox = outbox_worker.outbox
+  await outbox.adrain()
+  pending = (await outbox.astats())['pending']
+  if pending:
+    print(f'{pending} queued index writes could not be applied; fix the index and retry')
+    return 1
+
+  results = {
+    **await listings_service.reconcile_vectors(dry_run),
+    **await experience_service.reconcile_vectors(dry_run),
+  }
+  for collection, counts in results.items():
+    summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+    print(f'{collection}: {summary}')
+
+  if dry_run:
+    return 0
+
+  applied = await outbox.adrain()
+  stats = await outbox.astats()
+  if stats['pending']:
+    print(f'Applied {applied} index writes, {stats["pending"]} still queued')
+    return 1
+
+  discarded = outbox.discard_failed()
+  print(f'Applied {applied} index writes, dropped {discarded} abandoned ones')
+  return 0
+
+
+def main() -> int:
+  parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+  parser.add_argument(
+    '--dry-run', action='store_true', help='Report differences without changing anything'
+  )
+  args = parser.parse_args()
+
+  create_tables()
+  return asyncio.run(reconcile(args.dry_run))
+
+
+if __name__ == '__main__':
+  sys.exit(main())
@@ -1,11 +1,13 @@
 from .database_repository import DatabaseRepository
 from .file_repository import FileRepository
 from .json_repository import JSONRepository
+from .vector_outbox import VectorOutbox
 from .vector_repository import VectorRepository
 
 __all__ = [
   'DatabaseRepository',
   'FileRepository',
   'JSONRepository',
+  'VectorOutbox',
   'VectorRepository',
 ]
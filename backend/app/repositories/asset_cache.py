@@ -0,0 +1,207 @@
+import email.utils
+import time
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from app.config import settings
+from app.repositories.sqlite_lru import SharedLruStore, SqliteLruStore
+
+_SCHEMA = """
+  CREATE TABLE IF NOT EXISTS assets (
+    url TEXT PRIMARY KEY,
+    content_type TEXT NOT NULL,
+    body BLOB NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+  );
+  CREATE INDEX IF NOT EXISTS idx_assets_last_used ON assets(last_used);
+"""
+
+# A single asset may take at most this fraction of the budget, so one video cannot flush it
+_MAX_ENTRY_FRACTION = 0.1
+
+# Responses without an explicit lifetime are reused for a tenth of their age since they
+# last changed, up to this long (the heuristic HTTP caches apply)
+_MAX_HEURISTIC_SECONDS = 24 * 3600.0
+
+
+class CachedAsset(NamedTuple):
+  url: str
+  content_type: str
+  body: bytes
+  etag: str | None
+  last_modified: str | None
+  expires_at: float
+
+
+def _http_date(value: str | None) -> float | None:
+  if not value:
+    return None
+  try:
+    return email.utils.parsedate_to_datetime(value).timestamp()
+  except (TypeError, ValueError):
+    return None
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: float) -> float | None:
+  """
+  How long a response may be reused without asking the server again.
+
+  Args:
+    headers: Response headers with lower-cased names.
+    now: Time the response was received.
+
+  Returns:
+    Seconds the response stays fresh, 0 if it must be revalidated before every use, or
+    None if it must not be stored.
+  """
+  directives: dict[str, str] = {}
+  for directive in headers.get('cache-control', '').split(','):
+    name, _, value = directive.strip().partition('=')
+    directives[name.lower()] = value.strip('"')
+
+  if 'no-store' in directives:
+    return None
+  if 'no-cache' in directives:
+    return 0.0
+  if 'max-age' in directives:
+    try:
+      return max(float(directives['max-age']), 0.0)
+    except ValueError:
+      return 0.0
+
+  expires = _http_date(headers.get('expires'))
+  if expires is not None:
+    return max(expires - (_http_date(headers.get('date')) or now), 0.0)
+
+  last_modified = _http_date(headers.get('last-modified'))
+  if last_modified is not None:
+    return min(max(now - last_modified, 0.0) * 0.1, _MAX_HEURISTIC_SECONDS)
+  return 0.0
+
+
+class AssetCache(SqliteLruStore):
+  """
+  Persistent LRU cache of downloaded stylesheets and images in a dedicated SQLite file.
+
+  Entries are keyed by absolute URL and keep the validators the server sent (ETag and
+  Last-Modified), so a stale entry can be confirmed with a conditional request instead of
+  downloaded again. When the stored bodies grow past max_bytes, the least recently used
+  ones are evicted.
+  """
+
+  schema = _SCHEMA
+  table = 'assets'
+  key_columns = ('url',)
+  blob_column = 'body'
+
+  def __init__(self, path: str, max_bytes: int, pool_size: int = 4):
+    super().__init__(path, max_bytes, pool_size)
+    self._revalidated = 0
+    self._saved_bytes = 0
+    self._downloaded_bytes = 0
+
+  def get(self, url: str) -> CachedAsset | None:
+    """
+    Look up a stored asset, fresh or not. Counts nothing until the caller reports how it
+    was used.
+    """
+    with self._pool.connection() as conn:
+      row = conn.execute(
+        """
+        SELECT url, content_type, body, etag, last_modified, expires_at FROM assets
+        WHERE url = ?
+        """,
+        (url,),
+      ).fetchone()
+    return CachedAsset(*row) if row is not None else None
+
+  def hit(self, entry: CachedAsset) -> None:
+    """
+    Record that a fresh entry was served without contacting the server.
+    """
+    with self._pool.connection() as conn:
+      self._touch(conn, [(entry.url,)], time.time())
+    with self._lock:
+      self._hits += 1
+      self._saved_bytes += len(entry.body)
+
+  def revalidate(
+    self, entry: CachedAsset, expires_at: float, etag: str | None, last_modified: str | None
+  ) -> None:
+    """
+    Record that the server confirmed a stale entry is unchanged (304 Not Modified).
+
+    Args:
+      entry: The confirmed entry.
+      expires_at: When it goes stale again.
+      etag: Validator sent with the confirmation, if any. The stored one is kept otherwise.
+      last_modified: Same for Last-Modified.
+    """
+    with self._pool.connection() as conn:
+      conn.execute(
+        'UPDATE assets SET expires_at = ?, etag = COALESCE(?, etag), '
+        'last_modified = COALESCE(?, last_modified), last_used = ? WHERE url = ?',
+        (expires_at, etag, last_modified, time.time(), entry.url),
+      )
+    with self._lock:
+      self._hits += 1
+      self._revalidated += 1
+      self._saved_bytes += len(entry.body)
+
+  def miss(self, size: int) -> None:
+    """
+    Record that an asset had to be downloaded in full.
+    """
+    with self._lock:
+      self._misses += 1
+      self._downloaded_bytes += size
+
+  def put(self, entry: CachedAsset) -> None:
+    """
+    Store an asset, replacing any previous copy of its URL, and evict the least recently
+    used entries if over budget. Assets too large for the budget are not stored.
+    """
+    size = len(entry.body)
+    if size > self.max_bytes * _MAX_ENTRY_FRACTION:
+      return
+
+    with self._pool.connection() as conn:
+      previous = conn.execute('SELECT LENGTH(body) FROM assets WHERE url = ?', (entry.url,))
+      row = previous.fetchone()
+      conn.execute(
+        'INSERT OR REPLACE INTO assets '
+        '(url, content_type, body, etag, last_modified, expires_at, last_used) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (*entry, time.time()),
+      )
+      self._stored(conn, size, replaced=row[0] if row is not None else None)
+
+  def stats(self) -> dict[str, Any]:
+    stats = super().stats()
+    with self._lock:
+      stats.update(
+        revalidated=self._revalidated,
+        saved_bytes=self._saved_bytes,
+        downloaded_bytes=self._downloaded_bytes,
+      )
+    return stats
+
+
+_asset_cache = SharedLruStore(
+  AssetCache,
+  lambda: settings.paths.asset_cache_path,
+  lambda: settings.ingestion.asset_cache_mb * 1024 * 1024,
+)
+
+
+def get_asset_cache() -> AssetCache | None:
+  """
+  Return the shared asset cache, reopening it if its path or budget changed.
+
+  Returns:
+    The cache, or None when it is disabled by a zero budget.
+  """
+  return _asset_cache.get()
@@ -0,0 +1,106 @@
+import queue
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+  """
+  Bounded pool of long-lived SQLite connections.
+
+  Each thread holds at most one connection at a time; nested acquisitions from the same
+  thread reuse it and only the outermost one commits. Idle connections stay open so the
+  pragmas and the parsed schema survive between queries.
+  """
+
+  def __init__(
+    self,
+    db_path: str,
+    size: int = 8,
+    pragmas: dict[str, str | int] | None = None,
+    timeout: float = 30.0,
+  ):
+    self.db_path = db_path
+    self.size = size
+    self.pragmas = pragmas or {}
+    self.timeout = timeout
+
+    self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+    self._slots = threading.BoundedSemaphore(size)
+    self._local = threading.local()
+    self._closed = False
+
+  def _connect(self) -> sqlite3.Connection:
+    conn = sqlite3.connect(self.db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for name, value in self.pragmas.items():
+      conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+  def _checkout(self) -> sqlite3.Connection:
+    if self._closed:
+      raise sqlite3.OperationalError('Connection pool is closed')
+    if not self._slots.acquire(timeout=self.timeout):
+      raise sqlite3.OperationalError(f'Timed out waiting for a connection to {self.db_path}')
+
+    try:
+      return self._idle.get_nowait()
+    except queue.Empty:
+      pass
+
+    try:
+      return self._connect()
+    except Exception:
+      self._slots.release()
+      raise
+
+  def _checkin(self, conn: sqlite3.Connection) -> None:
+    if self._closed or conn.in_transaction:
+      # A connection left mid-transaction is not safe to hand to another caller
+      conn.close()
+    else:
+      self._idle.put(conn)
+    self._slots.release()
+
+  @contextmanager
+  def connection(self) -> Iterator[sqlite3.Connection]:
+    """
+    Lease a connection for the current thread, committing on success.
+
+    Yields:
+      An open connection. Re-entrant calls on the same thread yield the same one.
+    """
+    conn: sqlite3.Connection | None = getattr(self._local, 'conn', None)
+    if conn is not None:
+      self._local.depth += 1
+      try:
+        yield conn
+      finally:
+        self._local.depth -= 1
+      return
+
+    conn = self._checkout()
+    self._local.conn = conn
+    self._local.depth = 1
+    try:
+      yield conn
+      conn.commit()
+    except Exception:
+      conn.rollback()
+      raise
+    finally:
+      self._local.conn = None
+      self._local.depth = 0
+      self._checkin(conn)
+
+  def close(self) -> None:
+    """
+    Close all idle connections. Connections currently leased are closed on return.
+    """
+    self._closed = True
+    while True:
+      try:
+        self._idle.get_nowait().close()
+      except queue.Empty:
+        break
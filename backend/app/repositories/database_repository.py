@@ -1,26 +1,58 @@
 import sqlite3
-from contextlib import contextmanager
+import threading
 
 from app.config import settings
+from app.config.schemas import DatabasePrefs
+from app.repositories.connection_pool import ConnectionPool
+from app.repositories.executor import BoundedExecutor
 from app.utils.errors import ServiceError
 
+_pool: ConnectionPool | None = None
+_pool_prefs: DatabasePrefs | None = None
+_pool_lock = threading.Lock()
+
+# One worker per pooled connection so async callers never queue on the pool itself
+database_executor = BoundedExecutor('database', lambda: settings.database.pool_size)
+
+
+def _build_pragmas(prefs: DatabasePrefs) -> dict[str, str | int]:
+  return {
+    'journal_mode': prefs.journal_mode,
+    'synchronous': prefs.synchronous,
+    'busy_timeout': prefs.busy_timeout_ms,
+    # Negative cache_size is interpreted as KiB rather than pages
+    'cache_size': -prefs.cache_size_kb,
+    'mmap_size': prefs.mmap_size_mb * 1024 * 1024,
+  }
+
+
+def get_pool() -> ConnectionPool:
+  """
+  Return the shared connection pool, rebuilding it if the database settings changed.
+  """
+  global _pool, _pool_prefs
+
+  db_path = settings.paths.db_path
+  prefs = settings.database
+  pool = _pool
+  if pool is not None and pool.db_path == db_path and prefs is _pool_prefs:
+    return pool
+
+  with _pool_lock:
+    if _pool is None or _pool.db_path != db_path or prefs != _pool_prefs:
+      if _pool is not None:
+        _pool.close()
+      _pool = ConnectionPool(db_path, size=prefs.pool_size, pragmas=_build_pragmas(prefs))
+    _pool_prefs = prefs
+    return _pool
+
 
 class DatabaseRepository:
   def __init__(self, **kwargs):
     super().__init__(**kwargs)
 
-  @contextmanager
   def _db_connection(self):
-    conn = sqlite3.connect(settings.paths.db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-      yield conn
-      conn.commit()
-    except Exception:
-      conn.rollback()
-      raise
-    finally:
-      conn.close()
+    return get_pool().connection()
 
   def execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
     """
@@ -123,3 +155,33 @@ class DatabaseRepository:
           db.execute(query, params)
     except sqlite3.Error as e:
       raise ServiceError(f'Database transaction failed: {str(e)}') from e
+
+  async def aexecute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+    """
+    Async variant of execute, run on the database executor.
+    """
+    return await database_executor.run(self.execute, query, params)
+
+  async def aexecute_many(self, query: str, params_list: list[tuple]) -> None:
+    """
+    Async variant of execute_many, run on the database executor.
+    """
+    await database_executor.run(self.execute_many, query, params_list)
+
+  async def afetch_all(self, query: str, params: tuple = ()) -> list[sqlite3.Row]:
+    """
+    Async variant of fetch_all, run on the database executor.
+    """
+    return await database_executor.run(self.fetch_all, query, params)
+
+  async def afetch_one(self, query: str, params: tuple = ()) -> sqlite3.Row | None:
+    """
+    Async variant of fetch_one, run on the database executor.
+    """
+    return await database_executor.run(self.fetch_one, query, params)
+
+  async def atransaction(self, operations: list[tuple[str, tuple]]) -> None:
+    """
+    Async variant of transaction, run on the database executor.
+    """
+    await database_executor.run(self.transaction, operations)
@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.repositories.embedding_providers import DelegatingEmbeddingFunction
+
+
+class BatchingEmbeddingFunction(DelegatingEmbeddingFunction):
+  """
+  Embedding function that coalesces concurrent calls into shared provider requests.
+
+  Callers hand their texts to a dispatcher thread and block until their vectors are back.
+  The dispatcher opens a batch with the first waiting call and adds the calls that arrive
+  within the window, and any still queued once it closes, until the batch holds max_batch
+  texts. It then sends the batch as one request, with duplicate texts sent once. Calls are
+  never split, so a single call larger than max_batch goes out on its own. Up to
+  max_in_flight batches run at once.
+
+  The window and batch size are read for every batch, so they can follow settings. After
+  close(), calls are sent straight to the wrapped function, unbatched.
+  """
+
+  def __init__(
+    self,
+    inner: EmbeddingFunction[Documents],
+    window_seconds: Callable[[], float],
+    max_batch: Callable[[], int],
+    max_in_flight: int = 4,
+  ):
+    super().__init__(inner)
+    self._window_seconds = window_seconds
+    self._max_batch = max_batch
+
+    # None asks the dispatcher to stop
+    self._queue: queue.SimpleQueue[tuple[list[str], Future] | None] = queue.SimpleQueue()
+    self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='embed')
+    self._dispatcher = threading.Thread(
+      target=self._dispatch_forever, name='embed-batcher', daemon=True
+    )
+    self._dispatcher.start()
+
+    self._lock = threading.Lock()
+    self._closed = False
+    self._batches = 0
+    self._calls = 0
+    self._texts = 0
+    self._largest = 0
+    self._calls_per_batch: Counter[int] = Counter()
+
+  def __call__(self, input: Documents) -> Embeddings:
+    texts = list(input)
+    if not texts:
+      return []
+
+    future: Future = Future()
+    with self._lock:
+      # Checked under the lock so nothing is queued behind the stop request
+      closed = self._closed
+      if not closed:
+        self._queue.put((texts, future))
+    if closed:
+      return self.inner(texts)
+    return future.result()
+
+  def close(self) -> None:
+    """
+    Stop the dispatcher once it has sent the calls already queued, and release the
+    executor's threads when their requests finish.
+    """
+    with self._lock:
+      if self._closed:
+        return
+      self._closed = True
+      self._queue.put(None)
+
+  def _dispatch_forever(self) -> None:
+    carry: tuple[list[str], Future] | None = None
+    stopping = False
+    while not stopping:
+      first = carry if carry is not None else self._queue.get()
+      carry = None
+      if first is None:
+        break
+      batch = [first]
+      size = len(first[0])
+      max_batch = self._max_batch()
+      deadline = time.monotonic() + self._window_seconds()
+
+      while size < max_batch:
+        remaining = deadline - time.monotonic()
+        try:
+          # Calls already waiting always join, so a zero window still batches under load
+          item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+        except queue.Empty:
+          break
+        if item is None:
+          stopping = True
+          break
+        if size + len(item[0]) > max_batch:
+          # Too big to join; it opens the next batch instead
+          carry = item
+          break
+        batch.append(item)
+        size += len(item[0])
+
+      self._executor.submit(self._send, batch)
+
+    # Batches already submitted still run; the worker threads exit after them
+    self._executor.shutdown(wait=False)
+
+  def _send(self, batch: list[tuple[list[str], Future]]) -> None:
+    unique = list(dict.fromkeys(text for texts, _future in batch for text in texts))
+    try:
+      vectors = dict(zip(unique, self.inner(unique), strict=True))
+    # Not swallowed: every caller in the batch gets the embedding function's own error
+    except Exception as e:  # noqa: BLE001
+      for _texts, future in batch:
+        future.set_exception(e)
+      return
+
+    for texts, future in batch:
+      future.set_result([vectors[text] for text in texts])
+
+    with self._lock:
+      self._batches += 1
+      self._calls += len(batch)
+      self._texts += len(unique)
+      self._largest = max(self._largest, len(unique))
+      self._calls_per_batch[len(batch)] += 1
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      return {
+        'batches': self._batches,
+        'calls': self._calls,
+        'texts': self._texts,
+        'mean_calls_per_batch': self._calls / self._batches if self._batches else 0.0,
+        'mean_texts_per_batch': self._texts / self._batches if self._batches else 0.0,
+        'largest_batch': self._largest,
+        'calls_per_batch': dict(sorted(self._calls_per_batch.items())),
+      }
@@ -0,0 +1,146 @@
+import hashlib
+import time
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.repositories.embedding_providers import DelegatingEmbeddingFunction
+from app.repositories.sqlite_lru import SqliteLruStore
+
+_SCHEMA = """
+  CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    dimensions INTEGER NOT NULL,
+    text_hash BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (model, dimensions, text_hash)
+  ) WITHOUT ROWID;
+  CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used);
+"""
+
+
+class EmbeddingCache(SqliteLruStore):
+  """
+  Persistent LRU cache of embedding vectors in a dedicated SQLite file.
+
+  Entries are keyed by (model, dimensions, sha256(text)) and stored as float32 blobs.
+  When the stored vectors grow past max_bytes, the least recently used ones are evicted.
+  """
+
+  schema = _SCHEMA
+  table = 'embeddings'
+  key_columns = ('model', 'dimensions', 'text_hash')
+  blob_column = 'vector'
+
+  @staticmethod
+  def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+  def get_many(self, model: str, dimensions: int, texts: list[str]) -> dict[str, np.ndarray]:
+    """
+    Look up cached vectors and mark them as recently used.
+
+    Args:
+      model: Embedding model name.
+      dimensions: Requested vector size, or 0 for the model's default.
+      texts: Texts to look up. Duplicates are fine.
+
+    Returns:
+      Vectors for the texts that were cached, keyed by text.
+    """
+    hashes = {self.text_hash(text): text for text in texts}
+    found: dict[str, np.ndarray] = {}
+
+    with self._pool.connection() as conn:
+      keys = list(hashes)
+      # Stay well under SQLite's bound-parameter limit
+      for start in range(0, len(keys), 500):
+        chunk = keys[start : start + 500]
+        placeholders = ', '.join('?' for _ in chunk)
+        rows = conn.execute(
+          f"""
+          SELECT text_hash, vector FROM embeddings
+          WHERE model = ? AND dimensions = ? AND text_hash IN ({placeholders})
+          """,
+          (model, dimensions, *chunk),
+        ).fetchall()
+        for row in rows:
+          found[hashes[row['text_hash']]] = np.frombuffer(row['vector'], dtype=np.float32)
+
+      if found:
+        self._touch(
+          conn, [(model, dimensions, self.text_hash(text)) for text in found], time.time()
+        )
+
+    with self._lock:
+      hits = sum(1 for text in texts if text in found)
+      self._hits += hits
+      self._misses += len(texts) - hits
+    return found
+
+  def put_many(self, model: str, dimensions: int, vectors: dict[str, Any]) -> None:
+    """
+    Store vectors and evict the least recently used entries if over budget.
+
+    Args:
+      model: Embedding model name.
+      dimensions: Requested vector size, or 0 for the model's default.
+      vectors: Vectors keyed by the text they embed.
+    """
+    if not vectors:
+      return
+
+    now = time.time()
+    rows = [
+      (model, dimensions, self.text_hash(text), np.asarray(vector, dtype=np.float32).tobytes(), now)
+      for text, vector in vectors.items()
+    ]
+
+    with self._pool.connection() as conn:
+      for row in rows:
+        # A key that is already present holds the same text's vector, so keep it
+        cursor = conn.execute(
+          'INSERT OR IGNORE INTO embeddings (model, dimensions, text_hash, vector, last_used) '
+          'VALUES (?, ?, ?, ?, ?)',
+          row,
+        )
+        if cursor.rowcount:
+          self._stored(conn, len(row[3]))
+
+
+class CachedEmbeddingFunction(DelegatingEmbeddingFunction):
+  """
+  Embedding function that serves repeated texts from an EmbeddingCache and only sends
+  the misses to the wrapped function, in one batch.
+
+  Documents and queries share entries: the wrapped providers embed both the same way, so
+  text embedded while searching is free to store later.
+  """
+
+  def __init__(
+    self,
+    inner: EmbeddingFunction[Documents],
+    cache: EmbeddingCache,
+    model: str,
+    dimensions: int = 0,
+  ):
+    super().__init__(inner)
+    self.cache = cache
+    self.model = model
+    self.dimensions = dimensions
+
+  def __call__(self, input: Documents) -> Embeddings:
+    texts = list(input)
+    if not texts:
+      return []
+
+    vectors: dict[str, Any] = self.cache.get_many(self.model, self.dimensions, texts)
+    missing = list(dict.fromkeys(text for text in texts if text not in vectors))
+    if missing:
+      embedded = dict(zip(missing, self.inner(missing), strict=True))
+      self.cache.put_many(self.model, self.dimensions, embedded)
+      vectors.update(embedded)
+
+    return [vectors[text] for text in texts]
@@ -0,0 +1,239 @@
+import os
+import re
+import threading
+import zlib
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import pairwise
+from typing import Any, NamedTuple
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings, Space
+from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
+
+from app.utils.errors import ServiceError
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+  """
+  Deterministic, fully local embedder based on signed feature hashing.
+
+  Each text is reduced to word unigrams, word bigrams and character trigrams. Every
+  feature is hashed with CRC32 into one of `dimensions` buckets with a hash-derived sign,
+  weighted by sublinear term frequency, and the vector is L2-normalized so cosine
+  similarity reflects shared vocabulary. No model files or network access are needed.
+
+  Large batches are split into chunks that run on a shared thread pool. Tokenizing and
+  hashing hold the GIL, so on a standard CPython build this bounds latency for concurrent
+  callers rather than speeding up a single batch; free-threaded builds scale with cores.
+  """
+
+  # Shared by every instance so rebuilding the function does not leak threads
+  _executor: ThreadPoolExecutor | None = None
+  _executor_lock = threading.Lock()
+
+  def __init__(self, dimensions: int = 384, batch_size: int = 64, max_workers: int | None = None):
+    self.dimensions = dimensions
+    self.batch_size = batch_size
+    self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+  @classmethod
+  def _get_executor(cls, max_workers: int) -> ThreadPoolExecutor:
+    with cls._executor_lock:
+      if cls._executor is None:
+        cls._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='embed')
+      return cls._executor
+
+  def __call__(self, input: Documents) -> Embeddings:
+    texts = list(input)
+    if len(texts) <= self.batch_size:
+      return list(self._embed_chunk(texts))
+
+    chunks = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+    executor = self._get_executor(self.max_workers)
+    return [vector for matrix in executor.map(self._embed_chunk, chunks) for vector in matrix]
+
+  def _embed_chunk(self, texts: list[str]) -> np.ndarray:
+    matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+    for row, text in enumerate(texts):
+      hashes = [zlib.crc32(feature.encode('utf-8')) for feature in self._features(text)]
+      if not hashes:
+        continue
+
+      hashed = np.asarray(hashes, dtype=np.uint64)
+      buckets = (hashed % self.dimensions).astype(np.intp)
+      signs = np.where((hashed // self.dimensions) & 1, -1.0, 1.0)
+      counts = np.bincount(buckets, weights=signs, minlength=self.dimensions)
+      vector = np.sign(counts) * np.log1p(np.abs(counts))
+
+      norm = np.linalg.norm(vector)
+      if norm > 0:
+        matrix[row] = vector / norm
+    return matrix
+
+  @staticmethod
+  def _features(text: str) -> list[str]:
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    features = list(tokens)
+    features.extend(f'{a} {b}' for a, b in pairwise(tokens))
+    for token in tokens:
+      padded = f'#{token}#'
+      features.extend(f'#3{padded[i : i + 3]}' for i in range(len(padded) - 2))
+    return features
+
+  @staticmethod
+  def name() -> str:
+    return 'local-hashing'
+
+  def default_space(self) -> Space:
+    return 'cosine'
+
+  def supported_spaces(self) -> list[Space]:
+    return ['cosine', 'l2', 'ip']
+
+  @staticmethod
+  def build_from_config(config: dict[str, Any]) -> 'HashingEmbeddingFunction':
+    return HashingEmbeddingFunction(dimensions=config.get('dimensions', 384))
+
+  def get_config(self) -> dict[str, Any]:
+    return {'dimensions': self.dimensions}
+
+
+class DelegatingEmbeddingFunction(EmbeddingFunction[Documents]):
+  """
+  Base for embedding functions that change how another one is called, not what it returns.
+
+  Chroma persists the embedding function's identity with each collection, so a wrapper
+  presents itself as the function it wraps. Queries are embedded like documents, as the
+  wrapped providers do.
+  """
+
+  def __init__(self, inner: EmbeddingFunction[Documents]):
+    self.inner = inner
+
+  def embed_query(self, input: Documents) -> Embeddings:
+    return self(input)
+
+  def name(self) -> str:
+    return self.inner.name()
+
+  def default_space(self) -> Space:
+    return self.inner.default_space()
+
+  def supported_spaces(self) -> list[Space]:
+    return self.inner.supported_spaces()
+
+  def get_config(self) -> dict[str, Any]:
+    return self.inner.get_config()
+
+  def is_legacy(self) -> bool:
+    return self.inner.is_legacy()
+
+
+class EmbeddingSpec(NamedTuple):
+  """
+  An embedding model and the vector size requested from it. Vectors are only comparable
+  with vectors made under the same spec.
+
+  Attributes:
+    model: Model name, as selected through ModelPrefs.embedding.
+    dimensions: Requested vector size, or 0 for the model's default.
+  """
+
+  model: str
+  dimensions: int = 0
+
+
+@dataclass(frozen=True)
+class EmbeddingProvider:
+  """
+  A family of embedding models and how to build an embedding function for one of them.
+
+  Attributes:
+    name: Short identifier, also used to namespace vector collections.
+    models: Model names selectable through ModelPrefs.embedding.
+    factory: Builds the embedding function for a model, an API key and a vector size
+      (0 for the model's default).
+    remote: Whether embedding calls leave the machine, and so are worth caching.
+    resizable_models: Models that accept a reduced vector size.
+  """
+
+  name: str
+  models: tuple[str, ...]
+  factory: Callable[[str, str, int], EmbeddingFunction]
+  remote: bool
+  resizable_models: tuple[str, ...] = ()
+
+
+def _openai_factory(model: str, api_key: str, dimensions: int) -> EmbeddingFunction:
+  return OpenAIEmbeddingFunction(api_key=api_key, model_name=model, dimensions=dimensions or None)
+
+
+def _local_factory(model: str, api_key: str, dimensions: int) -> EmbeddingFunction:
+  return HashingEmbeddingFunction(dimensions=dimensions or 384)
+
+
+EMBEDDING_PROVIDERS = [
+  EmbeddingProvider(
+    name='openai',
+    models=('text-embedding-3-small', 'text-embedding-3-large', 'text-embedding-ada-002'),
+    factory=_openai_factory,
+    remote=True,
+    # Matryoshka-trained models can be shortened without retraining
+    resizable_models=('text-embedding-3-small', 'text-embedding-3-large'),
+  ),
+  EmbeddingProvider(
+    name='local',
+    models=('local-hashing',),
+    factory=_local_factory,
+    remote=False,
+    resizable_models=('local-hashing',),
+  ),
+]
+
+
+def get_embedding_provider(model: str) -> EmbeddingProvider:
+  """
+  Find the provider serving an embedding model.
+
+  Raises:
+    ServiceError: If no provider offers the model.
+  """
+  for provider in EMBEDDING_PROVIDERS:
+    if model in provider.models:
+      return provider
+  raise ServiceError(f'No embedding provider for model {model}')
+
+
+def validate_embedding_spec(spec: EmbeddingSpec) -> EmbeddingProvider:
+  """
+  Check that a provider serves the model at the requested vector size.
+
+  Returns:
+    The provider.
+
+  Raises:
+    ServiceError: If no provider offers the model, or it cannot be resized.
+  """
+  provider = get_embedding_provider(spec.model)
+  if spec.dimensions and spec.model not in provider.resizable_models:
+    raise ServiceError(f'Embedding model {spec.model} does not support a custom vector size')
+  return provider
+
+
+def collection_namespace(spec: EmbeddingSpec) -> str:
+  """
+  Suffix that keeps each provider's, model's and vector size's vectors in their own
+  collections.
+
+  Vectors from different models are not comparable, and Chroma refuses to open a
+  collection with an embedding function other than the one it was created with. The
+  default vector size adds no suffix, so collections from before sizes were configurable
+  keep their names.
+  """
+  provider = get_embedding_provider(spec.model)
+  namespace = f'{provider.name}.{re.sub(r"[^a-zA-Z0-9_-]", "-", spec.model)}'
+  return f'{namespace}.d{spec.dimensions}' if spec.dimensions else namespace
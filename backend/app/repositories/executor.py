@@ -0,0 +1,55 @@
+import asyncio
+import functools
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar('T')
+
+
+class BoundedExecutor:
+  """
+  Lazily created thread pool for running blocking repository calls off the event loop.
+
+  The worker count is resolved on first use so it can follow settings that are only
+  available once the configuration has been loaded.
+  """
+
+  def __init__(self, name: str, max_workers: Callable[[], int]):
+    self.name = name
+    self._max_workers = max_workers
+    self._executor: ThreadPoolExecutor | None = None
+    self._lock = threading.Lock()
+
+  @property
+  def executor(self) -> ThreadPoolExecutor:
+    if self._executor is None:
+      with self._lock:
+        if self._executor is None:
+          self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers(),
+            thread_name_prefix=self.name,
+          )
+    return self._executor
+
+  async def run(self, func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking callable on the pool and await its result.
+
+    Args:
+      func: Blocking callable.
+      *args: Positional arguments for func.
+      **kwargs: Keyword arguments for func.
+
+    Returns:
+      Whatever func returns. Exceptions raised by func are re-raised.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+  def shutdown(self) -> None:
+    with self._lock:
+      if self._executor is not None:
+        self._executor.shutdown(wait=True)
+        self._executor = None
@@ -0,0 +1,160 @@
+import sqlite3
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from app.repositories.connection_pool import ConnectionPool
+
+# Eviction trims to this fraction of the budget so it does not run on every insert
+_LOW_WATERMARK = 0.9
+
+
+class SqliteLruStore:
+  """
+  Base for persistent LRU caches of blobs in a dedicated SQLite file.
+
+  Subclasses provide the schema of one table with a last_used column, and name the table,
+  the columns that key an entry and the column holding its blob. The store keeps count of
+  the entries and bytes it holds, and once the blobs grow past max_bytes, evicts the least
+  recently used entries.
+  """
+
+  schema: str
+  table: str
+  key_columns: tuple[str, ...]
+  blob_column: str
+
+  def __init__(self, path: str, max_bytes: int, pool_size: int = 4):
+    self.path = path
+    self.max_bytes = max_bytes
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    self._pool = ConnectionPool(
+      path,
+      size=pool_size,
+      pragmas={'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 5000},
+    )
+    with self._pool.connection() as conn:
+      conn.executescript(self.schema)
+      row = conn.execute(
+        f'SELECT COUNT(*), COALESCE(SUM(LENGTH({self.blob_column})), 0) FROM {self.table}'
+      )
+      self._entries, self._bytes = row.fetchone()
+
+    self._hits = 0
+    self._misses = 0
+    self._evictions = 0
+    self._lock = threading.Lock()
+
+  @property
+  def _key_condition(self) -> str:
+    return ' AND '.join(f'{column} = ?' for column in self.key_columns)
+
+  def _touch(self, conn: sqlite3.Connection, keys: list[tuple], now: float) -> None:
+    """
+    Mark entries as used at now.
+    """
+    conn.executemany(
+      f'UPDATE {self.table} SET last_used = ? WHERE {self._key_condition}',
+      [(now, *key) for key in keys],
+    )
+
+  def _stored(self, conn: sqlite3.Connection, size: int, replaced: int | None = None) -> None:
+    """
+    Count a blob just written, and evict if the store is now over budget.
+
+    Args:
+      conn: Connection the blob was written on.
+      size: Length of the blob.
+      replaced: Length of the blob it replaced, if its key was already present.
+    """
+    with self._lock:
+      if replaced is None:
+        self._entries += 1
+        self._bytes += size
+      else:
+        self._bytes += size - replaced
+      full = self._bytes > self.max_bytes
+
+    if full:
+      self._evict(conn)
+
+  def _evict(self, conn: sqlite3.Connection) -> None:
+    target = self.max_bytes * _LOW_WATERMARK
+    keys = ', '.join(self.key_columns)
+    victims = []
+    freed = 0
+    for row in conn.execute(
+      f'SELECT {keys}, LENGTH({self.blob_column}) FROM {self.table} ORDER BY last_used ASC'
+    ):
+      if self._bytes - freed <= target:
+        break
+      victims.append(tuple(row)[:-1])
+      freed += row[-1]
+
+    conn.executemany(f'DELETE FROM {self.table} WHERE {self._key_condition}', victims)
+    with self._lock:
+      self._entries -= len(victims)
+      self._bytes -= freed
+      self._evictions += len(victims)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      lookups = self._hits + self._misses
+      return {
+        'hits': self._hits,
+        'misses': self._misses,
+        'hit_rate': self._hits / lookups if lookups else 0.0,
+        'entries': self._entries,
+        'bytes': self._bytes,
+        'max_bytes': self.max_bytes,
+        'evictions': self._evictions,
+      }
+
+  def close(self) -> None:
+    self._pool.close()
+
+
+S = TypeVar('S', bound=SqliteLruStore)
+
+
+class SharedLruStore(Generic[S]):
+  """
+  Process-wide store opened on first use and reopened when its path or budget changes.
+  """
+
+  def __init__(
+    self,
+    open_store: Callable[[str, int], S],
+    path: Callable[[], str],
+    max_bytes: Callable[[], int],
+  ):
+    self._open_store = open_store
+    self._path = path
+    self._max_bytes = max_bytes
+    self._store: S | None = None
+    self._lock = threading.Lock()
+
+  def get(self) -> S | None:
+    """
+    Return the store for the current settings.
+
+    Returns:
+      The store, or None when it is disabled by a zero budget.
+    """
+    path = self._path()
+    max_bytes = self._max_bytes()
+    store = self._store
+    if store is not None and store.path == path and store.max_bytes == max_bytes:
+      return store
+
+    with self._lock:
+      if self._store is not None:
+        if self._store.path == path and self._store.max_bytes == max_bytes:
+          return self._store
+        self._store.close()
+        self._store = None
+      if max_bytes > 0:
+        self._store = self._open_store(path, max_bytes)
+      return self._store
@@ -0,0 +1,414 @@
+import json
+import random
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from chromadb.api.types import Metadata
+
+from app.config import settings
+from app.repositories.database_repository import DatabaseRepository, database_executor
+from app.repositories.vector_repository import (
+  VectorRepository,
+  flush_vector_stores,
+  vector_executor,
+)
+from app.utils.background import BackgroundWorker
+from app.utils.errors import ServiceError
+
+# Retry delays double from the base up to the cap
+_BACKOFF_BASE_SECONDS = 1.0
+_BACKOFF_CAP_SECONDS = 300.0
+
+# An idle worker still looks for rows queued by other processes, such as the reconcile command
+_POLL_INTERVAL_SECONDS = 5.0
+
+
+def _operation(collection: str, action: str, payload: dict[str, Any]) -> tuple[str, tuple]:
+  now = time.time()
+  return (
+    """
+    INSERT INTO vector_outbox (collection, action, payload, available_at, created_at)
+    VALUES (?, ?, ?, ?, ?)
+    """,
+    (collection, action, json.dumps(payload), now, now),
+  )
+
+
+def outbox_upsert(
+  collection: str,
+  ids: list[str],
+  documents: list[str],
+  metadatas: list[Metadata],
+  embeddings: list[list[float]] | None = None,
+  namespace: str | None = None,
+) -> tuple[str, tuple]:
+  """
+  Queue documents to be embedded and stored under ids, replacing any existing ones.
+
+  Args:
+    collection: Name of the collection.
+    ids: Document ids.
+    documents: Texts to embed and store (one per id).
+    metadatas: Metadata dicts (one per id).
+    embeddings: Optional vectors already computed for the documents. They are stored
+      as-is in collections of the same embedding namespace, and the documents are
+      embedded again for any other.
+    namespace: embedding_namespace of the repository that produced embeddings.
+
+  Returns:
+    A (query, params) operation to run in the transaction that writes the source rows.
+  """
+  payload: dict[str, Any] = {'ids': ids, 'documents': documents, 'metadatas': metadatas}
+  if embeddings is not None:
+    payload['embeddings'] = embeddings
+    payload['namespace'] = namespace
+  return _operation(collection, 'upsert', payload)
+
+
+def outbox_update_metadatas(
+  collection: str, ids: list[str], metadatas: list[Metadata]
+) -> tuple[str, tuple]:
+  """
+  Queue a metadata rewrite for existing documents, which does not re-embed them.
+
+  Returns:
+    A (query, params) operation to run in the transaction that writes the source rows.
+  """
+  return _operation(collection, 'update_metadatas', {'ids': ids, 'metadatas': metadatas})
+
+
+def outbox_delete(
+  collection: str, ids: list[str] | None = None, where: dict[str, Any] | None = None
+) -> tuple[str, tuple]:
+  """
+  Queue the removal of documents by id, or of every document matching a metadata filter.
+
+  Returns:
+    A (query, params) operation to run in the transaction that writes the source rows.
+  """
+  return _operation(collection, 'delete', {'ids': ids, 'where': where})
+
+
+def plan_repairs(
+  collection: str,
+  expected: dict[str, tuple[str, Metadata]],
+  entries: list[tuple[str, str, dict[str, Any]]],
+) -> tuple[list[tuple[str, tuple]], dict[str, int]]:
+  """
+  Compare what a collection should hold with what it holds, and queue the difference.
+
+  Args:
+    collection: Name of the collection.
+    expected: Document text and metadata that should be indexed, keyed by document id.
+    entries: (id, document, metadata) tuples currently in the collection.
+
+  Returns:
+    Outbox operations, and counts of missing, changed, relabelled and orphaned documents.
+  """
+  present = {doc_id: (document, metadata) for doc_id, document, metadata in entries}
+  orphaned = [doc_id for doc_id in present if doc_id not in expected]
+  missing = [doc_id for doc_id in expected if doc_id not in present]
+  changed = [
+    doc_id
+    for doc_id, (document, _metadata) in expected.items()
+    if doc_id in present and present[doc_id][0] != document
+  ]
+  relabelled = [
+    doc_id
+    for doc_id, (document, metadata) in expected.items()
+    if doc_id in present
+    and present[doc_id][0] == document
+    and any(present[doc_id][1].get(key) != value for key, value in metadata.items())
+  ]
+
+  operations = []
+  if orphaned:
+    operations.append(outbox_delete(collection, ids=orphaned))
+  if missing or changed:
+    upserts = missing + changed
+    operations.append(
+      outbox_upsert(
+        collection,
+        upserts,
+        [expected[doc_id][0] for doc_id in upserts],
+        [expected[doc_id][1] for doc_id in upserts],
+      )
+    )
+  if relabelled:
+    operations.append(
+      outbox_update_metadatas(
+        collection, relabelled, [expected[doc_id][1] for doc_id in relabelled]
+      )
+    )
+
+  counts = {
+    'missing': len(missing),
+    'changed': len(changed),
+    'relabelled': len(relabelled),
+    'orphaned': len(orphaned),
+  }
+  return operations, counts
+
+
+def _group_rows(rows: list[sqlite3.Row]) -> list[list[tuple[sqlite3.Row, dict[str, Any]]]]:
+  """
+  Decode rows and split them into runs that can each be applied with one index call.
+
+  Consecutive writes of the same kind to the same collection are merged. Filtered deletes
+  stay on their own because what they match depends on the writes before them.
+  """
+  groups: list[list[tuple[sqlite3.Row, dict[str, Any]]]] = []
+  previous_key = None
+  for row in rows:
+    payload = json.loads(row['payload'])
+    filtered = payload.get('where') is not None
+    key = (row['collection'], row['action'])
+    if groups and not filtered and key == previous_key:
+      groups[-1].append((row, payload))
+    else:
+      groups.append([(row, payload)])
+    previous_key = None if filtered else key
+  return groups
+
+
+class VectorOutbox(DatabaseRepository, VectorRepository):
+  """
+  Applies vector index writes queued in the vector_outbox table.
+
+  Services queue writes in the same SQLite transaction as the rows they describe, so a
+  committed row always has its index write queued and a rolled-back one never does. Rows
+  are applied in the order they were committed, in batches. A failed batch is retried with
+  exponential backoff and holds back the rows behind it, so writes to a document never
+  apply out of order. After outbox_max_attempts the batch is set aside for the reconcile
+  command, and the rows behind it proceed.
+
+  While the collections of another embedding spec are being built, mirror is set to a
+  repository for that spec and every write is applied to it as well. Writes the mirror
+  fails to apply are logged and dropped rather than retried; the rebuild and the reconcile
+  command repair them.
+  """
+
+  def __init__(self):
+    super().__init__()
+
+    self.mirror: VectorRepository | None = None
+    self._drain_lock = threading.Lock()
+    self._applied = 0
+    self._retries = 0
+    self._failed = 0
+    self._mirror_failures = 0
+    self.next_due: float | None = None
+
+  def drain(self) -> int:
+    """
+    Apply every due row, stopping at the first batch that fails or is still backing off.
+    The vector stores are flushed once per fetched batch, not once per write.
+
+    Returns:
+      Number of rows applied. 0 if another drain is already running.
+    """
+    if not self._drain_lock.acquire(blocking=False):
+      return 0
+
+    try:
+      applied = 0
+      batch_size = settings.vectors.outbox_batch_size
+      while True:
+        rows = self.fetch_all(
+          """
+          SELECT id, collection, action, payload, attempts, available_at
+          FROM vector_outbox
+          WHERE failed_at IS NULL
+          ORDER BY id
+          LIMIT ?
+          """,
+          (batch_size,),
+        )
+        now = time.time()
+        waiting = next((i for i, row in enumerate(rows) if row['available_at'] > now), None)
+        due = rows if waiting is None else rows[:waiting]
+        self.next_due = None if waiting is None else rows[waiting]['available_at']
+
+        done: list[sqlite3.Row] = []
+        failed = False
+        for group in _group_rows(due):
+          try:
+            self._apply(self, group)
+          # Whatever the index or the embedding API raises is recorded and retried
+          except Exception as e:  # noqa: BLE001
+            self._retry([row for row, _payload in group], e)
+            failed = True
+            break
+          done.extend(row for row, _payload in group)
+
+          mirror = self.mirror
+          if mirror is not None:
+            try:
+              self._apply(mirror, group)
+            # Not retried: the rebuild queues whatever its collections miss before it
+            # switches to them, and the active index must not wait on the new spec
+            except Exception as e:  # noqa: BLE001
+              self._mirror_failures += len(group)
+              print(f'Vector outbox could not mirror {len(group)} writes: {e}')
+
+        if done:
+          # Stores that keep writes in memory save them before their rows leave the outbox
+          flush_vector_stores()
+          self.execute_many(
+            'DELETE FROM vector_outbox WHERE id = ?', [(row['id'],) for row in done]
+          )
+          applied += len(done)
+          self._applied += len(done)
+
+        if failed or len(due) < batch_size:
+          return applied
+    finally:
+      self._drain_lock.release()
+
+  @staticmethod
+  def _apply(repository: VectorRepository, group: list[tuple[sqlite3.Row, dict[str, Any]]]) -> None:
+    collection = group[0][0]['collection']
+    action = group[0][0]['action']
+    payloads = [payload for _row, payload in group]
+
+    if action == 'delete' and payloads[0]['where'] is not None:
+      repository.delete_documents(collection, where=payloads[0]['where'])
+    elif action == 'delete':
+      ids = list(dict.fromkeys(doc_id for payload in payloads for doc_id in payload['ids']))
+      repository.delete_documents(collection, ids=ids)
+    elif action == 'upsert':
+      # A later write to an id in the same batch supersedes an earlier one
+      documents: dict[str, tuple[str, Metadata, list[float] | None]] = {}
+      namespace = repository.embedding_namespace
+      for payload in payloads:
+        embeddings = payload.get('embeddings')
+        if embeddings is None or payload.get('namespace') != namespace:
+          embeddings = [None] * len(payload['ids'])
+        for doc_id, document, metadata, embedding in zip(
+          payload['ids'], payload['documents'], payload['metadatas'], embeddings, strict=True
+        ):
+          documents[doc_id] = (document, metadata, embedding)
+
+      # Documents that arrive with a vector skip the embedding request
+      for precomputed in (True, False):
+        batch = {
+          doc_id: entry
+          for doc_id, entry in documents.items()
+          if (entry[2] is not None) == precomputed
+        }
+        if batch:
+          repository.add_documents(
+            collection,
+            [document for document, _metadata, _embedding in batch.values()],
+            [metadata for _document, metadata, _embedding in batch.values()],
+            ids=list(batch),
+            embeddings=[entry[2] for entry in batch.values()] if precomputed else None,
+          )
+    elif action == 'update_metadatas':
+      metadatas: dict[str, Metadata] = {}
+      for payload in payloads:
+        metadatas.update(zip(payload['ids'], payload['metadatas'], strict=True))
+      repository.update_metadatas(collection, list(metadatas), list(metadatas.values()))
+    else:
+      raise ServiceError(f'Unknown vector outbox action {action}')
+
+  def _retry(self, group: list[sqlite3.Row], error: Exception) -> None:
+    now = time.time()
+    attempts = max(row['attempts'] for row in group) + 1
+    delay = min(_BACKOFF_CAP_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    # Jitter keeps several app instances from retrying a recovering API in lockstep
+    available_at = now + delay * random.uniform(0.5, 1.0)
+    give_up = attempts >= settings.vectors.outbox_max_attempts
+
+    self.execute_many(
+      """
+      UPDATE vector_outbox
+      SET attempts = ?, last_error = ?, available_at = ?, failed_at = ?
+      WHERE id = ?
+      """,
+      [(attempts, str(error), available_at, now if give_up else None, row['id']) for row in group],
+    )
+    self.next_due = now if give_up else available_at
+    if give_up:
+      self._failed += len(group)
+      print(f'Vector outbox gave up on {len(group)} writes after {attempts} attempts: {error}')
+    else:
+      self._retries += 1
+
+  def discard_failed(self) -> int:
+    """
+    Drop writes that ran out of attempts, once a reconcile has repaired what they missed.
+
+    Returns:
+      Number of rows dropped.
+    """
+    return self.execute('DELETE FROM vector_outbox WHERE failed_at IS NOT NULL').rowcount
+
+  def stats(self) -> dict[str, Any]:
+    row = self.fetch_one(
+      """
+      SELECT
+        COUNT(*) FILTER (WHERE failed_at IS NULL) as pending,
+        COUNT(*) FILTER (WHERE failed_at IS NOT NULL) as failed,
+        MIN(created_at) FILTER (WHERE failed_at IS NULL) as oldest_pending
+      FROM vector_outbox
+      """
+    )
+    oldest = row['oldest_pending'] if row else None
+    return {
+      'pending': row['pending'] if row else 0,
+      'failed': row['failed'] if row else 0,
+      'oldest_pending_seconds': time.time() - oldest if oldest is not None else 0.0,
+      'applied': self._applied,
+      'retries': self._retries,
+      'gave_up': self._failed,
+      'mirror_failures': self._mirror_failures,
+    }
+
+  async def adrain(self) -> int:
+    """
+    Async variant of drain, run on the vector executor.
+    """
+    return await vector_executor.run(self.drain)
+
+  async def astats(self) -> dict[str, Any]:
+    """
+    Async variant of stats, run on the database executor.
+    """
+    return await database_executor.run(self.stats)
+
+
+class OutboxWorker(BackgroundWorker):
+  """
+  Background task that drains the vector outbox for the lifetime of the app.
+
+  Services call wake() after committing a write, so the index usually catches up within
+  one embedding request. Otherwise the worker sleeps until the next retry is due or the
+  poll interval passes.
+  """
+
+  def __init__(self, poll_interval: float = _POLL_INTERVAL_SECONDS):
+    super().__init__('vector-outbox', poll_interval)
+    self._outbox: VectorOutbox | None = None
+
+  @property
+  def outbox(self) -> VectorOutbox:
+    if self._outbox is None:
+      self._outbox = VectorOutbox()
+    return self._outbox
+
+  async def _round(self) -> float | None:
+    try:
+      await self.outbox.adrain()
+    # Logged and retried next round; the worker must outlive any one failure
+    except Exception as e:  # noqa: BLE001
+      print(f'Vector outbox drain failed: {e}')
+
+    if self.outbox.next_due is None:
+      return None
+    return max(0.0, self.outbox.next_due - time.time())
+
+
+outbox_worker = OutboxWorker()
@@ -1,21 +1,199 @@
-from typing import Any, cast
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
 from uuid import uuid4
 
 import chromadb
+import numpy as np
 from chromadb.api.types import Metadata
-from chromadb.utils.embedding_functions import OpenAIEmbeddingFunction
 
 from app.config import settings
+from app.repositories.embedding_batcher import BatchingEmbeddingFunction
+from app.repositories.embedding_cache import CachedEmbeddingFunction, EmbeddingCache
+from app.repositories.embedding_providers import (
+  EmbeddingProvider,
+  EmbeddingSpec,
+  collection_namespace,
+  validate_embedding_spec,
+)
+from app.repositories.executor import BoundedExecutor
+from app.repositories.sqlite_lru import SharedLruStore
+from app.repositories.vector_stores import (
+  ChromaVectorStore,
+  NumpyVectorStore,
+  Precision,
+  VectorStore,
+)
 from app.utils.errors import ServiceError
 
+# Embedding requests are network-bound, so they get their own pool and never hold up
+# database work queued on the database executor
+vector_executor = BoundedExecutor('vector', lambda: 4)
+
+# Numpy stores hold their index in memory, so every repository must share one per directory
+_numpy_stores: dict[str, NumpyVectorStore] = {}
+_numpy_stores_lock = threading.Lock()
+
+# (api_key, batcher) per spec. A batcher is closed when its spec's API key changes.
+_embedding_batchers: dict[EmbeddingSpec, tuple[str, BatchingEmbeddingFunction]] = {}
+_embedding_batchers_lock = threading.Lock()
+
+# (path of the record, spec recorded there)
+_active_embedding: tuple[Path, EmbeddingSpec] | None = None
+_active_embedding_lock = threading.Lock()
+
+_embedding_cache = SharedLruStore(
+  EmbeddingCache,
+  lambda: settings.paths.embedding_cache_path,
+  lambda: settings.model.embedding_cache_mb * 1024 * 1024,
+)
+
+
+def get_embedding_cache() -> EmbeddingCache | None:
+  """
+  Return the shared embedding cache, reopening it if its path or budget changed.
+
+  Returns:
+    The cache, or None when it is disabled by a zero budget.
+  """
+  return _embedding_cache.get()
+
+
+def configured_embedding() -> EmbeddingSpec:
+  """
+  Return the embedding spec selected in settings. It serves searches once its
+  collections have been built; see get_active_embedding.
+  """
+  return EmbeddingSpec(settings.model.embedding, settings.model.embedding_dimensions)
+
+
+def _active_embedding_path() -> Path:
+  return Path(settings.paths.vector_path) / 'active_embedding.json'
+
+
+def get_active_embedding() -> EmbeddingSpec:
+  """
+  Return the embedding spec whose collections serve reads and writes.
+
+  It is recorded next to the vector index and only moves to a newly configured spec when
+  the re-embedding job has built that spec's collections. An index without a record
+  adopts the configured spec.
+  """
+  global _active_embedding
+
+  path = _active_embedding_path()
+  active = _active_embedding
+  if active is not None and active[0] == path:
+    return active[1]
+
+  with _active_embedding_lock:
+    if _active_embedding is None or _active_embedding[0] != path:
+      try:
+        spec = EmbeddingSpec(**json.loads(path.read_text()))
+      except FileNotFoundError:
+        spec = configured_embedding()
+        _write_active_embedding(path, spec)
+      except (ValueError, TypeError) as e:
+        raise ServiceError(f'Unreadable active embedding record {path}: {e}') from e
+      _active_embedding = (path, spec)
+    return _active_embedding[1]
+
+
+def set_active_embedding(spec: EmbeddingSpec) -> None:
+  """
+  Switch reads and writes to another spec's collections. The record is replaced
+  atomically, so a crash leaves either the old or the new spec active.
+  """
+  global _active_embedding
+
+  path = _active_embedding_path()
+  with _active_embedding_lock:
+    _write_active_embedding(path, spec)
+    _active_embedding = (path, spec)
+
+
+def _write_active_embedding(path: Path, spec: EmbeddingSpec) -> None:
+  path.parent.mkdir(parents=True, exist_ok=True)
+  temporary = path.with_suffix('.tmp')
+  temporary.write_text(json.dumps(spec._asdict()))
+  os.replace(temporary, path)
+
+
+def get_embedding_batcher(
+  provider: EmbeddingProvider, spec: EmbeddingSpec, api_key: str
+) -> BatchingEmbeddingFunction:
+  """
+  Return the process-wide batcher for a spec, so concurrent callers from every
+  repository share its requests. The batcher built for a previous API key is closed.
+  """
+  with _embedding_batchers_lock:
+    entry = _embedding_batchers.get(spec)
+    if entry is not None:
+      if entry[0] == api_key:
+        return entry[1]
+      entry[1].close()
+
+    batcher = BatchingEmbeddingFunction(
+      provider.factory(spec.model, api_key, spec.dimensions),
+      window_seconds=lambda: settings.model.embedding_batch_window_ms / 1000,
+      max_batch=lambda: settings.model.embedding_batch_size,
+    )
+    _embedding_batchers[spec] = (api_key, batcher)
+    return batcher
+
+
+def close_embedding_batchers() -> None:
+  """
+  Close every batcher. Ones needed again are rebuilt on next use.
+  """
+  with _embedding_batchers_lock:
+    for _api_key, batcher in _embedding_batchers.values():
+      batcher.close()
+    _embedding_batchers.clear()
+
+
+def get_numpy_store(
+  directory: str, embedding_function: chromadb.EmbeddingFunction, precision: Precision
+) -> NumpyVectorStore:
+  """
+  Return the process-wide numpy store for a directory, opening it on first use.
+  """
+  with _numpy_stores_lock:
+    store = _numpy_stores.get(directory)
+    if store is None:
+      store = NumpyVectorStore(directory, embedding_function, precision)
+      _numpy_stores[directory] = store
+    store.embedding_function = embedding_function
+    return store
+
+
+def flush_vector_stores() -> None:
+  """
+  Save what was written to the numpy stores since their last flush. Chroma collections
+  persist every write themselves.
+  """
+  with _numpy_stores_lock:
+    stores = list(_numpy_stores.values())
+  for store in stores:
+    store.flush()
+
 
 class VectorRepository:
-  def __init__(self, **kwargs):
+  def __init__(self, embedding: EmbeddingSpec | None = None, **kwargs):
+    """
+    Args:
+      embedding: Spec whose collections this repository works on. Defaults to the active
+        spec, following it when it changes.
+    """
     super().__init__(**kwargs)
 
     self._chroma_client = None
+    self._pinned_embedding = embedding
     self._embedding_function = None
-    self._collection_cache: dict[str, chromadb.Collection] = {}
+    self._embedding_key: tuple[EmbeddingSpec, str] | None = None
+    self._collection_cache: dict[tuple, VectorStore] = {}
 
   @property
   def chroma_client(self):
@@ -26,77 +204,232 @@ class VectorRepository:
         raise ServiceError(f'Failed to initialize ChromaDB client: {str(e)}') from e
     return self._chroma_client
 
-  # TODO: Must reset embedding_function if API key or model changes during runtime
+  @property
+  def embedding_spec(self) -> EmbeddingSpec:
+    return self._pinned_embedding or get_active_embedding()
+
+  @property
+  def embedding_namespace(self) -> str:
+    """
+    Identifies the vectors this repository makes; vectors are interchangeable only
+    between repositories with the same namespace.
+    """
+    return collection_namespace(self.embedding_spec)
+
   @property
   def embedding_function(self) -> chromadb.EmbeddingFunction:
-    if self._embedding_function is None:
+    spec = self.embedding_spec
+    api_key = settings.model.openai_api_key
+    if self._embedding_function is None or self._embedding_key != (spec, api_key):
+      provider = validate_embedding_spec(spec)
       try:
-        self._embedding_function = OpenAIEmbeddingFunction(
-          api_key=settings.model.openai_api_key,
-          model_name=settings.model.embedding,
-        )
+        if provider.remote:
+          embedding_function = get_embedding_batcher(provider, spec, api_key)
+        else:
+          embedding_function = provider.factory(spec.model, api_key, spec.dimensions)
       except Exception as e:
-        raise ServiceError(f'Failed to initialize OpenAI embedding function: {str(e)}') from e
+        raise ServiceError(f'Failed to initialize {provider.name} embedding function: {e}') from e
+
+      cache = get_embedding_cache() if provider.remote else None
+      if cache is not None:
+        embedding_function = CachedEmbeddingFunction(
+          embedding_function, cache, model=spec.model, dimensions=spec.dimensions
+        )
+
+      # Collections are bound to the function they were opened with
+      self._collection_cache.clear()
+      self._embedding_function = embedding_function
+      self._embedding_key = (spec, api_key)
     return self._embedding_function
 
-  def _get_collection(self, collection_name: str) -> chromadb.Collection:
+  def embedding_cache_stats(self) -> dict[str, Any] | None:
+    cache = get_embedding_cache()
+    return cache.stats() if cache is not None else None
+
+  def embedding_batch_stats(self) -> dict[str, Any] | None:
+    with _embedding_batchers_lock:
+      entry = _embedding_batchers.get(self.embedding_spec)
+    if entry is None or entry[0] != settings.model.openai_api_key:
+      return None
+    return entry[1].stats()
+
+  def _get_collection(self, collection_name: str) -> VectorStore:
     """
-    Get or create a collection with cosine similarity and embedding function.
+    Get or create the vector store behind a collection, using the configured backend.
+
+    The collection is namespaced by the embedding provider, model and vector size, so
+    vectors from different specs never share an index and each spec's collections can be
+    built while another spec's serve searches.
 
     Args:
-      collection_name: Name of the collection
+      collection_name: Logical name of the collection
 
     Returns:
-      ChromaDB collection
+      Vector store for the collection
 
     Note:
-      Distance metric is hardcoded to 'cosine' because our similarity calculation
+      Chroma's distance metric is hardcoded to 'cosine' because our similarity calculation
       (similarity = 1 - distance) only works correctly with cosine distance.
     """
-    if collection_name not in self._collection_cache:
+    embedding_function = self.embedding_function
+    spec = self._embedding_key[0]
+    backend = settings.vectors.backend
+    precision = settings.vectors.precision
+    key = (collection_name, backend, precision, settings.paths.vector_path)
+    if key not in self._collection_cache:
+      name = f'{collection_name}.{collection_namespace(spec)}'
       try:
-        self._collection_cache[collection_name] = self.chroma_client.get_or_create_collection(
-          name=collection_name,
-          embedding_function=self.embedding_function,
-          metadata={'hnsw:space': 'cosine'},
-        )
+        if backend == 'numpy':
+          self._collection_cache[key] = get_numpy_store(
+            str(Path(settings.paths.vector_path) / 'numpy' / f'{name}.{precision}'),
+            embedding_function,
+            precision,
+          )
+        else:
+          if not spec.dimensions:
+            self._adopt_legacy_collection(collection_name, name, spec.model, embedding_function)
+          collection = self.chroma_client.get_or_create_collection(
+            name=name,
+            embedding_function=embedding_function,
+            metadata={'hnsw:space': 'cosine'},
+          )
+          self._collection_cache[key] = ChromaVectorStore(collection)
       except Exception as e:
         raise ServiceError(f'Failed to get or create collection {collection_name}: {str(e)}') from e
-    return self._collection_cache[collection_name]
+    return self._collection_cache[key]
+
+  def _adopt_legacy_collection(
+    self,
+    legacy_name: str,
+    name: str,
+    model: str,
+    embedding_function: chromadb.EmbeddingFunction,
+  ) -> None:
+    """
+    Rename a collection from before namespacing if it was built with the current model.
+    """
+    existing = {collection.name for collection in self.chroma_client.list_collections()}
+    if legacy_name not in existing or name in existing:
+      return
+
+    try:
+      legacy = self.chroma_client.get_collection(
+        name=legacy_name, embedding_function=embedding_function
+      )
+    except ValueError:
+      # Persisted with a different embedding function; leave it alone
+      return
+
+    config = (legacy.configuration_json or {}).get('embedding_function') or {}
+    if config.get('config', {}).get('model_name') == model:
+      legacy.modify(name=name)
+
+  def embed_documents(self, documents: list[str]) -> list[list[float]]:
+    """
+    Embed texts with the current embedding function, for reuse in later calls by
+    repositories with the same embedding_namespace.
+
+    Args:
+      documents: Texts to embed.
+
+    Returns:
+      One vector per text, as plain floats so it can be serialized.
+    """
+    if not documents:
+      return []
+
+    embedding_function = self.embedding_function
+    try:
+      return [
+        np.asarray(vector, dtype=np.float32).tolist() for vector in embedding_function(documents)
+      ]
+    except Exception as e:
+      raise ServiceError(f'Failed to embed documents: {e}') from e
 
   def add_documents(
     self,
     collection_name: str,
     documents: list[str],
     metadatas: list[Metadata] | None = None,
+    ids: list[str] | None = None,
+    embeddings: list[list[float]] | None = None,
   ) -> None:
     """
-    Add documents to a collection. Embeddings are automatically generated.
+    Add documents to a collection. Embeddings are generated unless they are given.
 
     Args:
       collection_name: Name of the collection.
       documents: List of text strings to add.
       metadatas: Optional list of metadata dicts (one per document).
         Each metadata dict can contain str, int, float, bool, or None values.
+      ids: Optional document ids (one per document). Documents whose id already exists
+        are replaced. Random ids are generated when omitted.
+      embeddings: Optional vectors (one per document) from embed_documents under the
+        same embedding spec. Skips the embedding request.
     """
     if not documents:
       return
 
     try:
       collection = self._get_collection(collection_name)
-      ids = [str(uuid4()) for _ in documents]
-
-      collection.add(
-        documents=documents,
-        metadatas=metadatas,
-        ids=ids,
-      )
+      if ids is None:
+        collection.add(
+          [str(uuid4()) for _ in documents], documents, metadatas, embeddings=embeddings
+        )
+      else:
+        collection.add(ids, documents, metadatas, upsert=True, embeddings=embeddings)
     except ServiceError:
       raise
     except Exception as e:
       msg = f'Failed to add documents to {collection_name}: {str(e)}'
       raise ServiceError(msg) from e
 
+  def get_embeddings(
+    self, collection_name: str, ids: list[str]
+  ) -> dict[str, tuple[str, list[float]]]:
+    """
+    Get stored vectors by document id, without embedding anything.
+
+    Args:
+      collection_name: Name of the collection.
+      ids: Document ids to look up.
+
+    Returns:
+      (document_text, vector) tuples keyed by id. Ids that are not stored are left out.
+    """
+    if not ids:
+      return {}
+
+    try:
+      collection = self._get_collection(collection_name)
+      return collection.get_embeddings(ids)
+    except ServiceError:
+      raise
+    except Exception as e:
+      raise ServiceError(f'Failed to get embeddings from {collection_name}: {e}') from e
+
+  def update_metadatas(
+    self, collection_name: str, ids: list[str], metadatas: list[Metadata]
+  ) -> None:
+    """
+    Replace the metadata of existing documents without re-embedding them.
+
+    Args:
+      collection_name: Name of the collection.
+      ids: Ids of the documents to update.
+      metadatas: New metadata dicts (one per id).
+    """
+    if not ids:
+      return
+
+    try:
+      collection = self._get_collection(collection_name)
+      collection.update_metadatas(ids, metadatas)
+    except ServiceError:
+      raise
+    except Exception as e:
+      raise ServiceError(f'Failed to update documents in {collection_name}: {e}') from e
+
   def get_documents(
     self, collection_name: str, where: dict[str, Any] | None = None
   ) -> list[tuple[str, dict[str, Any]]]:
@@ -112,38 +445,50 @@ class VectorRepository:
     """
     try:
       collection = self._get_collection(collection_name)
-      results = collection.get(where=where)
+      return [(document, metadata) for _id, document, metadata in collection.get(where)]
+    except ServiceError:
+      raise
+    except Exception as e:
+      raise ServiceError(f'Failed to get documents from {collection_name}: {str(e)}') from e
 
-      documents: list[tuple[str, dict[str, Any]]] = []
-      ids = results.get('ids', [])
-      docs = results.get('documents') or []
-      metas = results.get('metadatas') or []
+  def get_document_entries(
+    self, collection_name: str, where: dict[str, Any] | None = None
+  ) -> list[tuple[str, str, dict[str, Any]]]:
+    """
+    Get all documents from a collection together with their ids.
 
-      for i in range(len(ids)):
-        doc_text = docs[i] if i < len(docs) else ''
-        metadata = metas[i] if i < len(metas) else {}
-        documents.append((str(doc_text), dict(metadata or {})))
+    Args:
+      collection_name: Name of the collection.
+      where: Optional metadata filter dict.
 
-      return documents
+    Returns:
+      List of (id, document_text, metadata) tuples.
+    """
+    try:
+      collection = self._get_collection(collection_name)
+      return collection.get(where)
     except ServiceError:
       raise
     except Exception as e:
       raise ServiceError(f'Failed to get documents from {collection_name}: {str(e)}') from e
 
-  def delete_documents(self, collection_name: str, where: dict[str, Any]) -> None:
+  def delete_documents(
+    self,
+    collection_name: str,
+    where: dict[str, Any] | None = None,
+    ids: list[str] | None = None,
+  ) -> None:
     """
-    Delete documents from a collection matching metadata filter.
+    Delete documents from a collection by id or matching a metadata filter.
 
     Args:
       collection_name: Name of the collection.
       where: Metadata filter dict.
+      ids: Document ids to delete. Takes precedence over where.
     """
     try:
       collection = self._get_collection(collection_name)
-      results = collection.get(where=where)
-      ids = results.get('ids', [])
-      if ids:
-        collection.delete(ids=ids)
+      collection.delete(ids=ids, where=where)
     except ServiceError:
       raise
     except Exception as e:
@@ -164,31 +509,122 @@ class VectorRepository:
       List of (document_text, metadata, similarity_score) tuples.
       Similarity score is 0-1, where higher means more similar.
     """
+    return self.search_documents_many(collection_name, [query], k)[0]
+
+  def search_documents_many(
+    self,
+    collection_name: str,
+    queries: list[str],
+    k: int = 10,
+    embeddings: list[list[float]] | None = None,
+  ) -> list[list[tuple[str, dict[str, Any], float]]]:
+    """
+    Search for several queries at once: one embedding request and one index query.
+
+    Args:
+      collection_name: Name of the collection.
+      queries: Search query texts.
+      k: Number of results to return per query.
+      embeddings: Optional precomputed query vectors (one per query), which skip the
+        embedding request.
+
+    Returns:
+      One list of (document_text, metadata, similarity_score) tuples per query, in the
+      order of queries. Similarity score is 0-1, where higher means more similar.
+    """
+    if not queries:
+      return []
+
     try:
       collection = self._get_collection(collection_name)
+      return collection.query(queries, k, embeddings=embeddings)
+    except ServiceError:
+      raise
+    except Exception as e:
+      raise ServiceError(f'Failed to search documents in {collection_name}: {str(e)}') from e
 
-      results = collection.query(query_texts=[query], n_results=k)
+  async def aembed_documents(self, documents: list[str]) -> list[list[float]]:
+    """
+    Async variant of embed_documents, run on the vector executor.
+    """
+    return await vector_executor.run(self.embed_documents, documents)
 
-      documents: list[tuple[str, dict[str, Any], float]] = []
+  async def aadd_documents(
+    self,
+    collection_name: str,
+    documents: list[str],
+    metadatas: list[Metadata] | None = None,
+    ids: list[str] | None = None,
+    embeddings: list[list[float]] | None = None,
+  ) -> None:
+    """
+    Async variant of add_documents, run on the vector executor.
+    """
+    await vector_executor.run(
+      self.add_documents, collection_name, documents, metadatas, ids, embeddings
+    )
 
-      result_ids = cast(list[list[str]], results.get('ids', [[]]))[0]
-      result_docs = cast(list[list[str]], results.get('documents', [[]]))[0]
-      result_metas = cast(list[list[dict[str, Any]]], results.get('metadatas', [[]]))[0]
-      result_distances = cast(list[list[float]], results.get('distances', [[]]))[0]
+  async def aget_embeddings(
+    self, collection_name: str, ids: list[str]
+  ) -> dict[str, tuple[str, list[float]]]:
+    """
+    Async variant of get_embeddings, run on the vector executor.
+    """
+    return await vector_executor.run(self.get_embeddings, collection_name, ids)
 
-      for i in range(len(result_ids)):
-        doc_text = result_docs[i] if i < len(result_docs) else ''
-        metadata = result_metas[i] if i < len(result_metas) else {}
-        distance = result_distances[i] if i < len(result_distances) else 1.0
+  async def aupdate_metadatas(
+    self, collection_name: str, ids: list[str], metadatas: list[Metadata]
+  ) -> None:
+    """
+    Async variant of update_metadatas, run on the vector executor.
+    """
+    await vector_executor.run(self.update_metadatas, collection_name, ids, metadatas)
 
-        # Convert cosine distance to similarity (0-1, higher is more similar)
-        # ChromaDB returns cosine distance (0-2), we convert to similarity: 1 - distance
-        similarity = 1 - distance
+  async def aget_documents(
+    self, collection_name: str, where: dict[str, Any] | None = None
+  ) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Async variant of get_documents, run on the vector executor.
+    """
+    return await vector_executor.run(self.get_documents, collection_name, where)
 
-        documents.append((str(doc_text), dict(metadata or {}), float(similarity)))
+  async def aget_document_entries(
+    self, collection_name: str, where: dict[str, Any] | None = None
+  ) -> list[tuple[str, str, dict[str, Any]]]:
+    """
+    Async variant of get_document_entries, run on the vector executor.
+    """
+    return await vector_executor.run(self.get_document_entries, collection_name, where)
 
-      return documents
-    except ServiceError:
-      raise
-    except Exception as e:
-      raise ServiceError(f'Failed to search documents in {collection_name}: {str(e)}') from e
+  async def adelete_documents(
+    self,
+    collection_name: str,
+    where: dict[str, Any] | None = None,
+    ids: list[str] | None = None,
+  ) -> None:
+    """
+    Async variant of delete_documents, run on the vector executor.
+    """
+    await vector_executor.run(self.delete_documents, collection_name, where, ids)
+
+  async def asearch_documents(
+    self, collection_name: str, query: str, k: int = 10
+  ) -> list[tuple[str, dict[str, Any], float]]:
+    """
+    Async variant of search_documents, run on the vector executor.
+    """
+    return await vector_executor.run(self.search_documents, collection_name, query, k)
+
+  async def asearch_documents_many(
+    self,
+    collection_name: str,
+    queries: list[str],
+    k: int = 10,
+    embeddings: list[list[float]] | None = None,
+  ) -> list[list[tuple[str, dict[str, Any], float]]]:
+    """
+    Async variant of search_documents_many, run on the vector executor.
+    """
+    return await vector_executor.run(
+      self.search_documents_many, collection_name, queries, k, embeddings
+    )
@@ -0,0 +1,606 @@
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Literal, Protocol, cast
+
+import chromadb
+import numpy as np
+from chromadb.api.types import Metadata
+
+from app.utils.errors import ServiceError
+
+SearchResult = tuple[str, dict[str, Any], float]
+Precision = Literal['float32', 'float16', 'int8']
+
+
+class VectorStore(Protocol):
+  """
+  Operations VectorRepository needs from a collection, whatever holds the vectors.
+  """
+
+  def add(
+    self,
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[Metadata] | None,
+    upsert: bool = False,
+    embeddings: list[list[float]] | None = None,
+  ) -> None: ...
+
+  def get(self, where: dict[str, Any] | None = None) -> list[tuple[str, str, dict[str, Any]]]: ...
+
+  def get_embeddings(self, ids: list[str]) -> dict[str, tuple[str, list[float]]]: ...
+
+  def update_metadatas(self, ids: list[str], metadatas: list[Metadata]) -> None: ...
+
+  def delete(self, ids: list[str] | None = None, where: dict[str, Any] | None = None) -> None: ...
+
+  def query(
+    self,
+    queries: list[str],
+    k: int,
+    where: dict[str, Any] | None = None,
+    embeddings: list[list[float]] | None = None,
+  ) -> list[list[SearchResult]]: ...
+
+
+class ChromaVectorStore:
+  """
+  VectorStore over a Chroma collection with cosine distance.
+  """
+
+  def __init__(self, collection: chromadb.Collection):
+    self.collection = collection
+
+  def add(
+    self,
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[Metadata] | None,
+    upsert: bool = False,
+    embeddings: list[list[float]] | None = None,
+  ) -> None:
+    write = self.collection.upsert if upsert else self.collection.add
+    write(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+  def get(self, where: dict[str, Any] | None = None) -> list[tuple[str, str, dict[str, Any]]]:
+    results = self.collection.get(where=where)
+    ids = results.get('ids', [])
+    docs = results.get('documents') or []
+    metas = results.get('metadatas') or []
+    return [
+      (
+        ids[i],
+        str(docs[i] if i < len(docs) else ''),
+        dict((metas[i] if i < len(metas) else None) or {}),
+      )
+      for i in range(len(ids))
+    ]
+
+  def get_embeddings(self, ids: list[str]) -> dict[str, tuple[str, list[float]]]:
+    results = self.collection.get(ids=ids, include=['documents', 'embeddings'])
+    docs = results.get('documents') or []
+    embeddings = results.get('embeddings')
+    if embeddings is None:
+      return {}
+    return {
+      doc_id: (str(docs[i]), np.asarray(embeddings[i], dtype=np.float32).tolist())
+      for i, doc_id in enumerate(results.get('ids', []))
+    }
+
+  def update_metadatas(self, ids: list[str], metadatas: list[Metadata]) -> None:
+    self.collection.update(ids=ids, metadatas=metadatas)
+
+  def delete(self, ids: list[str] | None = None, where: dict[str, Any] | None = None) -> None:
+    if ids is None:
+      ids = self.collection.get(where=where).get('ids', [])
+    if ids:
+      self.collection.delete(ids=ids)
+
+  def query(
+    self,
+    queries: list[str],
+    k: int,
+    where: dict[str, Any] | None = None,
+    embeddings: list[list[float]] | None = None,
+  ) -> list[list[SearchResult]]:
+    if embeddings is not None:
+      results = self.collection.query(query_embeddings=embeddings, n_results=k, where=where)
+    else:
+      results = self.collection.query(query_texts=queries, n_results=k, where=where)
+
+    all_ids = cast(list[list[str]], results.get('ids') or [])
+    all_docs = cast(list[list[str]], results.get('documents') or [])
+    all_metas = cast(list[list[dict[str, Any]]], results.get('metadatas') or [])
+    all_distances = cast(list[list[float]], results.get('distances') or [])
+
+    batches: list[list[SearchResult]] = []
+    for q in range(len(queries)):
+      result_ids = all_ids[q] if q < len(all_ids) else []
+      result_docs = all_docs[q] if q < len(all_docs) else []
+      result_metas = all_metas[q] if q < len(all_metas) else []
+      result_distances = all_distances[q] if q < len(all_distances) else []
+
+      documents: list[SearchResult] = []
+      for i in range(len(result_ids)):
+        doc_text = result_docs[i] if i < len(result_docs) else ''
+        metadata = result_metas[i] if i < len(result_metas) else {}
+        distance = result_distances[i] if i < len(result_distances) else 1.0
+
+        # Convert cosine distance to similarity (0-1, higher is more similar)
+        # ChromaDB returns cosine distance (0-2), we convert to similarity: 1 - distance
+        similarity = 1 - distance
+
+        documents.append((str(doc_text), dict(metadata or {}), float(similarity)))
+      batches.append(documents)
+
+    return batches
+
+
+def matches_where(metadata: dict[str, Any], where: dict[str, Any] | None) -> bool:
+  """
+  Evaluate the subset of Chroma's metadata filter language used by this app.
+
+  Supports field equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and and $or.
+
+  Raises:
+    ServiceError: If the filter uses an unsupported operator.
+  """
+  if not where:
+    return True
+
+  for key, condition in where.items():
+    if key == '$and':
+      if not all(matches_where(metadata, clause) for clause in condition):
+        return False
+      continue
+    if key == '$or':
+      if not any(matches_where(metadata, clause) for clause in condition):
+        return False
+      continue
+
+    value = metadata.get(key)
+    if not isinstance(condition, dict):
+      condition = {'$eq': condition}
+    for operator, operand in condition.items():
+      match operator:
+        case '$eq':
+          ok = value == operand
+        case '$ne':
+          ok = value != operand
+        case '$in':
+          ok = value in operand
+        case '$nin':
+          ok = value not in operand
+        case '$gt' | '$gte' | '$lt' | '$lte' if value is None:
+          ok = False
+        case '$gt':
+          ok = value > operand
+        case '$gte':
+          ok = value >= operand
+        case '$lt':
+          ok = value < operand
+        case '$lte':
+          ok = value <= operand
+        case _:
+          raise ServiceError(f'Unsupported metadata filter operator: {operator}')
+      if not ok:
+        return False
+  return True
+
+
+# Rows a store's buffer holds at least once it is written to; it doubles when full
+_MIN_CAPACITY = 256
+
+# Rows of a quantized matrix widened to float32 at a time when scoring, so the widened
+# block stays in cache for the matrix product
+_SCORE_CHUNK_ROWS = 512
+
+# float16 bits moved into float32 position: the sign bit and the 15 exponent and mantissa bits
+_FLOAT16_BITS_MASK = np.array([0x8FFFE000], dtype=np.uint32).view(np.int32)[0]
+# The moved bits read as the float16 value times 2**-112, since the exponent biases differ
+_FLOAT16_BITS_SCALE = np.float32(2.0**112)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+  """
+  What readers of a NumpyVectorStore see. Writers fill rows past count and then swap in a
+  new snapshot with a single assignment, so readers never see half-written rows.
+
+  The row lists are shared between snapshots and only appended to, apart from metadata
+  updates, which replace whole entries. Rows marked in alive as deleted keep their place
+  until the next flush compacts them away.
+  """
+
+  count: int = 0
+  deleted: int = 0
+  ids: list[str] = field(default_factory=list)
+  documents: list[str] = field(default_factory=list)
+  metadatas: list[dict[str, Any]] = field(default_factory=list)
+  matrix: np.ndarray | None = None
+  scales: np.ndarray | None = None
+  alive: np.ndarray | None = None
+
+
+class NumpyVectorStore:
+  """
+  Exact brute-force VectorStore backed by a memory-mapped .npy matrix.
+
+  Rows are L2-normalized when stored, so a single matrix product with the normalized
+  queries yields cosine similarities for every document.
+
+  Writes go to memory: new and replaced rows are appended to a buffer that doubles when
+  full, and replaced or deleted rows are only marked as deleted, so a write costs time in
+  proportion to its own size. flush() then compacts the rows and saves them in one go.
+  Ids, documents and metadata live in a JSON sidecar that names the matrix file it belongs
+  to; a flush saves a new matrix and then atomically replaces the sidecar, so a crash
+  never leaves the two disagreeing.
+
+  With float16 or int8 precision the matrix is stored quantized (int8 with one scale per
+  row) and widened to float32 block by block for the product.
+  """
+
+  def __init__(self, directory: str, embedding_function: Any, precision: Precision = 'float32'):
+    self.directory = Path(directory)
+    self.embedding_function = embedding_function
+    self.precision = precision
+
+    self._lock = threading.Lock()
+    self._generation = 0
+    self._positions: dict[str, int] = {}
+    self._dirty = False
+    self._state = self._load()
+
+  @property
+  def _index_path(self) -> Path:
+    return self.directory / 'index.json'
+
+  def _load(self) -> _Snapshot:
+    if not self._index_path.exists():
+      return _Snapshot()
+
+    index = json.loads(self._index_path.read_text(encoding='utf-8'))
+    if index.get('precision') != self.precision:
+      raise ServiceError(
+        f'Vector store {self.directory} was written with {index.get("precision")} precision'
+      )
+
+    self._generation = index['generation']
+    self._positions = {doc_id: i for i, doc_id in enumerate(index['ids'])}
+    return _Snapshot(
+      count=len(index['ids']),
+      ids=index['ids'],
+      documents=index['documents'],
+      metadatas=index['metadatas'],
+      matrix=np.load(self.directory / index['matrix'], mmap_mode='r') if index['matrix'] else None,
+      scales=np.load(self.directory / index['scales']) if index['scales'] else None,
+      alive=np.ones(len(index['ids']), dtype=bool),
+    )
+
+  def _encode(self, vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+    if self.precision == 'float16':
+      # float16 subnormals would widen to float32 subnormals, which slow the product down
+      return np.where(np.abs(vectors) < 2.0**-14, 0.0, vectors).astype(np.float16), None
+    if self.precision == 'int8':
+      peaks = np.abs(vectors).max(axis=1)
+      scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+      return np.round(vectors / scales[:, None]).astype(np.int8), scales
+    return vectors.astype(np.float32), None
+
+  def _embed(
+    self, texts: list[str], query: bool = False, embeddings: list[list[float]] | None = None
+  ) -> np.ndarray:
+    if embeddings is None:
+      embed = self.embedding_function.embed_query if query else self.embedding_function
+      embeddings = embed(texts)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+  def _append(
+    self,
+    state: _Snapshot,
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[dict[str, Any]],
+    vectors: np.ndarray,
+  ) -> _Snapshot:
+    """
+    Write rows past the end of the buffer, growing it if needed, and return the snapshot
+    that includes them. Must be called with the lock held.
+    """
+    matrix, scales = self._encode(vectors)
+    start, end = state.count, state.count + len(ids)
+    buffer, buffer_scales, alive = state.matrix, state.scales, state.alive
+
+    # Memory-mapped matrices are read-only, so the first write copies them into a buffer
+    if buffer is None or alive is None or end > len(buffer) or not buffer.flags.writeable:
+      capacity = max(_MIN_CAPACITY, end, 2 * start)
+      buffer = np.empty((capacity, matrix.shape[1]), dtype=matrix.dtype)
+      alive = np.zeros(capacity, dtype=bool)
+      if state.matrix is not None and state.alive is not None:
+        buffer[:start] = state.matrix[:start]
+        alive[:start] = state.alive[:start]
+      if scales is not None:
+        buffer_scales = np.empty(capacity, dtype=np.float32)
+        if state.scales is not None:
+          buffer_scales[:start] = state.scales[:start]
+
+    buffer[start:end] = matrix
+    if buffer_scales is not None and scales is not None:
+      buffer_scales[start:end] = scales
+    alive[start:end] = True
+
+    state.ids.extend(ids)
+    state.documents.extend(documents)
+    state.metadatas.extend(metadatas)
+    for i, doc_id in enumerate(ids, start):
+      self._positions[doc_id] = i
+
+    return _Snapshot(
+      count=end,
+      deleted=state.deleted,
+      ids=state.ids,
+      documents=state.documents,
+      metadatas=state.metadatas,
+      matrix=buffer,
+      scales=buffer_scales,
+      alive=alive,
+    )
+
+  def _mark_deleted(self, state: _Snapshot, positions: list[int]) -> _Snapshot:
+    """
+    Mark rows as deleted and return the snapshot that counts them. Must be called with
+    the lock held.
+    """
+    if not positions or state.alive is None:
+      return state
+    state.alive[positions] = False
+    return replace(state, deleted=state.deleted + len(positions))
+
+  def add(
+    self,
+    ids: list[str],
+    documents: list[str],
+    metadatas: list[Metadata] | None,
+    upsert: bool = False,
+    embeddings: list[list[float]] | None = None,
+  ) -> None:
+    if not ids:
+      return
+    vectors = self._embed(documents, embeddings=embeddings)
+    metadatas = metadatas or [{} for _ in ids]
+
+    # The last write to an id in one call wins
+    latest = {doc_id: i for i, doc_id in enumerate(ids)}
+    rows = sorted(latest.values())
+
+    with self._lock:
+      if not upsert:
+        duplicates = [doc_id for doc_id in latest if doc_id in self._positions]
+        if duplicates:
+          raise ServiceError(f'Documents already exist: {", ".join(duplicates[:5])}')
+
+      replaced = [self._positions[doc_id] for doc_id in latest if doc_id in self._positions]
+      state = self._append(
+        self._state,
+        [ids[i] for i in rows],
+        [documents[i] for i in rows],
+        [dict(metadatas[i]) for i in rows],
+        vectors[rows],
+      )
+      # Published before the replaced rows are marked, so readers never miss a document
+      self._state = state
+      self._state = self._mark_deleted(state, replaced)
+      self._dirty = True
+
+  def get(self, where: dict[str, Any] | None = None) -> list[tuple[str, str, dict[str, Any]]]:
+    state = self._state
+    return [
+      (state.ids[i], state.documents[i], dict(state.metadatas[i]))
+      for i in self._live_rows(state)
+      if matches_where(state.metadatas[i], where)
+    ]
+
+  def get_embeddings(self, ids: list[str]) -> dict[str, tuple[str, list[float]]]:
+    state = self._state
+    if state.matrix is None:
+      return {}
+
+    found = []
+    for doc_id in ids:
+      position = self._positions.get(doc_id)
+      # A position past the snapshot belongs to a write that started after it was taken
+      if position is not None and position < state.count and state.ids[position] == doc_id:
+        found.append((doc_id, position))
+    if not found:
+      return {}
+
+    rows = np.asarray([position for _doc_id, position in found], dtype=np.intp)
+    vectors = np.asarray(state.matrix[rows], dtype=np.float32)
+    if state.scales is not None:
+      vectors *= state.scales[rows][:, None]
+    return {
+      doc_id: (state.documents[position], vector.tolist())
+      for (doc_id, position), vector in zip(found, vectors, strict=True)
+    }
+
+  def update_metadatas(self, ids: list[str], metadatas: list[Metadata]) -> None:
+    with self._lock:
+      state = self._state
+      for doc_id, metadata in zip(ids, metadatas, strict=True):
+        position = self._positions.get(doc_id)
+        if position is not None:
+          # Replaced rather than updated, so readers see either the old or the new dict
+          state.metadatas[position] = {**state.metadatas[position], **metadata}
+          self._dirty = True
+
+  def delete(self, ids: list[str] | None = None, where: dict[str, Any] | None = None) -> None:
+    with self._lock:
+      state = self._state
+      if ids is None:
+        doomed = [
+          state.ids[i] for i in self._live_rows(state) if matches_where(state.metadatas[i], where)
+        ]
+      else:
+        doomed = [doc_id for doc_id in dict.fromkeys(ids) if doc_id in self._positions]
+      if not doomed:
+        return
+
+      self._state = self._mark_deleted(state, [self._positions.pop(doc_id) for doc_id in doomed])
+      self._dirty = True
+
+  def flush(self) -> None:
+    """
+    Save the rows written since the last flush, dropping the deleted ones. Writes are only
+    in memory until then.
+    """
+    with self._lock:
+      if not self._dirty:
+        return
+      state = self._state
+
+      live = self._live_rows(state)
+      ids = [state.ids[i] for i in live]
+      documents = [state.documents[i] for i in live]
+      metadatas = [state.metadatas[i] for i in live]
+
+      self.directory.mkdir(parents=True, exist_ok=True)
+      generation = self._generation + 1
+      matrix_name = scales_name = None
+      scales = None
+      if state.matrix is not None and ids:
+        matrix_name = f'vectors-{generation}.npy'
+        np.save(self.directory / matrix_name, state.matrix[live])
+        if state.scales is not None:
+          scales = state.scales[live]
+          scales_name = f'scales-{generation}.npy'
+          np.save(self.directory / scales_name, scales)
+
+      index = {
+        'generation': generation,
+        'precision': self.precision,
+        'matrix': matrix_name,
+        'scales': scales_name,
+        'ids': ids,
+        'documents': documents,
+        'metadatas': metadatas,
+      }
+      tmp_path = self.directory / f'index.json.{uuid.uuid4().hex}.tmp'
+      tmp_path.write_text(json.dumps(index), encoding='utf-8')
+      os.replace(tmp_path, self._index_path)
+
+      self._generation = generation
+      self._positions = {doc_id: i for i, doc_id in enumerate(ids)}
+      self._state = _Snapshot(
+        count=len(ids),
+        ids=ids,
+        documents=documents,
+        metadatas=metadatas,
+        matrix=np.load(self.directory / matrix_name, mmap_mode='r') if matrix_name else None,
+        scales=scales,
+        alive=np.ones(len(ids), dtype=bool),
+      )
+      self._dirty = False
+
+      for path in self.directory.glob('*.npy'):
+        if path.name not in (matrix_name, scales_name):
+          try:
+            path.unlink()
+          except OSError:
+            # Still mapped by a reader on platforms that forbid unlinking open files
+            pass
+
+  @staticmethod
+  def _live_rows(state: _Snapshot) -> list[int]:
+    if state.alive is None:
+      return []
+    if not state.deleted:
+      return list(range(state.count))
+    return np.flatnonzero(state.alive[: state.count]).tolist()
+
+  @staticmethod
+  def _scores(matrix: np.ndarray, scales: np.ndarray | None, queries: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of every row with every query, as a (rows, queries) matrix.
+    """
+    if matrix.dtype == np.float32:
+      return np.asarray(matrix) @ queries.T
+
+    scores = np.empty((len(matrix), len(queries)), dtype=np.float32)
+    if matrix.dtype == np.float16:
+      # numpy widens float16 one element at a time. Moving the bits into place with integer
+      # operations is vectorized; the query is scaled to make up for the exponent bias.
+      block = np.empty((min(_SCORE_CHUNK_ROWS, len(matrix)), matrix.shape[1]), dtype=np.int32)
+      weights = queries.T * _FLOAT16_BITS_SCALE
+    else:
+      block = np.empty((min(_SCORE_CHUNK_ROWS, len(matrix)), matrix.shape[1]), dtype=np.float32)
+      weights = queries.T
+
+    for start in range(0, len(matrix), _SCORE_CHUNK_ROWS):
+      rows = matrix[start : start + _SCORE_CHUNK_ROWS]
+      widened = block[: len(rows)]
+      if matrix.dtype == np.float16:
+        widened[...] = rows.view(np.int16)
+        widened <<= 13
+        widened &= _FLOAT16_BITS_MASK
+        np.matmul(widened.view(np.float32), weights, out=scores[start : start + len(rows)])
+      else:
+        widened[...] = rows
+        np.matmul(widened, weights, out=scores[start : start + len(rows)])
+
+    if scales is not None:
+      scores *= scales[:, None]
+    return scores
+
+  def query(
+    self,
+    queries: list[str],
+    k: int,
+    where: dict[str, Any] | None = None,
+    embeddings: list[list[float]] | None = None,
+  ) -> list[list[SearchResult]]:
+    if not queries:
+      return []
+
+    state = self._state
+    if state.matrix is None or state.alive is None or state.count == state.deleted:
+      return [[] for _ in queries]
+    matrix = state.matrix[: state.count]
+    scales = state.scales[: state.count] if state.scales is not None else None
+
+    candidates = None
+    if where:
+      candidates = np.fromiter(
+        (i for i in self._live_rows(state) if matches_where(state.metadatas[i], where)),
+        dtype=np.intp,
+      )
+      if not len(candidates):
+        return [[] for _ in queries]
+      matrix = matrix[candidates]
+      scales = scales[candidates] if scales is not None else None
+
+    query_vectors = self._embed(queries, query=True, embeddings=embeddings)
+    scores = self._scores(matrix, scales, query_vectors)
+    if candidates is None and state.deleted:
+      scores[~state.alive[: state.count]] = -np.inf
+
+    k = min(k, scores.shape[0] if candidates is not None else state.count - state.deleted)
+    batches: list[list[SearchResult]] = []
+    for column in scores.T:
+      top = np.argpartition(-column, k - 1)[:k] if k < len(column) else np.arange(len(column))
+      top = top[np.argsort(-column[top], kind='stable')]
+      rows = candidates[top] if candidates is not None else top
+      batches.append(
+        [
+          (state.documents[row], dict(state.metadatas[row]), float(column[i]))
+          for i, row in zip(top, rows, strict=True)
+          # Rows deleted while this query ran
+          if column[i] != -np.inf
+        ]
+      )
+    return batches
@@ -1,7 +1,10 @@
 from .inject_base import JS_INJECT_BASE
+from .inline_assets import JS_APPLY_ASSETS, JS_COLLECT_ASSETS
 from .materialize_styles import JS_MATERIALIZE_STYLES
 
 __all__ = [
+  'JS_APPLY_ASSETS',
+  'JS_COLLECT_ASSETS',
   'JS_MATERIALIZE_STYLES',
   'JS_INJECT_BASE',
 ]
@@ -0,0 +1,35 @@
+"""
+JavaScript scripts to inline external stylesheets and images in two round trips.
+"""
+
+JS_COLLECT_ASSETS = """() => {
+  const assets = [];
+  const collect = (kind, el, url) => {
+    if (!url || !/^https?:/i.test(url)) return;
+    const id = String(assets.length);
+    el.setAttribute('data-inline-id', id);
+    assets.push({ id, kind, url });
+  };
+
+  // Properties rather than attributes, so URLs come back resolved against <base>
+  document.querySelectorAll('link[rel="stylesheet"]').forEach(el => collect('style', el, el.href));
+  document.querySelectorAll('img').forEach(el => collect('image', el, el.currentSrc || el.src));
+  return assets;
+}"""
+
+JS_APPLY_ASSETS = """({ assets, contents }) => {
+  for (const el of document.querySelectorAll('[data-inline-id]')) {
+    const ref = assets[el.getAttribute('data-inline-id')];
+    el.removeAttribute('data-inline-id');
+    if (ref === undefined) continue;
+
+    if (el.tagName === 'LINK') {
+      const style = document.createElement('style');
+      style.textContent = contents[ref];
+      el.replaceWith(style);
+    } else {
+      el.src = contents[ref];
+      el.removeAttribute('srcset');
+    }
+  }
+}"""
@@ -2,6 +2,7 @@ from .applications_router import router as applications_router
 from .config_router import router as config_router
 from .experiences_router import router as experiences_router
 from .listings_router import router as listings_router
+from .metrics_router import router as metrics_router
 from .profile_router import router as profile_router
 from .resumes_router import router as resumes_router
 
@@ -10,6 +11,7 @@ __all__ = [
   'config_router',
   'experiences_router',
   'listings_router',
+  'metrics_router',
   'profile_router',
   'resumes_router',
 ]
@@ -15,13 +15,13 @@ router = APIRouter(
 
 @router.get('/{id}', response_model=Application)
 async def get_application(id: UUID):
-  application = applications_service.get(id)
+  application = await applications_service.get(id)
   return application
 
 
 @router.post('/{id}/status-event', response_model=Application)
 async def add_status_event(id: UUID, status_event: StatusEvent):
-  application = applications_service.get(id)
-  application.status_events.append(status_event)
-  application = applications_service.update(application)
+  application = await applications_service.get(id)
+  application.add_status_event(status_event)
+  application = await applications_service.update(application)
   return application
@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from app.config import settings
 from app.config.schemas import AppConfig
+from app.services import reembedding_service
 
 router = APIRouter(prefix='/config', tags=['Config'])
 
@@ -52,5 +53,7 @@ def get_settings():
 @router.patch('')
 def update_settings(updates: dict[str, Any] = Body(...)):  # noqa: B008
   settings.save(updates)
+  # Rebuilds the search index in the background if the embedding model or size changed
+  reembedding_service.wake()
 
   return get_settings()
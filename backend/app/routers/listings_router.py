@@ -38,10 +38,10 @@ async def ingest_listing(
   url = normalize_url(url)
   html = None
 
-  existing_listing = listings_service.get_by_url(url)
+  existing_listing = await listings_service.get_by_url(url)
 
   if existing_listing:
-    application = applications_service.get_by_listing_id(existing_listing.id)
+    application = await applications_service.get_by_listing_id(existing_listing.id)
     return ListingDraftDuplicateUrl(
       id=id,
       url=url,
@@ -99,7 +99,7 @@ async def ingest_listing(
         html=html,
       )
 
-  similar_match = listings_service.find_similar(
+  similar_match = await listings_service.find_similar(
     Listing(
       **listing.model_dump(exclude={'skills', 'requirements'}),
       skills=[skill.value for skill in listing.skills],
@@ -110,7 +110,7 @@ async def ingest_listing(
   )
 
   if similar_match:
-    application = applications_service.get_by_listing_id(similar_match.id)
+    application = await applications_service.get_by_listing_id(similar_match.id)
     return ListingDraftDuplicateContent(
       id=id,
       url=url,
@@ -129,20 +129,21 @@ async def get_listings(
   size: int = 10,
   search: str | None = None,
   status: Annotated[list[StatusEnum] | None, Query()] = None,
-  sort_by: Literal['title', 'company', 'posted_at', 'updated_at'] | None = None,
+  sort_by: Literal['title', 'company', 'posted_at', 'updated_at', 'relevance'] | None = None,
   sort_dir: Literal['asc', 'desc'] | None = None,
+  cursor: str | None = None,
 ):
-  return listings_service.list_all(page, size, search, status, sort_by, sort_dir)
+  return await listings_service.list_all(page, size, search, status, sort_by, sort_dir, cursor)
 
 
 @router.get('/{id}', response_model=Listing)
 async def get_listing(id: UUID):
-  return listings_service.get(id)
+  return await listings_service.get(id)
 
 
 @router.post('')
 async def save_listing(listing: Listing):
-  saved_listing = listings_service.create(listing)
+  saved_listing = await listings_service.create(listing)
   application = Application(listing_id=listing.id)
-  applications_service.create(application)
+  await applications_service.create(application)
   return saved_listing
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+
+from app.repositories.vector_outbox import outbox_worker
+from app.services import listings_service, reembedding_service, scraping_service
+
+router = APIRouter(
+  prefix='/metrics',
+  tags=['Metrics'],
+)
+
+
+@router.get('')
+async def get_metrics():
+  return {
+    'listing_page_cache': listings_service.page_cache_stats(),
+    'embedding_cache': listings_service.embedding_cache_stats(),
+    'embedding_batches': listings_service.embedding_batch_stats(),
+    'draft_embeddings': listings_service.draft_embedding_stats(),
+    'vector_outbox': await outbox_worker.outbox.astats(),
+    'reembedding': reembedding_service.status(),
+    'browser_pool': scraping_service.browser_pool.stats(),
+    'scraping': scraping_service.stats(),
+    'asset_cache': scraping_service.asset_cache_stats(),
+  }
@@ -18,6 +18,7 @@ from app.schemas import (
 from app.services import (
   applications_service,
   experience_service,
+  listings_service,
   llm_service,
   profile_service,
   resume_service,
@@ -33,12 +34,12 @@ router = APIRouter(
 
 @router.get('/{resume_id}')
 async def get_resume(resume_id: UUID) -> Resume:
-  return resume_service.get(resume_id)
+  return await resume_service.get(resume_id)
 
 
 @router.get('/{resume_id}/html')
 async def get_html(resume_id: UUID):
-  resume = resume_service.get(resume_id)
+  resume = await resume_service.get(resume_id)
   profile = profile_service.get()
   html = template_service.render(resume.template, profile, resume)
 
@@ -48,27 +49,30 @@ async def get_html(resume_id: UUID):
 @router.post('/')
 async def create_resume(application_id: UUID):
   # Validate application exists
-  application = applications_service.get(application_id)
+  application = await applications_service.get(application_id)
 
   resume = Resume(
     id=uuid4(),
     template=settings.resume.default_template,
     data=ResumeData(sections=[]),
   )
-  resume_service.create(resume)
+  await resume_service.create(resume)
 
   application.resume_id = resume.id
-  applications_service.update(application)
+  await applications_service.update(application)
 
   return resume
 
 
 @router.post('/{resume_id}/generate')
 async def generate_resume_content(resume_id: UUID):
-  resume = resume_service.get(resume_id)
-  application = applications_service.get_by_resume_id(resume_id)
-  listing = application.listing
-  relevant_experiences: list[Experience] = experience_service.find_relevant(listing)
+  resume = await resume_service.get(resume_id)
+  application = await applications_service.get_by_resume_id(resume_id)
+  listing = await listings_service.get(application.listing_id)
+  requirement_embeddings = await listings_service.requirement_embeddings(listing)
+  relevant_experiences: list[Experience] = await experience_service.find_relevant(
+    listing, requirement_embeddings
+  )
   responses = await asyncio.gather(
     *[
       llm_service.call_structured(
@@ -127,27 +131,27 @@ async def generate_resume_content(resume_id: UUID):
   # TODO: Add a projects section
 
   resume.data = generated_data
-  updated_resume = resume_service.update(resume)
+  updated_resume = await resume_service.update(resume)
   return updated_resume
 
 
 @router.put('/{resume_id}')
 async def update_resume(resume_id: UUID, data: ResumeData) -> Resume:
-  resume = resume_service.get(resume_id)
+  resume = await resume_service.get(resume_id)
   resume.data = data
-  updated_resume = resume_service.update(resume)
+  updated_resume = await resume_service.update(resume)
   return updated_resume
 
 
 @router.delete('/{resume_id}')
 async def delete_resume(resume_id: UUID):
-  resume_service.delete(resume_id)
+  await resume_service.delete(resume_id)
   return {'message': 'Resume deleted successfully'}
 
 
 @router.get('/{resume_id}/export')
 async def export_resume(resume_id: UUID) -> Response:
-  resume = resume_service.get(resume_id)
+  resume = await resume_service.get(resume_id)
   profile = profile_service.get()
   try:
     pdf_bytes = template_service.render_pdf(resume.template, profile, resume)
@@ -1,12 +1,18 @@
+from bisect import insort
 from datetime import datetime
+from typing import Any
 from uuid import UUID, uuid4
 
-from pydantic import Field, computed_field
+from pydantic import Field, PrivateAttr, computed_field, field_validator
 
 from app.schemas.status_event import StatusEnum, StatusEvent
 from app.schemas.types import CamelModel
 
 
+def _event_time(event: StatusEvent) -> datetime:
+  return event.created_at
+
+
 def default_status_events():
   return [StatusEvent(status=StatusEnum.SAVED, stage=0, created_at=datetime.now())]
 
@@ -17,15 +23,35 @@ class Application(CamelModel):
   resume_id: UUID | None = None
   status_events: list[StatusEvent] = Field(default_factory=default_status_events)
 
+  # Dropped whenever status_events changes through add_status_event or assignment
+  _timeline_cache: list[StatusEvent] | None = PrivateAttr(default=None)
+
+  @field_validator('status_events')
+  @classmethod
+  def _sort_status_events(cls, events: list[StatusEvent]) -> list[StatusEvent]:
+    return sorted(events, key=_event_time)
+
+  def __setattr__(self, name: str, value: Any) -> None:
+    # Assigned event lists are sorted like validated ones, without validating every field
+    if name == 'status_events':
+      value = sorted(value, key=_event_time)
+      self._timeline_cache = None
+    super().__setattr__(name, value)
+
+  def add_status_event(self, event: StatusEvent) -> None:
+    """
+    Insert an event at its chronological position and drop the memoized timeline.
+    """
+    insort(self.status_events, event, key=_event_time)
+    self._timeline_cache = None
+
   @computed_field
   def current_status(self) -> StatusEnum:
-    sorted_events = sorted(self.status_events, key=lambda e: e.created_at)
-    return sorted_events[-1].status
+    return self._timeline()[-1].status
 
   @computed_field
   def current_stage(self) -> int:
-    sorted_events = sorted(self.status_events, key=lambda e: e.created_at)
-    return sorted_events[-1].stage
+    return self._timeline()[-1].stage
 
   def _get_event_priority(self, event: StatusEvent) -> int:
     match event.status:
@@ -48,7 +74,21 @@ class Application(CamelModel):
 
   @computed_field
   def timeline(self) -> list[StatusEvent]:
-    sorted_events = sorted(self.status_events, key=lambda e: (e.created_at))
+    return list(self._timeline())
+
+  def _timeline(self) -> list[StatusEvent]:
+    """
+    Memoized history, whose last entry is always the current event.
+
+    The memo is dropped by add_status_event and when status_events is assigned, so events
+    must be added through those rather than edited in place. Events are sorted on
+    validation and by add_status_event; the copy sorted here costs linear time when they
+    still are, and leaves status_events as it is.
+    """
+    if self._timeline_cache is not None:
+      return self._timeline_cache
+
+    sorted_events = sorted(self.status_events, key=_event_time)
     current_status = sorted_events[-1]
     ceiling_priority = self._get_event_priority(current_status)
 
@@ -69,4 +109,5 @@ class Application(CamelModel):
     if not history or history[-1].id != current_status.id:
       history.append(current_status)
 
+    self._timeline_cache = history
     return history
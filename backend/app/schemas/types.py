@@ -27,6 +27,7 @@ class Page(BaseModel, Generic[T]):
   page: int
   size: int
   pages: int
+  next_cursor: str | None = None
 
 
 def parse_json_list_as(converter: Callable[[str], T]) -> Callable[[Any], list[T]]:
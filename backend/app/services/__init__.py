@@ -3,6 +3,7 @@ from .experiences_service import ExperiencesService
 from .listings_service import ListingsService
 from .llm_service import LLMService
 from .profile_service import ProfileService
+from .reembedding_service import ReembeddingService
 from .resumes_service import ResumesService
 from .scraping_service import ScrapingService
 from .template_service import TemplateService
@@ -12,6 +13,7 @@ experience_service = ExperiencesService()  # TODO: Make plural
 listings_service = ListingsService()
 llm_service = LLMService()
 profile_service = ProfileService()
+reembedding_service = ReembeddingService(sources=[listings_service, experience_service])
 resume_service = ResumesService()  # TODO: Make plural
 scraping_service = ScrapingService()
 template_service = TemplateService()
@@ -22,6 +24,7 @@ __all__ = [
   'listings_service',
   'llm_service',
   'profile_service',
+  'reembedding_service',
   'resume_service',
   'scraping_service',
   'template_service',
@@ -1,18 +1,19 @@
-import json
 from typing import Literal
 from uuid import UUID
 
 from app.repositories import DatabaseRepository
-from app.schemas import Application, Listing, Page, StatusEnum, StatusEvent
+from app.schemas import Application, Listing, Page, StatusEnum
+from app.services.listings_service import listing_page_cache
 from app.utils.errors import NotFoundError, ValidationError
+from app.utils.hydration import hydrate_application
 
 
 class ApplicationsService(DatabaseRepository):
   def __init__(self, **kwargs):
     super().__init__(**kwargs)
 
-  def get(self, application_id: UUID) -> Application:
-    row = self.fetch_one(
+  async def get(self, application_id: UUID) -> Application:
+    row = await self.afetch_one(
       """
       SELECT
         a.id as application_id,
@@ -28,7 +29,7 @@ class ApplicationsService(DatabaseRepository):
               'created_at', se.created_at,
               'notes', se.notes
             )
-          ),
+          ) FILTER (WHERE se.id IS NOT NULL),
           json_array()
         ) as status_events_json
       FROM applications a
@@ -43,24 +44,10 @@ class ApplicationsService(DatabaseRepository):
     if not row:
       raise NotFoundError(f'Application {application_id} not found')
 
-    row_dict = dict(row)
-    status_events_json = row_dict.pop('status_events_json')
-    application_id = row_dict.pop('application_id')
-    resume_id = row_dict.pop('resume_id')
-
-    status_events = [
-      StatusEvent(**event) for event in json.loads(status_events_json) if event.get('id')
-    ]
-
-    return Application(
-      id=application_id,
-      listing_id=row_dict['listing_id'],
-      resume_id=resume_id,
-      status_events=status_events,
-    )
+    return hydrate_application(row)
 
-  def get_by_resume_id(self, resume_id: UUID) -> Application:
-    row = self.fetch_one(
+  async def get_by_resume_id(self, resume_id: UUID) -> Application:
+    row = await self.afetch_one(
       """
       SELECT
         a.id as application_id,
@@ -77,7 +64,7 @@ class ApplicationsService(DatabaseRepository):
               'created_at', se.created_at,
               'notes', se.notes
             )
-          ),
+          ) FILTER (WHERE se.id IS NOT NULL),
           json_array()
         ) as status_events_json
       FROM applications a
@@ -92,24 +79,10 @@ class ApplicationsService(DatabaseRepository):
     if not row:
       raise NotFoundError(f'No application found for resume {resume_id}')
 
-    row_dict = dict(row)
-    status_events_json = row_dict.pop('status_events_json')
-    application_id = row_dict.pop('application_id')
-    resume_id = row_dict.pop('resume_id')
+    return hydrate_application(row)
 
-    status_events = [
-      StatusEvent(**event) for event in json.loads(status_events_json) if event.get('id')
-    ]
-
-    return Application(
-      id=application_id,
-      listing_id=row_dict['listing_id'],
-      resume_id=resume_id,
-      status_events=status_events,
-    )
-
-  def get_by_listing_id(self, listing_id: UUID) -> Application:
-    row = self.fetch_one(
+  async def get_by_listing_id(self, listing_id: UUID) -> Application:
+    row = await self.afetch_one(
       """
       SELECT
         a.id as application_id,
@@ -126,7 +99,7 @@ class ApplicationsService(DatabaseRepository):
               'created_at', se.created_at,
               'notes', se.notes
             )
-          ),
+          ) FILTER (WHERE se.id IS NOT NULL),
           json_array()
         ) as status_events_json
       FROM applications a
@@ -143,23 +116,9 @@ class ApplicationsService(DatabaseRepository):
     if not row:
       raise NotFoundError(f'No application found for listing {listing_id}')
 
-    row_dict = dict(row)
-    status_events_json = row_dict.pop('status_events_json')
-    application_id = row_dict.pop('application_id')
-    resume_id = row_dict.pop('resume_id')
+    return hydrate_application(row)
 
-    status_events = [
-      StatusEvent(**event) for event in json.loads(status_events_json) if event.get('id')
-    ]
-
-    return Application(
-      id=application_id,
-      listing_id=row_dict['listing_id'],
-      resume_id=resume_id,
-      status_events=status_events,
-    )
-
-  def create(self, application: Application) -> Application:
+  async def create(self, application: Application) -> Application:
     if not application.status_events:
       raise ValidationError('Application should at least have SAVED status event')
 
@@ -192,12 +151,14 @@ class ApplicationsService(DatabaseRepository):
         for status_event in application.status_events
       ]
     )
+    operations.append(self._sync_status_operation(application.id))
 
-    self.transaction(operations)
+    await self.atransaction(operations)
+    listing_page_cache.bump()
     return application
 
-  def update(self, application: Application) -> Application:
-    existing_event_ids = self.fetch_all(
+  async def update(self, application: Application) -> Application:
+    existing_event_ids = await self.afetch_all(
       'SELECT id FROM status_events WHERE application_id = ?', (str(application.id),)
     )
     existing_ids = {row['id'] for row in existing_event_ids}
@@ -235,6 +196,33 @@ class ApplicationsService(DatabaseRepository):
         for status_event in new_status_events
       ]
     )
+    if new_status_events:
+      operations.append(self._sync_status_operation(application.id))
 
-    self.transaction(operations)
+    await self.atransaction(operations)
+    listing_page_cache.bump()
     return application
+
+  def _sync_status_operation(self, application_id: UUID) -> tuple[str, tuple]:
+    """
+    Build the statement that refreshes application_status from the event history.
+
+    It must run in the same transaction as the status_events inserts so the materialized
+    row never disagrees with the events it summarizes.
+    """
+    return (
+      """
+      INSERT INTO application_status (application_id, listing_id, status, stage, last_updated)
+      SELECT a.id, a.listing_id, se.status, se.stage, se.created_at
+      FROM applications a
+      JOIN status_events se ON se.application_id = a.id
+      WHERE a.id = ?
+      ORDER BY se.created_at DESC, se.id DESC
+      LIMIT 1
+      ON CONFLICT (application_id) DO UPDATE SET
+        status = excluded.status,
+        stage = excluded.stage,
+        last_updated = excluded.last_updated
+      """,
+      (str(application_id),),
+    )
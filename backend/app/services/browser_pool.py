@@ -0,0 +1,274 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from typing import Any
+
+from playwright.async_api import (
+  Browser,
+  BrowserContext,
+  Page,
+  Playwright,
+  async_playwright,
+)
+from playwright.async_api import Error as PlaywrightError
+
+from app.config import settings
+from app.utils.errors import ServiceError
+
+# How long shutdown waits for pages still in use before closing the browser under them
+_SHUTDOWN_GRACE_SECONDS = 10.0
+
+_JS_HEAP_USED = '() => (performance.memory ? performance.memory.usedJSHeapSize : 0)'
+
+
+@dataclass(eq=False)
+class _PooledContext:
+  browser: Browser
+  context: BrowserContext
+  page: Page
+  pages_served: int = 0
+
+
+class BrowserPool:
+  """
+  Long-lived Chromium shared by every scrape, with a bounded pool of reusable contexts.
+
+  Once started, the browser is launched in the background and kept until close(). It is
+  relaunched if it disconnects or the headless setting changes. Each context keeps one
+  page, which is reset to about:blank between leases. A context is closed instead of
+  reused after it has served browser_context_max_pages pages, when its page's JavaScript
+  heap is over browser_context_max_memory_mb, or when the lease ended in an error. At most
+  browser_pages pages are leased at once; further callers wait.
+
+  A pool that was never started launches a browser for each lease and closes it
+  afterwards, so scripts without the app lifespan still work.
+  """
+
+  def __init__(self, context_options: dict[str, Any] | None = None):
+    self.context_options = context_options or {}
+
+    self._loop: asyncio.AbstractEventLoop | None = None
+    self._slots: asyncio.Condition | None = None
+    self._launch_lock: asyncio.Lock | None = None
+    self._warmup: asyncio.Task | None = None
+    self._closing = False
+
+    self._playwright: Playwright | None = None
+    self._browser: Browser | None = None
+    self._headless: bool | None = None
+    self._idle: list[_PooledContext] = []
+    self._in_use: set[_PooledContext] = set()
+    self._leased = 0
+
+    self._launches = 0
+    self._leases = 0
+    self._reused = 0
+    self._recycled = 0
+
+  def start(self) -> None:
+    """
+    Launch the browser in the background. Call from the app's event loop.
+    """
+    if self._loop is not None:
+      return
+    self._loop = asyncio.get_running_loop()
+    self._slots = asyncio.Condition()
+    self._launch_lock = asyncio.Lock()
+    self._closing = False
+    self._warmup = self._loop.create_task(self._warm_up(), name='browser-warmup')
+
+  async def close(self) -> None:
+    """
+    Stop leasing pages, give leased ones a grace period to finish, then close the browser.
+    """
+    if self._loop is None or self._slots is None:
+      return
+
+    self._closing = True
+    if self._warmup is not None:
+      self._warmup.cancel()
+      try:
+        await self._warmup
+      except asyncio.CancelledError:
+        pass
+
+    async with self._slots:
+      self._slots.notify_all()
+      try:
+        await asyncio.wait_for(
+          self._slots.wait_for(lambda: self._leased == 0), _SHUTDOWN_GRACE_SECONDS
+        )
+      except TimeoutError:
+        print(f'Closing the browser with {self._leased} pages still in use')
+
+    for entry in [*self._idle, *self._in_use]:
+      await self._close_context(entry)
+    self._idle.clear()
+    self._in_use.clear()
+
+    if self._browser is not None:
+      await self._close_browser(self._browser)
+    if self._playwright is not None:
+      await self._playwright.stop()
+    self._browser = None
+    self._playwright = None
+    self._loop = None
+
+  @asynccontextmanager
+  async def page(self) -> AsyncIterator[Page]:
+    """
+    Lease a page for one scrape.
+
+    Yields:
+      A blank page in its own browser context. Cookies and cache may carry over from
+      earlier leases of the same context.
+
+    Raises:
+      ServiceError: If the pool is shutting down.
+    """
+    if self._loop is None:
+      async with self._one_shot_page() as page:
+        yield page
+      return
+
+    entry = await self._acquire()
+    healthy = False
+    try:
+      yield entry.page
+      healthy = True
+    finally:
+      await self._release(entry, healthy)
+
+  def stats(self) -> dict[str, Any]:
+    return {
+      'running': self._browser is not None and self._browser.is_connected(),
+      'launches': self._launches,
+      'leases': self._leases,
+      'reused': self._reused,
+      'recycled': self._recycled,
+      'idle': len(self._idle),
+      'in_use': self._leased,
+    }
+
+  @asynccontextmanager
+  async def _one_shot_page(self) -> AsyncIterator[Page]:
+    async with async_playwright() as p:
+      browser = await p.chromium.launch(headless=settings.ingestion.headless)
+      self._launches += 1
+      try:
+        context = await browser.new_context(**self.context_options)
+        yield await context.new_page()
+      finally:
+        await browser.close()
+
+  async def _warm_up(self) -> None:
+    try:
+      await self._ensure_browser()
+    except PlaywrightError as e:
+      # The first lease will retry and report the error to its caller
+      print(f'Failed to launch the browser: {e}')
+
+  async def _ensure_browser(self) -> Browser:
+    assert self._launch_lock is not None
+    async with self._launch_lock:
+      headless = settings.ingestion.headless
+      browser = self._browser
+      if browser is not None and browser.is_connected() and self._headless == headless:
+        return browser
+
+      if browser is not None:
+        self._browser = None
+        if not self._browser_in_use(browser):
+          await self._close_browser(browser)
+        # Otherwise the last lease on it closes it
+
+      if self._playwright is None:
+        self._playwright = await async_playwright().start()
+      self._browser = await self._playwright.chromium.launch(headless=headless)
+      self._headless = headless
+      self._launches += 1
+      return self._browser
+
+  async def _acquire(self) -> _PooledContext:
+    assert self._slots is not None
+    async with self._slots:
+      await self._slots.wait_for(
+        lambda: self._closing or self._leased < settings.ingestion.browser_pages
+      )
+      if self._closing:
+        raise ServiceError('Browser pool is shutting down')
+      self._leased += 1
+
+    try:
+      browser = await self._ensure_browser()
+      while self._idle:
+        entry = self._idle.pop()
+        if entry.browser is browser and not entry.page.is_closed():
+          self._reused += 1
+          break
+        await self._close_context(entry)
+      else:
+        context = await browser.new_context(**self.context_options)
+        entry = _PooledContext(browser, context, await context.new_page())
+    except BaseException:
+      await self._free_slot()
+      raise
+
+    self._in_use.add(entry)
+    self._leases += 1
+    return entry
+
+  async def _release(self, entry: _PooledContext, healthy: bool) -> None:
+    self._in_use.discard(entry)
+    entry.pages_served += 1
+    reused = False
+    try:
+      # A page that cannot be checked or reset is closed instead
+      with suppress(PlaywrightError):
+        if healthy and await self._reusable(entry):
+          # Drops the previous site's DOM and scripts before the next lease
+          await entry.page.goto('about:blank')
+          self._idle.append(entry)
+          reused = True
+    finally:
+      # Also reached on cancellation, which would otherwise leave the context in neither
+      # list. Shielded so a second cancellation cannot interrupt the cleanup.
+      try:
+        if not reused:
+          await asyncio.shield(self._close_context(entry))
+      finally:
+        await asyncio.shield(self._free_slot())
+
+  async def _reusable(self, entry: _PooledContext) -> bool:
+    if self._closing or entry.browser is not self._browser or entry.page.is_closed():
+      return False
+    if entry.pages_served >= settings.ingestion.browser_context_max_pages:
+      return False
+    heap_bytes = await entry.page.evaluate(_JS_HEAP_USED)
+    return heap_bytes <= settings.ingestion.browser_context_max_memory_mb * 1024 * 1024
+
+  async def _free_slot(self) -> None:
+    assert self._slots is not None
+    async with self._slots:
+      self._leased -= 1
+      self._slots.notify()
+
+  async def _close_context(self, entry: _PooledContext) -> None:
+    self._recycled += 1
+    # Already gone with its browser
+    with suppress(PlaywrightError):
+      await entry.context.close()
+
+    browser = entry.browser
+    if browser is not self._browser and not self._browser_in_use(browser):
+      await self._close_browser(browser)
+
+  def _browser_in_use(self, browser: Browser) -> bool:
+    return any(entry.browser is browser for entry in [*self._idle, *self._in_use])
+
+  async def _close_browser(self, browser: Browser) -> None:
+    try:
+      await browser.close()
+    except PlaywrightError as e:
+      print(f'Failed to close the browser: {e}')
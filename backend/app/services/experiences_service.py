@@ -1,105 +1,122 @@
+import hashlib
 from collections import defaultdict
 from uuid import UUID
 
+from chromadb.api.types import Metadata
+
 from app.config import settings
 from app.repositories import DatabaseRepository, VectorRepository
+from app.repositories.vector_outbox import (
+  outbox_delete,
+  outbox_update_metadatas,
+  outbox_upsert,
+  outbox_worker,
+  plan_repairs,
+)
 from app.schemas import Experience, Listing
-from app.utils.errors import NotFoundError, ServiceError
+from app.utils.errors import NotFoundError
+from app.utils.search import requirement_query_texts
 
 
 class ExperiencesService(DatabaseRepository, VectorRepository):
   def __init__(self):
     super().__init__()
 
-  def get(self, experience_id: UUID) -> Experience:
-    row = self.fetch_one(
-      """
-      SELECT id, title, organization, type, location, start_date, end_date
-      FROM experiences
-      WHERE id = ?
-      """,
-      (str(experience_id),),
-    )
-    if not row:
+  async def get(self, experience_id: UUID) -> Experience:
+    experiences = await self._load_experiences([str(experience_id)])
+    if not experiences:
       raise NotFoundError(f'Experience with id {experience_id} not found')
 
-    bullet_rows = self.fetch_all(
-      """
-      SELECT text
-      FROM experience_bullets
-      WHERE experience_id = ?
-      ORDER BY id ASC
+    return experiences[0]
+
+  async def list_all(self) -> list[Experience]:
+    return await self._load_experiences()
+
+  async def _load_experiences(self, experience_ids: list[str] | None = None) -> list[Experience]:
+    """
+    Load experiences together with their ordered bullets in a single query.
+
+    Args:
+      experience_ids: Ids to load. None loads every experience.
+
+    Returns:
+      Experiences ordered by start date (newest first). Unknown ids are skipped.
+    """
+    where_clause = ''
+    params: tuple = ()
+    if experience_ids is not None:
+      if not experience_ids:
+        return []
+      placeholders = ', '.join('?' for _ in experience_ids)
+      where_clause = f'WHERE e.id IN ({placeholders})'
+      params = tuple(experience_ids)
+
+    rows = await self.afetch_all(
+      f"""
+      SELECT
+        e.id, e.title, e.organization, e.type, e.location, e.start_date, e.end_date,
+        b.text as bullet
+      FROM experiences e
+      LEFT JOIN experience_bullets b ON b.experience_id = e.id
+      {where_clause}
+      ORDER BY e.start_date DESC, e.id ASC, b.position ASC
       """,
-      (str(experience_id),),
-    )
-    bullets = [r['text'] for r in bullet_rows]
-
-    experience = dict(row)
-    experience['bullets'] = bullets
-
-    return Experience(**experience)
-
-  def list_all(self) -> list[Experience]:
-    rows = self.fetch_all(
-      """
-      SELECT id, title, organization, type, location, start_date, end_date
-      FROM experiences
-      ORDER BY start_date DESC
-      """
+      params,
     )
 
-    experiences = []
+    # Rows arrive grouped by experience, one per bullet
+    experiences: dict[str, dict] = {}
     for row in rows:
-      exp_id = row['id']
-
-      bullet_rows = self.fetch_all(
-        """
-        SELECT text
-        FROM experience_bullets
-        WHERE experience_id = ?
-        ORDER BY id ASC
-        """,
-        (exp_id,),
-      )
-      bullets = [r['text'] for r in bullet_rows]
-
-      experience = dict(row)
-      experience['bullets'] = bullets
-
-      experiences.append(Experience(**experience))
-
-    return experiences
-
-  def find_relevant(
+      experience = experiences.get(row['id'])
+      if experience is None:
+        experience = dict(row)
+        experience.pop('bullet')
+        experience['bullets'] = []
+        experiences[row['id']] = experience
+      if row['bullet'] is not None:
+        experience['bullets'].append(row['bullet'])
+
+    return [Experience(**experience) for experience in experiences.values()]
+
+  async def find_relevant(
     self,
     listing: Listing,
+    requirement_embeddings: list[list[float]] | None = None,
   ) -> list[Experience]:
+    """
+    Pick the experiences, and within them the bullets, that best match a listing.
+
+    Args:
+      listing: Listing whose requirements are matched against experience bullets.
+      requirement_embeddings: Optional vectors for the requirement queries (one per
+        requirement), e.g. from ListingsService.requirement_embeddings. Without them the
+        queries are embedded in one request.
+
+    Returns:
+      Up to experiences.top_k experiences, each pruned to its best matching bullets.
+    """
     if not listing.requirements:
       return []
 
-    # Query vectors by requirement
-    requirement_queries = []
-    for requirement in listing.requirements:
-      query_text = f'Role: {listing.title}\nAchievement: {requirement}'
-      requirement_queries.append((requirement, query_text))
-
-    all_search_results = []
-    for _requirement_text, query_text in requirement_queries:
-      results = self.search_documents('experience_bullets', query_text, k=5)
-      all_search_results.extend(results)
+    # Query vectors by requirement, all in one index query
+    query_texts = requirement_query_texts(listing.title, listing.requirements)
+    result_batches = await self.asearch_documents_many(
+      'experience_bullets', query_texts, k=5, embeddings=requirement_embeddings
+    )
+    all_search_results = [result for results in result_batches for result in results]
 
-    # Calculate aggregated scores per bullet
-    experience_hits = defaultdict(lambda: defaultdict(lambda: {'score': 0.0, 'text': ''}))
+    # Calculate aggregated scores per bullet. Hits are keyed by their document text rather
+    # than the bullet_index metadata, which lags SQLite until the outbox has drained.
+    experience_hits: defaultdict[str, defaultdict[str, float]] = defaultdict(
+      lambda: defaultdict(float)
+    )
 
-    for _doc_text, metadata, similarity_score in all_search_results:
+    for doc_text, metadata, similarity_score in all_search_results:
       experience_id = metadata.get('experience_id')
-      bullet_index = metadata.get('bullet_index')
-
-      if experience_id is None or bullet_index is None:
+      if experience_id is None:
         continue
 
-      experience_hits[experience_id][bullet_index]['score'] += similarity_score
-      experience_hits[experience_id][bullet_index]['text'] = _doc_text
+      experience_hits[experience_id][doc_text] += similarity_score
 
     if not experience_hits:
       return []
@@ -107,146 +124,286 @@ class ExperiencesService(DatabaseRepository, VectorRepository):
     # Aggregate scores per experience
     experience_scores = {}
     for exp_id, bullets in experience_hits.items():
-      total_score = sum(float(bullet_data['score']) for bullet_data in bullets.values())
-      experience_scores[exp_id] = total_score
+      experience_scores[exp_id] = sum(bullets.values())
 
     sorted_experiences = sorted(experience_scores.items(), key=lambda x: x[1], reverse=True)[
       : settings.experiences.top_k
     ]
 
+    loaded = await self._load_experiences([exp_id for exp_id, _ in sorted_experiences])
+    experiences_by_id = {str(experience.id): experience for experience in loaded}
+
     result = []
     seen = set()
     for exp_id, _total_score in sorted_experiences:
-      if exp_id in seen:
+      if exp_id in seen or exp_id not in experiences_by_id:
         continue
       seen.add(exp_id)
 
-      experience = self.get(UUID(exp_id))
-      matched_bullet_data = experience_hits[exp_id]
-      sorted_bullets = sorted(
-        matched_bullet_data.items(), key=lambda x: x[1]['score'], reverse=True
-      )[: settings.experiences.max_bullets]
-      # The actual bullet texts
-      pruned_bullets = [experience.bullets[bullet_index] for bullet_index, _ in sorted_bullets]
+      experience = experiences_by_id[exp_id]
+      # Match hits to the bullets as they are now; ones removed or reworded since they
+      # were indexed have no match and are dropped
+      bullets_by_document = {}
+      for bullet in experience.bullets:
+        document = self._create_bullet_embedding_text(experience, bullet)
+        bullets_by_document.setdefault(document, bullet)
+
+      matched_bullets = [
+        (bullets_by_document[document], score)
+        for document, score in experience_hits[exp_id].items()
+        if document in bullets_by_document
+      ]
+      if not matched_bullets:
+        continue
+      sorted_bullets = sorted(matched_bullets, key=lambda x: x[1], reverse=True)[
+        : settings.experiences.max_bullets
+      ]
 
-      experience.bullets = pruned_bullets
+      experience.bullets = [bullet for bullet, _score in sorted_bullets]
       result.append(experience)
 
     return result
 
-  def create(self, experience: Experience) -> Experience:
-    self.execute(
-      """
-      INSERT INTO experiences (id, title, organization, type, location, start_date, end_date)
-      VALUES (?, ?, ?, ?, ?, ?, ?)
-      """,
-      (
-        str(experience.id),
-        experience.title,
-        experience.organization,
-        experience.type.value,
-        experience.location,
-        experience.start_date,
-        experience.end_date if experience.end_date else None,
-      ),
-    )
-
-    documents = []
-    metadatas = []
-    bullets = []
-
-    for i, bullet_text in enumerate(experience.bullets):
-      bullets.append((str(experience.id), bullet_text))
+  async def create(self, experience: Experience) -> Experience:
+    bullets = self._index_bullets(experience)
 
-      documents.append(self._create_bullet_embedding_text(experience, bullet_text))
-      metadatas.append({'experience_id': str(experience.id), 'bullet_index': i})
-
-    if bullets:
-      self.execute_many(
+    operations: list[tuple[str, tuple]] = [
+      (
         """
-        INSERT INTO experience_bullets (experience_id, text)
-        VALUES (?, ?)
+        INSERT INTO experiences (id, title, organization, type, location, start_date, end_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """,
-        bullets,
-      )
-
-    if documents:
-      try:
-        self.add_documents('experience_bullets', documents, metadatas)
-      except Exception as e:
-        raise ServiceError(f'Failed to save experience embeddings: {str(e)}') from e
+        (
+          str(experience.id),
+          experience.title,
+          experience.organization,
+          experience.type.value,
+          experience.location,
+          experience.start_date,
+          experience.end_date if experience.end_date else None,
+        ),
+      ),
+    ]
+    operations.extend(self._insert_bullet_operation(experience, bullet) for bullet in bullets)
+    if bullets:
+      operations.append(self._upsert_bullets_operation(experience, bullets))
+    await self.atransaction(operations)
+    outbox_worker.wake()
 
     return experience
 
-  def update(self, experience: Experience) -> Experience:
-    self.execute(
-      """
-      UPDATE experiences
-      SET title = ?, organization = ?, type = ?, location = ?, start_date = ?, end_date = ?
-      WHERE id = ?
-      """,
-      (
-        experience.title,
-        experience.organization,
-        experience.type.value,
-        experience.location,
-        experience.start_date,
-        experience.end_date if experience.end_date else None,
-        str(experience.id),
-      ),
-    )
-
-    self.execute(
+  async def update(self, experience: Experience) -> Experience:
+    """
+    Update an experience, touching only the bullets that changed.
+
+    Bullet document ids are derived from the embedded text, so a bullet whose text (or
+    whose experience title) is unchanged keeps its id and embedding. Reordered bullets only
+    get their position and bullet_index metadata rewritten. Index writes are queued in the
+    same transaction and applied in the background.
+    """
+    experience_id = str(experience.id)
+    existing_rows = await self.afetch_all(
       """
-      DELETE FROM experience_bullets
+      SELECT id, position, doc_id
+      FROM experience_bullets
       WHERE experience_id = ?
+      ORDER BY position ASC
       """,
-      (str(experience.id),),
+      (experience_id,),
     )
+    # Bullets indexed before document ids were stable cannot be matched; index them afresh
+    legacy = any(row['doc_id'] is None for row in existing_rows)
+    existing = {} if legacy else {row['doc_id']: row for row in existing_rows}
+
+    bullets = self._index_bullets(experience)
+    wanted = {bullet['doc_id'] for bullet in bullets}
+    removed = [row for doc_id, row in existing.items() if doc_id not in wanted]
+    added = [bullet for bullet in bullets if bullet['doc_id'] not in existing]
+    moved = [
+      bullet
+      for bullet in bullets
+      if bullet['doc_id'] in existing
+      and existing[bullet['doc_id']]['position'] != bullet['position']
+    ]
 
-    documents = []
-    metadatas = []
-    bullets = []
-
-    for i, bullet_text in enumerate(experience.bullets):
-      bullets.append((str(experience.id), bullet_text))
-
-      documents.append(self._create_bullet_embedding_text(experience, bullet_text))
-      metadatas.append({'experience_id': str(experience.id), 'bullet_index': i})
-
-    if bullets:
-      self.execute_many(
+    operations: list[tuple[str, tuple]] = [
+      (
         """
-        INSERT INTO experience_bullets (experience_id, text)
-        VALUES (?, ?)
+        UPDATE experiences
+        SET title = ?, organization = ?, type = ?, location = ?, start_date = ?, end_date = ?
+        WHERE id = ?
         """,
-        bullets,
+        (
+          experience.title,
+          experience.organization,
+          experience.type.value,
+          experience.location,
+          experience.start_date,
+          experience.end_date if experience.end_date else None,
+          experience_id,
+        ),
+      ),
+    ]
+    if legacy:
+      operations.append(
+        ('DELETE FROM experience_bullets WHERE experience_id = ?', (experience_id,))
       )
-
-    self.delete_documents('experience_bullets', {'experience_id': str(experience.id)})
-    if documents:
-      self.add_documents('experience_bullets', documents, metadatas)
+    operations.extend(
+      ('DELETE FROM experience_bullets WHERE id = ?', (row['id'],)) for row in removed
+    )
+    operations.extend(
+      (
+        'UPDATE experience_bullets SET position = ? WHERE id = ?',
+        (bullet['position'], existing[bullet['doc_id']]['id']),
+      )
+      for bullet in moved
+    )
+    operations.extend(self._insert_bullet_operation(experience, bullet) for bullet in added)
+
+    if legacy:
+      operations.append(outbox_delete('experience_bullets', where={'experience_id': experience_id}))
+    elif removed:
+      operations.append(outbox_delete('experience_bullets', ids=[row['doc_id'] for row in removed]))
+    if moved:
+      operations.append(
+        outbox_update_metadatas(
+          'experience_bullets',
+          [bullet['doc_id'] for bullet in moved],
+          [self._bullet_metadata(experience, bullet['position']) for bullet in moved],
+        )
+      )
+    if added:
+      operations.append(self._upsert_bullets_operation(experience, added))
+    await self.atransaction(operations)
+    outbox_worker.wake()
 
     return experience
 
-  def delete(self, id: UUID) -> None:
-    self.execute(
-      """
-      DELETE FROM experiences
-      WHERE id = ?
-      """,
-      (str(id),),
+  async def delete(self, id: UUID) -> None:
+    await self.atransaction(
+      [
+        (
+          """
+          DELETE FROM experiences
+          WHERE id = ?
+          """,
+          (str(id),),
+        ),
+        (
+          """
+          DELETE FROM experience_bullets
+          WHERE experience_id = ?
+          """,
+          (str(id),),
+        ),
+        outbox_delete('experience_bullets', where={'experience_id': str(id)}),
+      ]
     )
-
-    self.execute(
-      """
-      DELETE FROM experience_bullets
-      WHERE experience_id = ?
-      """,
-      (str(id),),
+    outbox_worker.wake()
+
+  async def vector_documents(self) -> dict[str, dict[str, tuple[str, Metadata]]]:
+    """
+    The documents the experience_bullets collection should hold, built from SQLite.
+
+    Returns:
+      (document_text, metadata) tuples keyed by document id, per collection.
+    """
+    expected: dict[str, tuple[str, Metadata]] = {}
+    for experience in await self._load_experiences():
+      for bullet in self._index_bullets(experience):
+        expected[bullet['doc_id']] = (
+          bullet['document'],
+          self._bullet_metadata(experience, bullet['position']),
+        )
+    return {'experience_bullets': expected}
+
+  async def reconcile_vectors(self, dry_run: bool = False) -> dict[str, dict[str, int]]:
+    """
+    Queue whatever index writes bring the experience_bullets collection back in line with
+    SQLite.
+
+    Bullets still without a stable doc_id get one, and their documents are re-indexed
+    under it.
+
+    Args:
+      dry_run: Only count the differences.
+
+    Returns:
+      Counts of missing, changed, relabelled and orphaned documents per collection.
+    """
+    experiences = await self._load_experiences()
+    stored_rows = await self.afetch_all(
+      'SELECT experience_id, position, doc_id FROM experience_bullets'
     )
-
-    self.delete_documents('experience_bullets', {'experience_id': str(id)})
+    stored = {(row['experience_id'], row['position']): row['doc_id'] for row in stored_rows}
+
+    expected: dict[str, tuple[str, Metadata]] = {}
+    operations: list[tuple[str, tuple]] = []
+    for experience in experiences:
+      experience_id = str(experience.id)
+      for bullet in self._index_bullets(experience):
+        expected[bullet['doc_id']] = (
+          bullet['document'],
+          self._bullet_metadata(experience, bullet['position']),
+        )
+        if stored.get((experience_id, bullet['position'])) != bullet['doc_id']:
+          operations.append(
+            (
+              'UPDATE experience_bullets SET doc_id = ? WHERE experience_id = ? AND position = ?',
+              (bullet['doc_id'], experience_id, bullet['position']),
+            )
+          )
+
+    entries = await self.aget_document_entries('experience_bullets')
+    repairs, counts = plan_repairs('experience_bullets', expected, entries)
+    operations.extend(repairs)
+    if operations and not dry_run:
+      await self.atransaction(operations)
+      outbox_worker.wake()
+    return {'experience_bullets': counts}
 
   def _create_bullet_embedding_text(self, experience: Experience, bullet: str) -> str:
     return f'Role: {experience.title}\nAchievement: {bullet}\n'
+
+  def _index_bullets(self, experience: Experience) -> list[dict]:
+    """
+    Describe each bullet with its position, embedding text and content-derived doc id.
+
+    Repeated bullets are told apart by how many identical ones precede them.
+    """
+    bullets = []
+    occurrences: dict[str, int] = defaultdict(int)
+    for position, text in enumerate(experience.bullets):
+      document = self._create_bullet_embedding_text(experience, text)
+      occurrence = occurrences[document]
+      occurrences[document] += 1
+
+      digest = hashlib.sha256(f'{experience.id}\0{occurrence}\0{document}'.encode())
+      bullets.append(
+        {
+          'position': position,
+          'text': text,
+          'document': document,
+          'doc_id': digest.hexdigest()[:32],
+        }
+      )
+    return bullets
+
+  def _bullet_metadata(self, experience: Experience, position: int) -> dict:
+    return {'experience_id': str(experience.id), 'bullet_index': position}
+
+  def _upsert_bullets_operation(
+    self, experience: Experience, bullets: list[dict]
+  ) -> tuple[str, tuple]:
+    return outbox_upsert(
+      'experience_bullets',
+      [bullet['doc_id'] for bullet in bullets],
+      [bullet['document'] for bullet in bullets],
+      [self._bullet_metadata(experience, bullet['position']) for bullet in bullets],
+    )
+
+  def _insert_bullet_operation(self, experience: Experience, bullet: dict) -> tuple[str, tuple]:
+    return (
+      'INSERT INTO experience_bullets (experience_id, text, position, doc_id) VALUES (?, ?, ?, ?)',
+      (str(experience.id), bullet['text'], bullet['position'], bullet['doc_id']),
+    )
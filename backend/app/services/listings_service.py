@@ -1,22 +1,36 @@
 import json
-from typing import Literal
+from typing import Literal, cast
 
 from chromadb.api.types import Metadata
 from pydantic import HttpUrl
 
 from app.config import settings
 from app.repositories import DatabaseRepository, VectorRepository
-from app.schemas import Application, Listing, ListingSummary, Page, StatusEnum, StatusEvent
+from app.repositories.vector_outbox import outbox_upsert, outbox_worker, plan_repairs
+from app.schemas import Listing, ListingSummary, Page, StatusEnum
+from app.utils.cache import ExpiringCache, GenerationalCache
+from app.utils.cursor import decode_cursor, encode_cursor
 from app.utils.deduplication import fuzzy_text_similarity
-from app.utils.errors import NotFoundError
+from app.utils.errors import NotFoundError, ValidationError
+from app.utils.hydration import hydrate_listing, hydrate_listing_summaries
+from app.utils.search import build_fts_query, requirement_query_texts
+
+# Shared with ApplicationsService, whose writes change the status and updated_at columns
+listing_page_cache: GenerationalCache = GenerationalCache(max_entries=256)
+
+# Vectors computed while checking a draft for duplicates, keyed by draft id, so saving the
+# draft does not embed the same text again. Drafts left unsaved simply expire.
+draft_embeddings: ExpiringCache[tuple[str, str, list[float]]] = ExpiringCache(
+  max_entries=256, ttl_seconds=3600.0
+)
 
 
 class ListingsService(DatabaseRepository, VectorRepository):
   def __init__(self, **kwargs):
     super().__init__(**kwargs)
 
-  def get_by_url(self, url: HttpUrl) -> Listing | None:
-    row = self.fetch_one(
+  async def get_by_url(self, url: HttpUrl) -> Listing | None:
+    row = await self.afetch_one(
       """
       SELECT 
         l.id, l.url, l.title, l.company, l.domain, l.location, l.description, l.posted_date,
@@ -27,123 +41,179 @@ class ListingsService(DatabaseRepository, VectorRepository):
       (str(url),),
     )
 
-    return Listing(**dict(row)) if row else None
+    return hydrate_listing(row) if row else None
 
-  def list_all(
+  async def list_all(
     self,
     page,
     size,
     search: str | None = None,
     status: list[StatusEnum] | None = None,
-    sort_by: Literal['title', 'company', 'posted_at', 'updated_at'] | None = None,
+    sort_by: Literal['title', 'company', 'posted_at', 'updated_at', 'relevance'] | None = None,
     sort_dir: Literal['asc', 'desc'] | None = None,
+    cursor: str | None = None,
+  ) -> Page[ListingSummary]:
+    """
+    List listing summaries, either by page number or by seeking past a cursor.
+
+    Every page carries a next_cursor. Passing it back seeks on (sort key, id) instead of
+    using OFFSET, so deep pages cost the same as the first one. The page number is
+    ignored when a cursor is given.
+
+    Search goes through the listings_fts index and prefix-matches every word. Sorting by
+    relevance orders by bm25 rank, most relevant first unless sort_dir is 'asc'.
+
+    Results are cached until the next listing or application write.
+
+    Raises:
+      ValidationError: If the cursor is malformed or was issued for a different sort.
+    """
+    status_values = tuple(s.value for s in status) if status else ()
+    key = (settings.paths.db_path, page, size, search, status_values, sort_by, sort_dir, cursor)
+    generation = listing_page_cache.generation
+
+    cached = listing_page_cache.get(key)
+    if cached is not None:
+      return cached
+
+    result = await self._list_page(
+      page, size, search, status, sort_by, sort_dir, cursor, generation
+    )
+    listing_page_cache.set(key, result, generation)
+    return result
+
+  async def _list_page(
+    self,
+    page,
+    size,
+    search: str | None,
+    status: list[StatusEnum] | None,
+    sort_by: str | None,
+    sort_dir: str | None,
+    cursor: str | None,
+    generation: int,
   ) -> Page[ListingSummary]:
     offset = (page - 1) * size
 
     conditions = []
     params = []
 
-    if search:
-      conditions.append('(l.title LIKE ? OR l.company LIKE ? OR l.domain LIKE ?)')
-      search_term = f'%{search}%'
-      params.extend([search_term, search_term, search_term])
+    search_join = ''
+    search_params = []
+    fts_query = build_fts_query(search) if search else None
+    if fts_query:
+      # Column weights: title, company, domain, description, skills, requirements
+      search_join = """
+        JOIN (
+          SELECT rowid, bm25(listings_fts, 10.0, 6.0, 2.0, 1.0, 3.0, 1.5) as rank
+          FROM listings_fts
+          WHERE listings_fts MATCH ?
+        ) f ON f.rowid = l.rowid
+      """
+      search_params.append(fts_query)
+    elif search:
+      # Nothing searchable (e.g. only punctuation) matches nothing
+      conditions.append('0')
+
+    if sort_by == 'relevance' and not fts_query:
+      sort_by = None
 
     if status:
       placeholders = ', '.join('?' for _ in status)
-      conditions.append(f'cs.status IN ({placeholders})')
+      conditions.append(f's.status IN ({placeholders})')
       params.extend([s.value for s in status])
 
     where_clause = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+    # A status filter already excludes listings without an application, and an inner join
+    # lets the planner start from the status index instead of every listing
+    status_join = 'JOIN' if status else 'LEFT JOIN'
 
+    # Nullable columns are folded into '' so they keep their NULLS-first position and can
+    # still be compared against a cursor
     sort_map = {
       'title': 'l.title',
       'company': 'l.company',
-      'posted_at': 'l.posted_date',
-      'updated_at': 'MAX(cs.created_at)',
+      'posted_at': "COALESCE(l.posted_date, '')",
+      'updated_at': "COALESCE(s.last_updated, '')",
+      # bm25 is lower for better matches; negate it so DESC means most relevant first
+      'relevance': '-f.rank',
     }
 
     if sort_by:
-      sql_sort_col = sort_map.get(sort_by, 'l.posted_date')
+      sort_key = sort_map.get(sort_by, sort_map['posted_at'])
       sql_sort_dir = 'ASC' if sort_dir == 'asc' else 'DESC'
-      order_by = f'{sql_sort_col} {sql_sort_dir}'
+      order_by = f'{sort_key} {sql_sort_dir}, l.id {sql_sort_dir}'
     else:
       # Order by id if no sorting is specified
+      sort_key = 'l.id'
+      sql_sort_dir = 'ASC'
       order_by = 'l.id ASC'
+    sort_token = f'{sort_by or "id"}:{sql_sort_dir.lower()}'
+
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor:
+      position = decode_cursor(cursor)
+      if position.get('sort') != sort_token or 'key' not in position or 'id' not in position:
+        raise ValidationError('Cursor does not match the requested sort order')
+
+      comparison = '>' if sql_sort_dir == 'ASC' else '<'
+      # The redundant single-column bound gives the planner a range to seek on, which it
+      # does not derive from a row-value comparison over an expression
+      page_conditions.append(
+        f'{sort_key} {comparison}= ? AND ({sort_key}, l.id) {comparison} (?, ?)'
+      )
+      page_params.extend([position['key'], position['key'], position['id']])
+      offset = 0
 
+    page_where_clause = f'WHERE {" AND ".join(page_conditions)}' if page_conditions else ''
+
+    # The window count is taken before LIMIT, so offset pages get their total in the same
+    # pass. Cursor pages leave it out: it would have to visit every row after the seek.
+    total_column = '' if cursor else ', COUNT(*) OVER () as total_count'
+
+    # application_status is kept in sync by ApplicationsService, so the page never has to
+    # rank the full status_events history. One extra row tells us whether a next page exists.
     query = f"""
-      WITH latest_events AS (
-        -- Get the absolute latest event for EVERY application
-        SELECT application_id, status, created_at,
-          ROW_NUMBER() OVER (PARTITION BY application_id ORDER BY created_at DESC, id DESC) as rn
-        FROM status_events
-      ),
-      paginated_listings AS (
-        SELECT l.id, ROW_NUMBER() OVER (ORDER BY {order_by}) as sort_rank
-        FROM listings l
-        LEFT JOIN applications a ON l.id = a.listing_id
-        LEFT JOIN latest_events cs ON a.id = cs.application_id AND cs.rn = 1
-        {where_clause}
-        GROUP BY l.id
-        ORDER BY sort_rank ASC
-        LIMIT ? OFFSET ?
-      ),
-      aggregated_apps AS (
-        -- Pre-aggregate events into apps to avoid duplicating apps in the final join
-        SELECT 
-          a.listing_id,
-          json_object(
-            'id', a.id,
-            'listing_id', a.listing_id,
-            'resume_id', a.resume_id,
-            'status_events', (
-               SELECT json_group_array(json_object(
-                 'id', se.id, 'status', se.status, 'stage', se.stage, 
-                 'created_at', se.created_at, 'notes', se.notes
-               )) FROM status_events se WHERE se.application_id = a.id
-            )
-          ) as app_json
-        FROM applications a
-      )
-      SELECT 
+      SELECT
         l.id, l.url, l.title, l.company, l.domain, l.location, l.posted_date,
-        (SELECT MAX(le.created_at) FROM latest_events le 
-         WHERE le.application_id IN (SELECT a.id FROM applications a WHERE a.listing_id = l.id) 
-         AND le.rn = 1) as last_updated,
-        (SELECT le.status FROM latest_events le 
-         WHERE le.application_id IN (SELECT a.id FROM applications a WHERE a.listing_id = l.id) 
-         AND le.rn = 1 
-         ORDER BY le.created_at DESC LIMIT 1) as current_status,
-        COALESCE(json_group_array(aa.app_json) FILTER (WHERE aa.app_json IS NOT NULL), json_array()) as applications_json
-      FROM paginated_listings pl
-      JOIN listings l ON pl.id = l.id
-      LEFT JOIN aggregated_apps aa ON l.id = aa.listing_id
-      GROUP BY l.id
-      ORDER BY pl.sort_rank ASC
+        s.last_updated, s.status as current_status,
+        {sort_key} as sort_key{total_column}
+      FROM listings l
+      {search_join}
+      {status_join} application_status s ON s.listing_id = l.id
+      {page_where_clause}
+      ORDER BY {order_by}
+      LIMIT ? OFFSET ?
     """
 
-    rows = self.fetch_all(query, tuple(params + [size, offset]))
+    rows = await self.afetch_all(query, tuple(search_params + page_params + [size + 1, offset]))
 
-    listings = []
-    for row in rows:
-      row_dict = dict(row)
-      # For ListingSummary, no applications
-      listings.append(ListingSummary(**row_dict))
-
-    count_query = f"""
-      WITH latest_events AS (
-        SELECT 
-          application_id, status, created_at,
-          ROW_NUMBER() OVER (PARTITION BY application_id ORDER BY created_at DESC, id DESC) as rn
-        FROM status_events
-      )
-      SELECT COUNT(DISTINCT l.id)
-      FROM listings l
-      LEFT JOIN applications a ON l.id = a.listing_id
-      LEFT JOIN latest_events cs ON a.id = cs.application_id AND cs.rn = 1
-      {where_clause}
-    """
-    total_count = self.fetch_one(count_query, tuple(params))
-    total_count = total_count[0] if total_count else 0
+    total_count = rows[0]['total_count'] if rows and not cursor else None
+
+    next_cursor = None
+    if len(rows) > size:
+      rows = rows[:size]
+      last = rows[-1]
+      next_cursor = encode_cursor({'sort': sort_token, 'key': last['sort_key'], 'id': last['id']})
+
+    listings = hydrate_listing_summaries(rows)
+
+    # Cursor pages and pages past the end reuse the total from an earlier offset page
+    count_key = (settings.paths.db_path, 'count', search, tuple(params))
+    if total_count is None:
+      total_count = listing_page_cache.get(count_key)
+    if total_count is None:
+      count_query = f"""
+        SELECT COUNT(*)
+        FROM listings l
+        {search_join}
+        {status_join} application_status s ON s.listing_id = l.id
+        {where_clause}
+      """
+      count_row = await self.afetch_one(count_query, tuple(search_params + params))
+      total_count = count_row[0] if count_row else 0
+    listing_page_cache.set(count_key, total_count, generation)
 
     return Page(
       items=listings,
@@ -151,10 +221,12 @@ class ListingsService(DatabaseRepository, VectorRepository):
       page=page,
       size=size,
       pages=(total_count + size - 1) // size,
+      next_cursor=next_cursor,
     )
 
-  def get(self, listing_id) -> Listing:
-    # We use correlated subqueries to build the JSON layers independently
+  async def get(self, listing_id) -> Listing:
+    # We use correlated subqueries to build the JSON layers independently. json() keeps the
+    # inner array as JSON rather than a string, so the whole tree decodes in one pass
     query = """
       SELECT 
         l.id as listing_id, l.url, l.title, l.company, l.domain,
@@ -165,7 +237,7 @@ class ListingsService(DatabaseRepository, VectorRepository):
               'id', a.id,
               'listing_id', a.listing_id,
               'resume_id', a.resume_id,
-              'status_events', (
+              'status_events', json((
                 SELECT json_group_array(
                   json_object(
                     'id', se.id,
@@ -177,7 +249,7 @@ class ListingsService(DatabaseRepository, VectorRepository):
                 )
                 FROM status_events se
                 WHERE se.application_id = a.id
-              )
+              ))
             )
           )
           FROM applications a
@@ -187,30 +259,16 @@ class ListingsService(DatabaseRepository, VectorRepository):
       WHERE l.id = ?
     """
 
-    row = self.fetch_one(query, (str(listing_id),))
+    row = await self.afetch_one(query, (str(listing_id),))
     if not row:
       raise NotFoundError(f'Listing {listing_id} not found')
 
     row_dict = dict(row)
-    apps_json_raw = row_dict.pop('applications_json')
-    listing_id = row_dict.pop('listing_id')
-
-    # Parse nested JSON
-    apps_data = json.loads(apps_json_raw) if apps_json_raw else []
-    applications = []
+    applications_json = row_dict.pop('applications_json')
+    row_dict['id'] = row_dict.pop('listing_id')
+    return hydrate_listing(row_dict, applications_json)
 
-    for app_data in apps_data:
-      # SQLite nests inner arrays as JSON strings
-      events_raw = app_data.pop('status_events')
-      events_list = json.loads(events_raw) if isinstance(events_raw, str) else (events_raw or [])
-      
-      status_events = [StatusEvent(**e) for e in events_list if e.get('id')]
-      applications.append(Application(**app_data, status_events=status_events))
-
-    row_dict['id'] = listing_id
-    return Listing(**row_dict, applications=applications)
-
-  def find_similar(
+  async def find_similar(
     self,
     new_listing: Listing,
   ) -> Listing | None:
@@ -226,14 +284,14 @@ class ListingsService(DatabaseRepository, VectorRepository):
     best_match = None
     best_score = 0.0
 
-    semantic_matches = self._find_semantic_duplicates(new_listing)
+    semantic_matches = await self._find_semantic_duplicates(new_listing)
     if semantic_matches:
       match, score = semantic_matches[0]
       if score > best_score:
         best_match = match
         best_score = score
 
-    heuristic_matches = self._find_heuristic_duplicates(new_listing)
+    heuristic_matches = await self._find_heuristic_duplicates(new_listing)
     if heuristic_matches:
       match, score = heuristic_matches[0]
       if score > best_score:
@@ -245,35 +303,172 @@ class ListingsService(DatabaseRepository, VectorRepository):
 
     return best_match
 
-  def create(self, listing: Listing) -> Listing:
-    self.execute(
-      """
-      INSERT INTO listings (
-        id, url, title, company, domain, location, description, posted_date, skills,
-        requirements
-      )
-      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-      """,
+  async def create(self, listing: Listing) -> Listing:
+    """
+    Save a listing and queue its embeddings in the same transaction.
+
+    The outbox worker indexes the listing in the background, so it shows up in semantic
+    search shortly after this returns rather than before. Each requirement's query text is
+    embedded then too, so resume generation can match experiences without embedding
+    anything on its own request. If the listing was
+    checked for duplicates as a draft with the same id and its text is unchanged, the
+    vector computed then is stored as-is instead of embedding the text again.
+    """
+    listing_id = str(listing.id)
+    document = self._create_listing_embedding_text(listing)
+    embeddings = namespace = None
+    draft = draft_embeddings.pop(listing_id)
+    if draft is not None and draft[1] == document:
+      namespace, embeddings = draft[0], [draft[2]]
+
+    operations: list[tuple[str, tuple]] = [
       (
-        str(listing.id),
-        str(listing.url),
-        listing.title,
-        listing.company,
-        listing.domain,
-        listing.location,
-        listing.description,
-        listing.posted_date.isoformat() if listing.posted_date else None,
-        json.dumps(listing.skills),
-        json.dumps(listing.requirements),
+        """
+        INSERT INTO listings (
+          id, url, title, company, domain, location, description, posted_date, skills,
+          requirements
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+          listing_id,
+          str(listing.url),
+          listing.title,
+          listing.company,
+          listing.domain,
+          listing.location,
+          listing.description,
+          listing.posted_date.isoformat() if listing.posted_date else None,
+          json.dumps(listing.skills),
+          json.dumps(listing.requirements),
+        ),
+      ),
+      outbox_upsert(
+        'listings',
+        [listing_id],
+        [document],
+        [{'listing_id': listing_id}],
+        embeddings=embeddings,
+        namespace=namespace,
       ),
+    ]
+    if listing.requirements:
+      operations.append(
+        outbox_upsert('listing_requirements', *self._requirement_documents(listing))
+      )
+    await self.atransaction(operations)
+    listing_page_cache.bump()
+    outbox_worker.wake()
+
+    return listing
+
+  async def requirement_embeddings(self, listing: Listing) -> list[list[float]]:
+    """
+    Vectors for the listing's requirement queries, as stored when the listing was saved.
+
+    Requirements without a stored vector, because the outbox has not applied it yet or
+    the embedding spec changed since, are embedded together in one request.
+
+    Returns:
+      One vector per requirement, in order.
+    """
+    texts = requirement_query_texts(listing.title, listing.requirements)
+    ids = self._requirement_document_ids(listing)
+    stored = await self.aget_embeddings('listing_requirements', ids)
+
+    vectors: list[list[float] | None] = [
+      stored[doc_id][1] if doc_id in stored and stored[doc_id][0] == text else None
+      for doc_id, text in zip(ids, texts, strict=True)
+    ]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+      embedded = await self.aembed_documents([texts[i] for i in missing])
+      for i, vector in zip(missing, embedded, strict=True):
+        vectors[i] = vector
+    return cast(list[list[float]], vectors)
+
+  async def vector_documents(self) -> dict[str, dict[str, tuple[str, Metadata]]]:
+    """
+    The documents the listings and listing_requirements collections should hold, built
+    from SQLite.
+
+    Returns:
+      (document_text, metadata) tuples keyed by document id, per collection.
+    """
+    rows = await self.afetch_all(
+      """
+      SELECT
+        l.id, l.url, l.title, l.company, l.domain, l.location, l.description, l.posted_date,
+        l.skills, l.requirements
+      FROM listings l
+      """
     )
+    expected: dict[str, dict[str, tuple[str, Metadata]]] = {
+      'listings': {},
+      'listing_requirements': {},
+    }
+    for row in rows:
+      listing = hydrate_listing(row)
+      listing_id = str(listing.id)
+      expected['listings'][listing_id] = (
+        self._create_listing_embedding_text(listing),
+        {'listing_id': listing_id},
+      )
+      ids, texts, metadatas = self._requirement_documents(listing)
+      expected['listing_requirements'].update(
+        zip(ids, zip(texts, metadatas, strict=True), strict=True)
+      )
+    return expected
+
+  async def reconcile_vectors(self, dry_run: bool = False) -> dict[str, dict[str, int]]:
+    """
+    Queue whatever index writes bring the listings and listing_requirements collections
+    back in line with SQLite.
 
-    documents = [self._create_listing_embedding_text(listing)]
-    metadatas: list[Metadata] = [{'listing_id': str(listing.id)}]
+    Documents are keyed by listing id. Listings indexed before that under random ids are
+    re-indexed once under their listing id.
 
-    self.add_documents(collection_name='listings', documents=documents, metadatas=metadatas)
+    Args:
+      dry_run: Only count the differences.
 
-    return listing
+    Returns:
+      Counts of missing, changed, relabelled and orphaned documents per collection.
+    """
+    expected = await self.vector_documents()
+    operations: list[tuple[str, tuple]] = []
+    counts = {}
+    for collection, documents in expected.items():
+      entries = await self.aget_document_entries(collection)
+      repairs, counts[collection] = plan_repairs(collection, documents, entries)
+      operations.extend(repairs)
+
+    if operations and not dry_run:
+      await self.atransaction(operations)
+      outbox_worker.wake()
+    return counts
+
+  def page_cache_stats(self) -> dict:
+    return listing_page_cache.stats()
+
+  def draft_embedding_stats(self) -> dict:
+    return draft_embeddings.stats()
+
+  def _requirement_document_ids(self, listing: Listing) -> list[str]:
+    return [f'{listing.id}:{index}' for index in range(len(listing.requirements))]
+
+  def _requirement_documents(self, listing: Listing) -> tuple[list[str], list[str], list[Metadata]]:
+    """
+    Ids, texts and metadata of the listing_requirements documents for a listing.
+    """
+    metadatas: list[Metadata] = [
+      {'listing_id': str(listing.id), 'requirement_index': index}
+      for index in range(len(listing.requirements))
+    ]
+    return (
+      self._requirement_document_ids(listing),
+      requirement_query_texts(listing.title, listing.requirements),
+      metadatas,
+    )
 
   def _create_listing_embedding_text(self, listing: Listing) -> str:
     parts = [
@@ -291,7 +486,7 @@ class ListingsService(DatabaseRepository, VectorRepository):
 
     return '\n'.join(parts)
 
-  def _find_semantic_duplicates(
+  async def _find_semantic_duplicates(
     self,
     new_listing: Listing,
   ) -> list[tuple[Listing, float]]:
@@ -305,10 +500,12 @@ class ListingsService(DatabaseRepository, VectorRepository):
       List of (similar_listing, similarity_score) tuples above threshold
     """
     query_text = self._create_listing_embedding_text(new_listing)
-    search_results = self.search_documents(
-      collection_name='listings',
-      query=query_text,
-      k=settings.listings.search_k,
+    namespace = self.embedding_namespace
+    (embedding,) = await self.aembed_documents([query_text])
+    draft_embeddings.set(str(new_listing.id), (namespace, query_text, embedding))
+
+    (search_results,) = await self.asearch_documents_many(
+      'listings', [query_text], k=settings.listings.search_k, embeddings=[embedding]
     )
 
     matching_ids = []
@@ -324,7 +521,7 @@ class ListingsService(DatabaseRepository, VectorRepository):
       return []
 
     placeholders = ','.join('?' * len(matching_ids))
-    rows = self.fetch_all(
+    rows = await self.afetch_all(
       f"""
       SELECT 
         l.id, l.url, l.title, l.company, l.domain, l.location, l.description, l.posted_date,
@@ -337,13 +534,13 @@ class ListingsService(DatabaseRepository, VectorRepository):
 
     similar = []
     for row in rows:
-      listing = Listing(**dict(row))
+      listing = hydrate_listing(row)
       score = similarity_scores.get(str(listing.id), 0.0)
       similar.append((listing, score))
 
     return sorted(similar, key=lambda x: x[1], reverse=True)
 
-  def _find_heuristic_duplicates(
+  async def _find_heuristic_duplicates(
     self,
     new_listing: Listing,
   ) -> list[tuple[Listing, float]]:
@@ -356,7 +553,15 @@ class ListingsService(DatabaseRepository, VectorRepository):
     Returns:
       List of (similar_listing, similarity_score) tuples above threshold
     """
-    existing_listings = self.list_all()
+    rows = await self.afetch_all(
+      """
+      SELECT
+        l.id, l.url, l.title, l.company, l.domain, l.location, l.description, l.posted_date,
+        l.skills, l.requirements
+      FROM listings l
+      """
+    )
+    existing_listings = [hydrate_listing(row) for row in rows]
 
     similar = []
     for existing_listing in existing_listings:
@@ -0,0 +1,157 @@
+import time
+from collections.abc import Sequence
+from typing import Any, Protocol
+
+from chromadb.api.types import Metadata
+
+from app.config import settings
+from app.repositories.embedding_providers import (
+  EmbeddingSpec,
+  collection_namespace,
+  validate_embedding_spec,
+)
+from app.repositories.vector_outbox import outbox_worker, plan_repairs
+from app.repositories.vector_repository import (
+  VectorRepository,
+  configured_embedding,
+  flush_vector_stores,
+  get_active_embedding,
+  set_active_embedding,
+  vector_executor,
+)
+from app.utils.background import BackgroundWorker
+
+# Settings changes wake the worker directly; the poll picks up changes made by other processes
+_POLL_INTERVAL_SECONDS = 60.0
+
+
+class VectorDocumentSource(Protocol):
+  async def vector_documents(self) -> dict[str, dict[str, tuple[str, Metadata]]]: ...
+
+
+class ReembeddingService(BackgroundWorker):
+  """
+  Builds the collections of a newly configured embedding spec in the background, then
+  makes it the active spec.
+
+  Searches keep using the active spec's collections until the switch. The job first has
+  the outbox mirror every index write to the new spec, then embeds the source text read
+  from SQLite in batches of embedding_batch_size. Documents the new collections already
+  hold are skipped, so an interrupted job resumes where it stopped. Differences that raced
+  with the bulk load are queued through the outbox, and the active spec is switched with
+  one atomic write. The previous spec's collections are kept, so switching back only
+  catches up on what changed.
+  """
+
+  def __init__(
+    self, sources: Sequence[VectorDocumentSource], poll_interval: float = _POLL_INTERVAL_SECONDS
+  ):
+    super().__init__('reembedding', poll_interval)
+    self.sources = sources
+    self._status: dict[str, Any] = {'state': 'idle'}
+
+  def status(self) -> dict[str, Any]:
+    """
+    The active spec's namespace, and the progress of the current or last rebuild.
+    """
+    return {'active': collection_namespace(get_active_embedding()), **self._status}
+
+  async def rebuild(self, target: EmbeddingSpec) -> bool:
+    """
+    Build the collections of target and make it the active spec.
+
+    Args:
+      target: Spec to switch to.
+
+    Returns:
+      Whether target became active. False if the configured spec changed meanwhile.
+
+    Raises:
+      ServiceError: If target is not a valid spec or embedding fails. Documents embedded
+        so far are kept for the next attempt.
+    """
+    validate_embedding_spec(target)
+    repository = VectorRepository(embedding=target)
+    outbox = outbox_worker.outbox
+    self._status = {
+      'state': 'running',
+      'target': collection_namespace(target),
+      'total': 0,
+      'done': 0,
+      'started_at': time.time(),
+    }
+    print(f'Re-embedding vector collections for {self._status["target"]}')
+
+    # Mirror first: writes committed after the read below still reach the new collections
+    outbox.mirror = repository
+    try:
+      documents = await self._vector_documents()
+      self._status['total'] = sum(len(expected) for expected in documents.values())
+
+      for collection, expected in documents.items():
+        stored = {
+          doc_id: document
+          for doc_id, document, _metadata in await repository.aget_document_entries(collection)
+        }
+        pending = [
+          doc_id
+          for doc_id, (document, _metadata) in expected.items()
+          if stored.get(doc_id) != document
+        ]
+        self._status['done'] += len(expected) - len(pending)
+
+        for start in range(0, len(pending), settings.model.embedding_batch_size):
+          if configured_embedding() != target:
+            self._status = {'state': 'idle'}
+            return False
+
+          ids = pending[start : start + settings.model.embedding_batch_size]
+          await repository.aadd_documents(
+            collection,
+            [expected[doc_id][0] for doc_id in ids],
+            [expected[doc_id][1] for doc_id in ids],
+            ids=ids,
+          )
+          self._status['done'] += len(ids)
+
+        # Saved per collection, so an interrupted job resumes after the last one finished
+        await vector_executor.run(flush_vector_stores)
+
+      # Queued behind the writes that raced with the bulk load, so they apply in order
+      documents = await self._vector_documents()
+      operations: list[tuple[str, tuple]] = []
+      for collection, expected in documents.items():
+        entries = await repository.aget_document_entries(collection)
+        repairs, _counts = plan_repairs(collection, expected, entries)
+        operations.extend(repairs)
+      if operations:
+        await outbox.atransaction(operations)
+        await outbox.adrain()
+
+      set_active_embedding(target)
+    except Exception as e:
+      self._status.update(state='failed', error=str(e), finished_at=time.time())
+      raise
+    finally:
+      outbox.mirror = None
+
+    self._status.update(state='idle', finished_at=time.time())
+    print(f'Vector collections now use {self._status["target"]}')
+    return True
+
+  async def _vector_documents(self) -> dict[str, dict[str, tuple[str, Metadata]]]:
+    documents: dict[str, dict[str, tuple[str, Metadata]]] = {}
+    for source in self.sources:
+      documents.update(await source.vector_documents())
+    return documents
+
+  async def _round(self) -> float | None:
+    target = configured_embedding()
+    try:
+      if target != get_active_embedding() and not await self.rebuild(target):
+        # Superseded by another settings change, which can start right away
+        return 0.0
+    # Logged and retried next round; the worker must outlive any one failure
+    except Exception as e:  # noqa: BLE001
+      print(f'Re-embedding for {target.model} failed: {e}')
+    return None
@@ -1,27 +1,24 @@
 from uuid import UUID
 
 from app.repositories import DatabaseRepository
-from app.schemas import Resume, ResumeData
+from app.schemas import Resume
 from app.utils.errors import NotFoundError
+from app.utils.hydration import hydrate_resume
 
 
 class ResumesService(DatabaseRepository):
   def __init__(self, **kwargs):
     super().__init__(**kwargs)
 
-  def get(self, resume_id: UUID) -> Resume:
-    row = self.fetch_one('SELECT * FROM resumes WHERE id = ?', (str(resume_id),))
+  async def get(self, resume_id: UUID) -> Resume:
+    row = await self.afetch_one('SELECT * FROM resumes WHERE id = ?', (str(resume_id),))
     if not row:
       raise NotFoundError(f'Resume {resume_id} not found')
 
-    return Resume(
-      id=row['id'],
-      template=row['template'],
-      data=ResumeData.model_validate_json(row['data']),
-    )
+    return hydrate_resume(row)
 
-  def create(self, resume: Resume) -> Resume:
-    self.execute(
+  async def create(self, resume: Resume) -> Resume:
+    await self.aexecute(
       'INSERT INTO resumes (id, template, data) VALUES (?, ?, ?)',
       (
         str(resume.id),
@@ -32,12 +29,12 @@ class ResumesService(DatabaseRepository):
 
     return resume
 
-  def update(self, resume: Resume) -> Resume:
-    row = self.fetch_one('SELECT * FROM resumes WHERE id = ?', (str(resume.id),))
+  async def update(self, resume: Resume) -> Resume:
+    row = await self.afetch_one('SELECT * FROM resumes WHERE id = ?', (str(resume.id),))
     if not row:
       raise NotFoundError(f'Resume {resume.id} not found')
 
-    self.execute(
+    await self.aexecute(
       'UPDATE resumes SET template = ?, data = ? WHERE id = ?',
       (
         resume.template,
@@ -48,9 +45,9 @@ class ResumesService(DatabaseRepository):
 
     return resume
 
-  def delete(self, resume_id: UUID) -> None:
-    row = self.fetch_one('SELECT id FROM resumes WHERE id = ?', (str(resume_id),))
+  async def delete(self, resume_id: UUID) -> None:
+    row = await self.afetch_one('SELECT id FROM resumes WHERE id = ?', (str(resume_id),))
     if not row:
       raise NotFoundError(f'Resume {resume_id} not found')
 
-    self.execute('DELETE FROM resumes WHERE id = ?', (str(resume_id),))
+    await self.aexecute('DELETE FROM resumes WHERE id = ?', (str(resume_id),))
@@ -1,18 +1,50 @@
+import asyncio
 import base64
+import codecs
 import re
+import time
 import urllib.parse
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal, NamedTuple
 
-from bs4 import BeautifulSoup
-from playwright.async_api import Page, async_playwright
+import httpx
+from bs4 import BeautifulSoup, Tag
+from playwright.async_api import Page, Route
 from pydantic import BaseModel, HttpUrl
 
 from app.config import settings
+from app.repositories.asset_cache import CachedAsset, freshness_lifetime, get_asset_cache
+from app.repositories.database_repository import database_executor
 from app.resources.scripts import (
+  JS_APPLY_ASSETS,
+  JS_COLLECT_ASSETS,
   JS_INJECT_BASE,
   JS_MATERIALIZE_STYLES,
 )
+from app.services.browser_pool import BrowserPool
+from app.utils.cache import ExpiringCache
 from app.utils.errors import ServiceError
 
+USER_AGENT = (
+  'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+  '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+# How long a domain's fetch path is trusted before plain HTTP is tried on it again
+_DOMAIN_STRATEGY_TTL_SECONDS = 24 * 3600.0
+
+
+class AssetResponse(NamedTuple):
+  status: int
+  # Names are lower-cased
+  headers: dict[str, str]
+  body: bytes
+
+
+# Downloads one asset, sending the given extra request headers
+AssetGetter = Callable[[str, dict[str, str]], Awaitable[AssetResponse]]
+
 SNAPSHOT_TAGS = [
   'script',
   'noscript',
@@ -62,6 +94,20 @@ BOILERPLATE_KEYWORDS = [
 ]
 
 
+def _setting_list(value: str) -> list[str]:
+  return [item.strip().lower() for item in value.split(',') if item.strip()]
+
+
+def _host_matches(host: str | None, domains: list[str]) -> bool:
+  """
+  Whether host is one of the domains or a subdomain of one.
+  """
+  if not host:
+    return False
+  host = host.lower()
+  return any(host == domain or host.endswith(f'.{domain}') for domain in domains)
+
+
 class ScrapingResult(BaseModel):
   content: str
   html: str
@@ -71,6 +117,58 @@ class ScrapingResult(BaseModel):
 # Generally my-use case doesn't violate any legal guidelines. But we should include a
 # "Ethical scraping" setting and respect robots.txt for those who enable it.
 class ScrapingService:
+  def __init__(self):
+    self.browser_pool = BrowserPool(context_options={'user_agent': USER_AGENT})
+    # Which fetch path last worked for each domain
+    self.domain_strategies: ExpiringCache[Literal['http', 'browser']] = ExpiringCache(
+      max_entries=1024, ttl_seconds=_DOMAIN_STRATEGY_TTL_SECONDS
+    )
+    self._http_client: httpx.AsyncClient | None = None
+    self._http_client_loop: asyncio.AbstractEventLoop | None = None
+    self._fetches: Counter[str] = Counter()
+
+  def start(self) -> None:
+    """
+    Launch the shared browser in the background. Call from the app's event loop.
+    """
+    self.browser_pool.start()
+
+  async def close(self) -> None:
+    await self.browser_pool.close()
+    if self._http_client is not None:
+      await self._http_client.aclose()
+      self._http_client = None
+
+  def stats(self) -> dict[str, Any]:
+    return {
+      'http': self._fetches['http'],
+      'browser_fallback': self._fetches['browser_fallback'],
+      'browser': self._fetches['browser'],
+      'blocked_requests': self._fetches['blocked_requests'],
+      'domains': self.domain_strategies.stats(),
+    }
+
+  def asset_cache_stats(self) -> dict[str, Any] | None:
+    cache = get_asset_cache()
+    return cache.stats() if cache is not None else None
+
+  @property
+  def http_client(self) -> httpx.AsyncClient:
+    """
+    Keep-alive client shared by page and asset requests on the current event loop.
+    """
+    loop = asyncio.get_running_loop()
+    if self._http_client is None or self._http_client_loop is not loop:
+      # A client is bound to the loop it was first used on; scripts that run several loops
+      # get one per loop
+      self._http_client = httpx.AsyncClient(
+        headers={'User-Agent': USER_AGENT},
+        follow_redirects=True,
+        limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=60.0),
+      )
+      self._http_client_loop = loop
+    return self._http_client
+
   def _clean_html(self, html: str) -> str:
     soup = BeautifulSoup(html, 'html.parser')
 
@@ -111,52 +209,229 @@ class ScrapingService:
     # Converts CSS-in-JS to static <style> tags
     await page.evaluate(JS_MATERIALIZE_STYLES)
 
-    # Make all external CSS files inline <style> tags
-    style_handles = await page.query_selector_all('link[rel="stylesheet"]')
-    for handle in style_handles:
-      try:
-        href = await handle.get_attribute('href')
-        if href:
-          response = await page.request.get(href)
-          if response.status == 200:
-            css_text = await response.text()
-
-            def replacer(match):
-              url = match.group(1).strip('"\'')
-              if not url.startswith(('http', 'https', 'data:')):
-                resolved = urllib.parse.urljoin(base_url, url)
-                return f'url("{resolved}")'
-              return match.group(0)
-
-            css_text = re.sub(r'url\(([^)]+)\)', replacer, css_text)
-            await handle.evaluate(
-              (
-                '(el, css) => { const style = document.createElement("style"); '
-                'style.textContent = css; el.replaceWith(style); }'
-              ),
-              css_text,
-            )
-      except Exception:
+    # Tags every external stylesheet and image, and lists their absolute URLs
+    assets = await page.evaluate(JS_COLLECT_ASSETS)
+    timeout_ms = settings.ingestion.asset_timeout_seconds * 1000
+
+    async def get(url: str, headers: dict[str, str]) -> AssetResponse:
+      # The page's request context sends the cookies the page was loaded with
+      response = await page.request.get(url, headers=headers, timeout=timeout_ms)
+      body = await response.body() if response.status == 200 else b''
+      return AssetResponse(response.status, response.headers, body)
+
+    refs, contents = await self._load_assets(assets, get)
+
+    # Swaps every fetched asset in with one round trip, and removes the tags
+    await page.evaluate(JS_APPLY_ASSETS, {'assets': refs, 'contents': contents})
+
+  async def _snapshot_html(self, html: str, base_url: str) -> str:
+    """
+    Make a self-contained copy of server-rendered HTML, inlining its stylesheets and
+    images the way _inline_assets does in the browser.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    base = soup.find('base', href=True)
+    if isinstance(base, Tag):
+      base_url = urllib.parse.urljoin(base_url, str(base['href']))
+    else:
+      # Ensures links are resolved correctly
+      base = soup.new_tag('base', href=base_url)
+      (soup.head or soup).insert(0, base)
+
+    tags: dict[str, Tag] = {}
+    assets: list[dict[str, str]] = []
+    candidates = [
+      *(('style', tag, tag.get('href')) for tag in soup.find_all('link', rel='stylesheet')),
+      *(('image', tag, tag.get('src')) for tag in soup.find_all('img')),
+    ]
+    for kind, tag, url in candidates:
+      if not isinstance(tag, Tag) or not isinstance(url, str):
         continue
+      url = urllib.parse.urljoin(base_url, url)
+      if urllib.parse.urlsplit(url).scheme in ('http', 'https'):
+        tags[str(len(assets))] = tag
+        assets.append({'id': str(len(assets)), 'kind': kind, 'url': url})
 
-    # Make all external images inline data URIs (base64-encoded)
-    img_handles = await page.query_selector_all('img')
-    for handle in img_handles:
-      try:
-        src = await handle.get_attribute('src')
-
-        if src and not src.startswith('data:'):
-          response = await page.request.get(src)
-
-          if response.status == 200:
-            img_bytes = await response.body()
-            img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-            mime_type = response.headers.get('content-type', 'image/png')
-            data_uri = f'data:{mime_type};base64,{img_base64}'
-            await handle.evaluate('(el, dataUri) => { el.src = dataUri; }', data_uri)
-            await handle.evaluate('el => el.removeAttribute("srcset")')
-      except Exception:
+    refs, contents = await self._load_assets(assets, self._http_get_asset)
+    for asset_id, ref in refs.items():
+      tag = tags[asset_id]
+      if tag.name == 'link':
+        style = soup.new_tag('style')
+        style.string = contents[ref]
+        tag.replace_with(style)
+      else:
+        tag['src'] = contents[ref]
+        if 'srcset' in tag.attrs:
+          del tag['srcset']
+
+    return self._strip_scripts(str(soup))
+
+  async def _http_get_asset(self, url: str, headers: dict[str, str]) -> AssetResponse:
+    response = await self.http_client.get(
+      url, headers=headers, timeout=settings.ingestion.asset_timeout_seconds
+    )
+    return AssetResponse(
+      response.status_code,
+      {name.lower(): value for name, value in response.headers.items()},
+      response.content,
+    )
+
+  async def _load_assets(
+    self, assets: list[dict[str, str]], get: AssetGetter
+  ) -> tuple[dict[str, str], dict[str, str]]:
+    """
+    Download assets and turn them into what replaces their tags.
+
+    Args:
+      assets: {id, kind, url} dicts, kind being 'style' or 'image'.
+      get: Downloads one asset.
+
+    Returns:
+      A ref per asset id, and the replacement content per ref: CSS text for stylesheets
+      and a data URI for images. An asset used several times shares one ref. Assets that
+      failed, ran out of time or come from a blocked host are left out and keep their
+      original URL.
+    """
+    blocked_hosts = _setting_list(settings.ingestion.blocked_hosts)
+    urls = [
+      url
+      for url in dict.fromkeys(asset['url'] for asset in assets)
+      if not _host_matches(urllib.parse.urlsplit(url).hostname, blocked_hosts)
+    ]
+    fetched = await self._fetch_assets(get, urls)
+
+    refs: dict[str, str] = {}
+    contents: dict[str, str] = {}
+    for asset in assets:
+      if asset['url'] not in fetched:
+        continue
+      ref = f'{asset["kind"]} {asset["url"]}'
+      if ref not in contents:
+        content_type, body = fetched[asset['url']]
+        if asset['kind'] == 'style':
+          # Make all external CSS files inline <style> tags
+          contents[ref] = self._absolutize_css_urls(
+            body.decode(self._charset(content_type), errors='replace'), asset['url']
+          )
+        else:
+          # Make all external images inline data URIs (base64-encoded)
+          mime_type = content_type.split(';')[0].strip() or 'image/png'
+          contents[ref] = f'data:{mime_type};base64,{base64.b64encode(body).decode("ascii")}'
+      refs[asset['id']] = ref
+    return refs, contents
+
+  async def _fetch_assets(self, get: AssetGetter, urls: list[str]) -> dict[str, tuple[str, bytes]]:
+    """
+    Download assets concurrently, a few connections per host, within the snapshot budget.
+    Assets in the asset cache are served from it while fresh, and revalidated with a
+    conditional request once stale.
+
+    Args:
+      get: Downloads one asset.
+      urls: Absolute asset URLs.
+
+    Returns:
+      (content_type, body) tuples keyed by URL, for the assets that downloaded in time.
+    """
+    if not urls:
+      return {}
+
+    cache = get_asset_cache()
+    semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(url: str) -> tuple[str, bytes] | None:
+      cached = await database_executor.run(cache.get, url) if cache is not None else None
+      if cached is not None and cached.expires_at > time.time():
+        await database_executor.run(cache.hit, cached)
+        return cached.content_type, cached.body
+
+      host = urllib.parse.urlsplit(url).netloc
+      semaphore = semaphores.setdefault(
+        host, asyncio.Semaphore(settings.ingestion.asset_connections_per_host)
+      )
+      async with semaphore:
+        return await self._download_asset(url, get, cached)
+
+    tasks = {url: asyncio.ensure_future(fetch(url)) for url in urls}
+    _done, pending = await asyncio.wait(
+      tasks.values(), timeout=settings.ingestion.snapshot_budget_seconds
+    )
+    for task in pending:
+      task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    fetched = {}
+    for url, task in tasks.items():
+      if task.cancelled() or task.exception() is not None:
         continue
+      result = task.result()
+      if result is not None:
+        fetched[url] = result
+    return fetched
+
+  async def _download_asset(
+    self, url: str, get: AssetGetter, cached: CachedAsset | None
+  ) -> tuple[str, bytes] | None:
+    """
+    Download an asset, or confirm that the stale cached copy is still current, and keep
+    the result in the asset cache.
+    """
+    headers = {}
+    if cached is not None:
+      if cached.etag:
+        headers['If-None-Match'] = cached.etag
+      if cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+
+    response = await get(url, headers)
+    now = time.time()
+    lifetime = freshness_lifetime(response.headers, now)
+    cache = get_asset_cache()
+
+    if response.status == 304 and cached is not None:
+      if cache is not None:
+        await database_executor.run(
+          cache.revalidate,
+          cached,
+          now + (lifetime or 0.0),
+          response.headers.get('etag'),
+          response.headers.get('last-modified'),
+        )
+      return cached.content_type, cached.body
+    if response.status != 200:
+      return None
+
+    content_type = response.headers.get('content-type', '')
+    if cache is not None:
+      await database_executor.run(cache.miss, len(response.body))
+      etag = response.headers.get('etag')
+      last_modified = response.headers.get('last-modified')
+      # Nothing to gain from an entry that is never fresh and cannot be revalidated
+      if lifetime is not None and (lifetime > 0 or etag or last_modified):
+        entry = CachedAsset(url, content_type, response.body, etag, last_modified, now + lifetime)
+        await database_executor.run(cache.put, entry)
+    return content_type, response.body
+
+  def _absolutize_css_urls(self, css_text: str, stylesheet_url: str) -> str:
+    # Relative URLs in a stylesheet are relative to the stylesheet, not the page
+    def replacer(match):
+      url = match.group(1).strip('"\'')
+      if not url.startswith(('http', 'https', 'data:', '#')):
+        resolved = urllib.parse.urljoin(stylesheet_url, url)
+        return f'url("{resolved}")'
+      return match.group(0)
+
+    return re.sub(r'url\(([^)]+)\)', replacer, css_text)
+
+  @staticmethod
+  def _charset(content_type: str) -> str:
+    match = re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE)
+    if match:
+      try:
+        return codecs.lookup(match.group(1)).name
+      except LookupError:
+        pass
+    return 'utf-8'
 
   def _strip_scripts(self, html: str) -> str:
     soup = BeautifulSoup(html, 'html.parser')
@@ -183,29 +458,100 @@ class ScrapingService:
     return str(soup)
 
   async def fetch_and_clean(self, url: HttpUrl) -> ScrapingResult:
+    """
+    Fetch a page, extract its text and make a self-contained HTML copy of it.
+
+    A plain HTTP request is tried first, unless the page's domain is known to need a
+    browser. If that request fails, the page is loaded in the browser instead. If it
+    returns an HTML page with less than http_min_text_length characters of text, as
+    single-page apps do before their scripts run, the domain is also remembered as needing
+    the browser, while a successful request remembers it as plain HTTP.
+    """
+    page_url = str(url)
+    domain = urllib.parse.urlsplit(page_url).netloc
     try:
-      async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=settings.ingestion.headless)
-        context = await browser.new_context(
-          user_agent=(
-            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-            '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-          )
-        )
-        page = await context.new_page()
-        await page.goto(str(url), wait_until='networkidle')
+      if settings.ingestion.http_first and self.domain_strategies.get(domain) != 'browser':
+        result = await self._fetch_over_http(page_url)
+        if result is not None:
+          self.domain_strategies.set(domain, 'http')
+          self._fetches['http'] += 1
+          return result
 
-        # Extract text content for LLM processing
-        html = await page.content()
-        content = self._clean_html(html)
+        self._fetches['browser_fallback'] += 1
+      else:
+        self._fetches['browser'] += 1
+
+      return await self._fetch_with_browser(page_url)
+    except Exception as e:
+      raise ServiceError(f'Failed to fetch and clean page {url}: {str(e)}') from e
+
+  def _request_blocker(self) -> Callable[[Route], Awaitable[None]]:
+    """
+    Route handler that aborts requests of the blocked_resource_types and to the
+    blocked_hosts, so the page settles without waiting for them.
+    """
+    blocked_types = set(_setting_list(settings.ingestion.blocked_resource_types))
+    blocked_types.discard('document')
+    blocked_hosts = _setting_list(settings.ingestion.blocked_hosts)
+
+    async def block(route: Route) -> None:
+      request = route.request
+      if request.resource_type in blocked_types or _host_matches(
+        urllib.parse.urlsplit(request.url).hostname, blocked_hosts
+      ):
+        self._fetches['blocked_requests'] += 1
+        await route.abort('blockedbyclient')
+      else:
+        await route.continue_()
+
+    return block
+
+  async def _fetch_over_http(self, url: str) -> ScrapingResult | None:
+    """
+    Fetch a page without running its scripts.
+
+    Records the domain as needing the browser when it serves an HTML page with too little
+    text. Failed requests and other responses fall back for this fetch only, since they say
+    nothing about whether the domain renders its pages with scripts.
 
-        # Convert page into self-contained HTML file
-        await self._inline_assets(page, str(url))
+    Returns:
+      The result, or None if the response is not an HTML page with enough text.
+    """
+    try:
+      response = await self.http_client.get(url, timeout=settings.ingestion.http_timeout_seconds)
+    except httpx.HTTPError:
+      return None
+    if response.status_code != 200 or 'html' not in response.headers.get('content-type', ''):
+      return None
+
+    html = response.text
+    content = self._clean_html(html)
+    # The content is truncated to max_length, so a lower limit would never be met
+    min_length = min(settings.ingestion.http_min_text_length, settings.ingestion.max_length)
+    if len(content) < min_length:
+      self.domain_strategies.set(urllib.parse.urlsplit(url).netloc, 'browser')
+      return None
+
+    return ScrapingResult(content=content, html=await self._snapshot_html(html, str(response.url)))
+
+  async def _fetch_with_browser(self, url: str) -> ScrapingResult:
+    async with self.browser_pool.page() as page:
+      # Only the text is needed at first; the snapshot fetches its assets separately
+      block = self._request_blocker()
+      await page.route('**/*', block)
+      try:
+        await page.goto(url, wait_until='networkidle')
         html = await page.content()
-        html = self._strip_scripts(html)
+      finally:
+        # Pooled pages are reused, so the route must not outlive this scrape
+        await page.unroute('**/*', block)
 
-        await browser.close()
+      # Extract text content for LLM processing
+      content = self._clean_html(html)
 
-        return ScrapingResult(content=content, html=html)
-    except Exception as e:
-      raise ServiceError(f'Failed to fetch and clean page {url}: {str(e)}') from e
+      # Convert page into self-contained HTML file
+      await self._inline_assets(page, url)
+      html = await page.content()
+      html = self._strip_scripts(html)
+
+      return ScrapingResult(content=content, html=html)
@@ -0,0 +1,68 @@
+import asyncio
+
+
+class BackgroundWorker:
+  """
+  Task that repeats a round of work on the app's event loop for as long as it runs.
+
+  Between rounds it sleeps until wake() is called or the poll interval passes, whichever
+  comes first. Subclasses implement _round(), which may ask for a shorter sleep.
+  """
+
+  def __init__(self, name: str, poll_interval: float):
+    self.name = name
+    self.poll_interval = poll_interval
+    self._loop: asyncio.AbstractEventLoop | None = None
+    self._wakeup: asyncio.Event | None = None
+    self._task: asyncio.Task | None = None
+
+  def start(self) -> None:
+    if self._task is not None:
+      return
+    self._loop = asyncio.get_running_loop()
+    self._wakeup = asyncio.Event()
+    self._task = self._loop.create_task(self._run(), name=self.name)
+
+  async def stop(self) -> None:
+    task = self._task
+    self._task = None
+    self._loop = None
+    if task is not None:
+      task.cancel()
+      try:
+        await task
+      except asyncio.CancelledError:
+        pass
+
+  def wake(self) -> None:
+    """
+    Start the next round now. Safe to call from any thread; a no-op when it is stopped.
+    """
+    loop, wakeup = self._loop, self._wakeup
+    if loop is None or wakeup is None:
+      return
+    try:
+      loop.call_soon_threadsafe(wakeup.set)
+    except RuntimeError:
+      # The loop closed between the check and the call
+      pass
+
+  async def _round(self) -> float | None:
+    """
+    Do one round of work.
+
+    Returns:
+      The longest to sleep before the next round, or None for the poll interval.
+    """
+    raise NotImplementedError
+
+  async def _run(self) -> None:
+    assert self._wakeup is not None
+    while True:
+      self._wakeup.clear()
+      timeout = await self._round()
+      timeout = self.poll_interval if timeout is None else min(timeout, self.poll_interval)
+      try:
+        await asyncio.wait_for(self._wakeup.wait(), timeout)
+      except TimeoutError:
+        pass
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any, Generic, TypeVar
+
+V = TypeVar('V')
+
+
+class GenerationalCache(Generic[V]):
+  """
+  In-process LRU cache invalidated wholesale by a write-generation counter.
+
+  Writers call bump() after committing. Readers capture the generation before querying
+  and store their result under it, so a result computed from data that a concurrent
+  write has since replaced is never served.
+  """
+
+  def __init__(self, max_entries: int = 128):
+    self.max_entries = max_entries
+    self._entries: OrderedDict[Hashable, tuple[int, V]] = OrderedDict()
+    self._generation = 0
+    self._hits = 0
+    self._misses = 0
+    self._lock = threading.Lock()
+
+  @property
+  def generation(self) -> int:
+    return self._generation
+
+  def bump(self) -> None:
+    """
+    Invalidate every cached entry.
+    """
+    with self._lock:
+      self._generation += 1
+      self._entries.clear()
+
+  def get(self, key: Hashable) -> V | None:
+    """
+    Return the cached value for key, or None if it is missing or stale.
+    """
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[0] != self._generation:
+        self._misses += 1
+        return None
+
+      self._entries.move_to_end(key)
+      self._hits += 1
+      return entry[1]
+
+  def set(self, key: Hashable, value: V, generation: int) -> None:
+    """
+    Store value for key, stamped with the generation that was current before it was read.
+    """
+    with self._lock:
+      if generation != self._generation:
+        return
+
+      self._entries[key] = (generation, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      lookups = self._hits + self._misses
+      return {
+        'hits': self._hits,
+        'misses': self._misses,
+        'hit_rate': self._hits / lookups if lookups else 0.0,
+        'entries': len(self._entries),
+        'generation': self._generation,
+      }
+
+
+class ExpiringCache(Generic[V]):
+  """
+  In-process LRU cache whose entries also expire a fixed time after they were stored.
+  """
+
+  def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600.0):
+    self.max_entries = max_entries
+    self.ttl_seconds = ttl_seconds
+    self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+    self._hits = 0
+    self._misses = 0
+    self._lock = threading.Lock()
+
+  def get(self, key: Hashable) -> V | None:
+    """
+    Return the cached value for key, or None if it is missing or expired.
+    """
+    with self._lock:
+      return self._lookup(key, remove=False)
+
+  def pop(self, key: Hashable) -> V | None:
+    """
+    Remove and return the cached value for key, or None if it is missing or expired.
+    """
+    with self._lock:
+      return self._lookup(key, remove=True)
+
+  def _lookup(self, key: Hashable, remove: bool) -> V | None:
+    entry = self._entries.get(key)
+    if entry is None or entry[0] <= time.monotonic():
+      if entry is not None:
+        del self._entries[key]
+      self._misses += 1
+      return None
+
+    if remove:
+      del self._entries[key]
+    else:
+      self._entries.move_to_end(key)
+    self._hits += 1
+    return entry[1]
+
+  def set(self, key: Hashable, value: V) -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+
+  def stats(self) -> dict[str, Any]:
+    with self._lock:
+      lookups = self._hits + self._misses
+      return {
+        'hits': self._hits,
+        'misses': self._misses,
+        'hit_rate': self._hits / lookups if lookups else 0.0,
+        'entries': len(self._entries),
+      }
@@ -0,0 +1,43 @@
+import base64
+import json
+from typing import Any
+
+from app.utils.errors import ValidationError
+
+
+def encode_cursor(position: dict[str, Any]) -> str:
+  """
+  Encode a keyset position as an opaque, URL-safe cursor.
+
+  Args:
+    position: JSON-serializable description of the last row of a page.
+
+  Returns:
+    Base64url string without padding.
+  """
+  raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+  return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+  """
+  Decode a cursor produced by encode_cursor.
+
+  Args:
+    cursor: Opaque cursor string.
+
+  Returns:
+    The keyset position it encodes.
+
+  Raises:
+    ValidationError: If the cursor is malformed.
+  """
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+  except (ValueError, UnicodeError) as e:
+    raise ValidationError(f'Invalid cursor: {cursor}') from e
+
+  if not isinstance(position, dict):
+    raise ValidationError(f'Invalid cursor: {cursor}')
+  return position
@@ -0,0 +1,112 @@
+"""
+Hydration of Pydantic models from rows this application wrote itself.
+
+Rows coming out of SQLite have already been validated once on their way in, so they are
+decoded with as little repeated work as possible: aggregated JSON columns are decoded a
+single time by pydantic-core through cached TypeAdapters, and plain JSON list columns go
+through orjson when it is installed.
+"""
+
+import json
+import sqlite3
+from functools import cache
+from typing import Any, TypeVar
+
+from pydantic import TypeAdapter
+
+from app.schemas import Application, Listing, ListingSummary, Resume, ResumeData, StatusEvent
+
+try:
+  import orjson
+
+  _loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+  _loads = json.loads
+
+T = TypeVar('T')
+
+
+@cache
+def adapter(tp: type[T]) -> TypeAdapter[T]:
+  """
+  Return a TypeAdapter for tp, building its validator only once per process.
+  """
+  return TypeAdapter(tp)
+
+
+def loads(raw: str | bytes | None, default: Any = None) -> Any:
+  """
+  Decode a JSON column, using orjson when it is available.
+
+  Args:
+    raw: Column value. None decodes to default.
+    default: Value returned for NULL columns.
+
+  Returns:
+    The decoded value.
+  """
+  if raw is None:
+    return default
+  return _loads(raw)
+
+
+def hydrate_status_events(raw: str | None) -> list[StatusEvent]:
+  """
+  Build status events from a json_group_array column in one decode-and-validate pass.
+  """
+  if not raw:
+    return []
+  return adapter(list[StatusEvent]).validate_json(raw)
+
+
+def hydrate_application(row: sqlite3.Row | dict[str, Any]) -> Application:
+  """
+  Build an Application from a row with application_id, listing_id, resume_id and
+  status_events_json columns.
+  """
+  return Application(
+    id=row['application_id'],
+    listing_id=row['listing_id'],
+    resume_id=row['resume_id'],
+    status_events=hydrate_status_events(row['status_events_json']),
+  )
+
+
+def hydrate_listing(
+  row: sqlite3.Row | dict[str, Any], applications_json: str | None = None
+) -> Listing:
+  """
+  Build a Listing from a listings row.
+
+  Args:
+    row: Row with the listings columns. skills and requirements are JSON text.
+    applications_json: Optional JSON array of applications with their status events
+      nested as arrays, decoded in a single pass.
+
+  Returns:
+    The hydrated listing.
+  """
+  data = dict(row)
+  data['skills'] = loads(data.get('skills'), [])
+  data['requirements'] = loads(data.get('requirements'), [])
+  if applications_json:
+    data['applications'] = adapter(list[Application]).validate_json(applications_json)
+  return Listing.model_validate(data)
+
+
+def hydrate_listing_summaries(rows: list[sqlite3.Row]) -> list[ListingSummary]:
+  """
+  Build a page of listing summaries with one adapter call.
+  """
+  return adapter(list[ListingSummary]).validate_python([dict(row) for row in rows])
+
+
+def hydrate_resume(row: sqlite3.Row | dict[str, Any]) -> Resume:
+  """
+  Build a Resume, validating its data column straight from JSON.
+  """
+  return Resume(
+    id=row['id'],
+    template=row['template'],
+    data=ResumeData.model_validate_json(row['data']),
+  )
@@ -0,0 +1,31 @@
+import re
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_fts_query(text: str) -> str | None:
+  """
+  Turn free-form search input into an FTS5 query that prefix-matches every word.
+
+  Each word is quoted so FTS5 operators and punctuation in user input are treated as
+  plain text. Words are implicitly AND-ed.
+
+  Args:
+    text: Raw search input, e.g. 'senior back'.
+
+  Returns:
+    FTS5 MATCH expression, e.g. '"senior"* "back"*', or None if text has no words.
+  """
+  tokens = _TOKEN_PATTERN.findall(text)
+  if not tokens:
+    return None
+  return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def requirement_query_texts(title: str, requirements: list[str]) -> list[str]:
+  """
+  Texts embedded to find experience bullets matching each of a listing's requirements.
+
+  They mirror the bullet documents' Role/Achievement layout so the two embed alike.
+  """
+  return [f'Role: {title}\nAchievement: {requirement}' for requirement in requirements]
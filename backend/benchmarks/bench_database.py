@@ -0,0 +1,66 @@
+"""
+Per-query overhead of a fresh SQLite connection versus the pooled connections.
+
+Run from backend/:
+  python -m benchmarks.bench_database
+"""
+
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from app.config.schemas import DatabasePrefs
+from app.repositories.connection_pool import ConnectionPool
+from app.repositories.database_repository import _build_pragmas
+
+QUERIES = 5000
+
+
+def _seed(db_path: str) -> None:
+  with sqlite3.connect(db_path) as db:
+    db.execute('CREATE TABLE listings (id TEXT PRIMARY KEY, title TEXT NOT NULL)')
+    db.executemany(
+      'INSERT INTO listings (id, title) VALUES (?, ?)',
+      [(f'listing-{i}', f'Title {i}') for i in range(1000)],
+    )
+
+
+def _per_connection(db_path: str) -> float:
+  start = time.perf_counter()
+  for i in range(QUERIES):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('SELECT * FROM listings WHERE id = ?', (f'listing-{i % 1000}',)).fetchone()
+    conn.commit()
+    conn.close()
+  return time.perf_counter() - start
+
+
+def _pooled(db_path: str) -> float:
+  pool = ConnectionPool(db_path, pragmas=_build_pragmas(DatabasePrefs()))
+  start = time.perf_counter()
+  for i in range(QUERIES):
+    with pool.connection() as conn:
+      conn.execute('SELECT * FROM listings WHERE id = ?', (f'listing-{i % 1000}',)).fetchone()
+  elapsed = time.perf_counter() - start
+  pool.close()
+  return elapsed
+
+
+def main() -> None:
+  with tempfile.TemporaryDirectory() as tmp:
+    db_path = str(Path(tmp) / 'bench.sqlite3')
+    _seed(db_path)
+
+    before = _per_connection(db_path)
+    after = _pooled(db_path)
+
+  print(f'{QUERIES} point queries')
+  print(f'  connect per query: {before / QUERIES * 1e6:8.1f} us/query')
+  print(f'  pooled connection: {after / QUERIES * 1e6:8.1f} us/query')
+  print(f'  speedup:           {before / after:8.1f}x')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,96 @@
+"""
+Concurrent embedding calls sent one request each versus coalesced by
+BatchingEmbeddingFunction.
+
+The provider is simulated with a fixed round trip and a cap on concurrent requests, the
+way a rate-limited embedding API behaves. Each caller thread embeds one short text at a
+time, like drafts, saves and resume generations running side by side.
+
+Run from backend/:
+  python -m benchmarks.bench_embedding_batcher
+"""
+
+import threading
+import time
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.repositories.embedding_batcher import BatchingEmbeddingFunction
+
+CALLERS = 16
+CALLS_PER_CALLER = 10
+ROUND_TRIP = 0.04
+CONCURRENT_REQUESTS = 4
+
+
+class _RateLimitedEmbeddingFunction(EmbeddingFunction[Documents]):
+  def __init__(self):
+    self.requests = 0
+    self._slots = threading.Semaphore(CONCURRENT_REQUESTS)
+    self._lock = threading.Lock()
+
+  def __call__(self, input: Documents) -> Embeddings:
+    with self._lock:
+      self.requests += 1
+    with self._slots:
+      time.sleep(ROUND_TRIP)
+    return [np.full(8, len(text), dtype=np.float32) for text in input]
+
+  @staticmethod
+  def name() -> str:
+    return 'bench'
+
+  def get_config(self) -> dict[str, Any]:
+    return {}
+
+
+def _run(label: str, embed, provider: _RateLimitedEmbeddingFunction) -> None:
+  latencies: list[float] = []
+  lock = threading.Lock()
+
+  def caller(n: int) -> None:
+    for i in range(CALLS_PER_CALLER):
+      start = time.perf_counter()
+      embed([f'caller {n} text {i}'])
+      with lock:
+        latencies.append(time.perf_counter() - start)
+
+  threads = [threading.Thread(target=caller, args=(n,)) for n in range(CALLERS)]
+  start = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  elapsed = time.perf_counter() - start
+
+  p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+  print(
+    f'  {label:<16} {provider.requests:4d} requests  {elapsed * 1000:7.0f} ms total  '
+    f'p50 {p50:6.1f} ms  p99 {p99:6.1f} ms'
+  )
+
+
+def main() -> None:
+  print(
+    f'{CALLERS} callers x {CALLS_PER_CALLER} calls, {ROUND_TRIP * 1000:.0f} ms round trip, '
+    f'{CONCURRENT_REQUESTS} concurrent requests allowed'
+  )
+
+  provider = _RateLimitedEmbeddingFunction()
+  _run('unbatched', provider, provider)
+
+  for window_ms in (0, 5, 10):
+    provider = _RateLimitedEmbeddingFunction()
+    batcher = BatchingEmbeddingFunction(
+      provider, window_seconds=lambda window_ms=window_ms: window_ms / 1000, max_batch=lambda: 256
+    )
+    _run(f'window {window_ms} ms', batcher, provider)
+    batcher.close()
+    stats = batcher.stats()
+    print(f'{"":20}mean {stats["mean_calls_per_batch"]:.1f} calls per batch')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,79 @@
+"""
+ExperiencesService.list_all: one query per experience (N+1) versus the batched loader.
+
+Run from backend/:
+  python -m benchmarks.bench_experiences
+"""
+
+import asyncio
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from app.config import settings
+from app.migrations import run_migrations
+from app.schemas import Experience
+from app.services.experiences_service import ExperiencesService
+
+EXPERIENCES = 200
+BULLETS = 10
+ROUNDS = 20
+
+
+def _seed(service: ExperiencesService) -> None:
+  experiences = []
+  bullets = []
+  for i in range(EXPERIENCES):
+    experience_id = str(uuid.uuid4())
+    experiences.append(
+      (experience_id, f'Title {i}', f'Org {i}', 'Full-time', None, f'20{i % 25:02d}-01', None)
+    )
+    bullets.extend((experience_id, f'Bullet {j} of experience {i}') for j in range(BULLETS))
+
+  service.execute_many('INSERT INTO experiences VALUES (?, ?, ?, ?, ?, ?, ?)', experiences)
+  service.execute_many(
+    'INSERT INTO experience_bullets (experience_id, text) VALUES (?, ?)', bullets
+  )
+
+
+async def _n_plus_one(service: ExperiencesService) -> list[Experience]:
+  # The previous list_all: one bullet query per experience
+  rows = await service.afetch_all(
+    'SELECT id, title, organization, type, location, start_date, end_date '
+    'FROM experiences ORDER BY start_date DESC'
+  )
+  experiences = []
+  for row in rows:
+    bullet_rows = await service.afetch_all(
+      'SELECT text FROM experience_bullets WHERE experience_id = ? ORDER BY id ASC', (row['id'],)
+    )
+    experience = dict(row)
+    experience['bullets'] = [r['text'] for r in bullet_rows]
+    experiences.append(Experience(**experience))
+  return experiences
+
+
+async def _time(label: str, func) -> None:
+  start = time.perf_counter()
+  for _ in range(ROUNDS):
+    await func()
+  elapsed = (time.perf_counter() - start) / ROUNDS
+  print(f'  {label:<22} {elapsed * 1000:8.2f} ms/call')
+
+
+async def main() -> None:
+  with tempfile.TemporaryDirectory() as tmp:
+    settings.config.paths.db_path = str(Path(tmp) / 'bench.sqlite3')
+    run_migrations(settings.paths.db_path)
+
+    service = ExperiencesService()
+    _seed(service)
+
+    print(f'{EXPERIENCES} experiences x {BULLETS} bullets')
+    await _time('N+1 queries', lambda: _n_plus_one(service))
+    await _time('batched list_all', service.list_all)
+
+
+if __name__ == '__main__':
+  asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+ExperiencesService.find_relevant: one search per requirement, one batched search, and a
+search with the requirement vectors stored when the listing was saved.
+
+Embedding requests are simulated with a fixed round-trip delay, the part of the cost that
+batching and stored vectors remove. The vector index is a real Chroma collection in a
+temporary directory.
+
+Run from backend/:
+  python -m benchmarks.bench_find_relevant
+"""
+
+import asyncio
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.config import settings
+from app.migrations import run_migrations
+from app.repositories.vector_outbox import VectorOutbox
+from app.schemas import Experience, Listing
+from app.services.experiences_service import ExperiencesService
+from app.services.listings_service import ListingsService
+
+EXPERIENCES = 50
+BULLETS = 8
+REQUIREMENTS = 15
+ROUND_TRIP = 0.05
+ROUNDS = 5
+
+
+class _SlowEmbeddingFunction(EmbeddingFunction[Documents]):
+  """Deterministic vectors behind a simulated network round trip."""
+
+  def __init__(self):
+    self.requests = 0
+
+  def __call__(self, input: Documents) -> Embeddings:
+    self.requests += 1
+    time.sleep(ROUND_TRIP)
+    return [
+      np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8).astype(np.float32)
+      for text in input
+    ]
+
+  @staticmethod
+  def name() -> str:
+    return 'bench'
+
+  def get_config(self) -> dict[str, Any]:
+    return {}
+
+
+async def _per_requirement(service: ExperiencesService, listing: Listing) -> None:
+  # The previous find_relevant: one search, and so one embedding request, per requirement
+  for requirement in listing.requirements:
+    query_text = f'Role: {listing.title}\nAchievement: {requirement}'
+    await service.asearch_documents('experience_bullets', query_text, k=5)
+
+
+async def _time(label: str, func, embedder: _SlowEmbeddingFunction) -> None:
+  embedder.requests = 0
+  start = time.perf_counter()
+  for _ in range(ROUNDS):
+    await func()
+  elapsed = (time.perf_counter() - start) / ROUNDS
+  requests = embedder.requests / ROUNDS
+  print(f'  {label:<18} {elapsed * 1000:8.1f} ms/call  {requests:4.0f} embedding requests')
+
+
+async def main() -> None:
+  with tempfile.TemporaryDirectory() as tmp:
+    settings.config.paths.db_path = str(Path(tmp) / 'bench.sqlite3')
+    settings.config.paths.vector_path = str(Path(tmp) / 'vectors')
+    run_migrations(settings.paths.db_path)
+
+    embedder = _SlowEmbeddingFunction()
+    service = ExperiencesService()
+    listings = ListingsService()
+    outbox = VectorOutbox()
+    for repository in (service, listings, outbox):
+      repository._embedding_function = embedder
+      repository._embedding_key = (repository.embedding_spec, settings.model.openai_api_key)
+
+    for i in range(EXPERIENCES):
+      await service.create(
+        Experience(
+          title=f'Engineer {i}',
+          organization=f'Org {i}',
+          type='Full-time',
+          start_date=f'20{i % 25:02d}-01',
+          bullets=[f'Shipped project {j} for team {i}' for j in range(BULLETS)],
+        )
+      )
+
+    listing = Listing(
+      url='https://example.com/jobs/1',
+      title='Backend Engineer',
+      company='Example',
+      domain='example.com',
+      description='Build things.',
+      requirements=[f'Requirement {r}' for r in range(REQUIREMENTS)],
+    )
+
+    await listings.create(listing)
+    outbox.drain()
+
+    async def stored_vectors() -> None:
+      embeddings = await listings.requirement_embeddings(listing)
+      await service.find_relevant(listing, embeddings)
+
+    print(f'{REQUIREMENTS} requirements, {ROUND_TRIP * 1000:.0f} ms per embedding request')
+    await _time('per requirement', lambda: _per_requirement(service, listing), embedder)
+    await _time('batched', lambda: service.find_relevant(listing), embedder)
+    await _time('stored vectors', stored_vectors, embedder)
+
+
+if __name__ == '__main__':
+  asyncio.run(main())
@@ -0,0 +1,99 @@
+"""
+Per-row cost of hydrating models from SQLite rows: the previous json.loads-and-validate
+path versus app.utils.hydration.
+
+Run from backend/:
+  python -m benchmarks.bench_hydration
+"""
+
+import json
+import time
+import uuid
+
+from app.schemas import Application, Listing, ListingSummary, StatusEvent
+from app.utils.hydration import hydrate_listing, hydrate_listing_summaries
+
+ROWS = 5000
+EVENTS = 8
+
+LISTING_ID = str(uuid.uuid4())
+EVENTS_DATA = [
+  {
+    'id': str(uuid.uuid4()),
+    'status': 'APPLIED',
+    'stage': 0,
+    'created_at': f'2025-01-0{i + 1} 12:00:00+00:00',
+    'notes': None,
+  }
+  for i in range(EVENTS)
+]
+APPLICATION = {'id': str(uuid.uuid4()), 'listing_id': LISTING_ID, 'resume_id': None}
+LISTING_ROW = {
+  'id': LISTING_ID,
+  'url': 'https://example.com/jobs/1',
+  'title': 'Backend Engineer',
+  'company': 'Example',
+  'domain': 'example.com',
+  'location': 'Remote',
+  'description': 'Build things. ' * 150,
+  'posted_date': '2025-01-01',
+  'skills': json.dumps(['python', 'sql', 'fastapi'] * 4),
+  'requirements': json.dumps(['5 years of experience'] * 6),
+}
+# Before: SQLite nested each application's events as a JSON string
+APPLICATIONS_STRING_NESTED = json.dumps([{**APPLICATION, 'status_events': json.dumps(EVENTS_DATA)}])
+APPLICATIONS_JSON = json.dumps([{**APPLICATION, 'status_events': EVENTS_DATA}])
+SUMMARY_ROWS = [
+  {
+    'id': str(uuid.uuid4()),
+    'url': f'https://example.com/jobs/{i}',
+    'title': f'Engineer {i}',
+    'company': 'Example',
+    'domain': 'example.com',
+    'location': None,
+    'posted_date': '2025-01-01',
+    'current_status': 'APPLIED',
+    'last_updated': '2025-01-02 12:00:00+00:00',
+  }
+  for i in range(ROWS)
+]
+
+
+def _listing_before() -> Listing:
+  applications = []
+  for app_data in json.loads(APPLICATIONS_STRING_NESTED):
+    events = json.loads(app_data.pop('status_events'))
+    status_events = [StatusEvent(**e) for e in events if e.get('id')]
+    applications.append(Application(**app_data, status_events=status_events))
+  return Listing(**LISTING_ROW, applications=applications)
+
+
+def _listing_after() -> Listing:
+  return hydrate_listing(LISTING_ROW, APPLICATIONS_JSON)
+
+
+def _time_per_row(func, rounds: int) -> float:
+  start = time.perf_counter()
+  for _ in range(rounds):
+    func()
+  return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+  assert _listing_before().model_dump() == _listing_after().model_dump()
+
+  before = _time_per_row(_listing_before, ROWS)
+  after = _time_per_row(_listing_after, ROWS)
+  print(f'Listing with 1 application and {EVENTS} status events')
+  print(f'  before: {before:8.1f} us/row')
+  print(f'  after:  {after:8.1f} us/row')
+
+  before = _time_per_row(lambda: [ListingSummary(**row) for row in SUMMARY_ROWS], 5) / ROWS
+  after = _time_per_row(lambda: hydrate_listing_summaries(SUMMARY_ROWS), 5) / ROWS
+  print(f'ListingSummary page of {ROWS} rows')
+  print(f'  before: {before:8.1f} us/row')
+  print(f'  after:  {after:8.1f} us/row')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,223 @@
+"""
+Ingest latency with the HTTP-first fetch path versus always loading pages in the browser,
+with request blocking on and off for pages that need the browser, and with the asset
+cache on and off for postings whose stylesheets and images repeat.
+
+A local fixture server stands in for job boards: server-rendered postings in the style of
+Greenhouse or Lever, with stylesheets and images, a single-page app whose text only
+exists once its script runs, and a heavy career page that also loads web fonts, a video
+and a tracking script from another host. Every response is delayed to simulate a network
+round trip, and the bytes served per page are counted. Stylesheets carry an ETag and must
+be revalidated, images may be reused for an hour. Loading pages in the browser needs
+Chromium (`playwright install chromium`); without it only the HTTP rows are reported.
+
+Run from backend/:
+  python -m benchmarks.bench_scraping
+"""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pydantic import HttpUrl
+
+from app.config import settings
+from app.services.scraping_service import ScrapingService
+from app.utils.errors import ServiceError
+
+PAGES = 10
+IMAGES = 12
+ROUND_TRIP = 0.02
+
+_PARAGRAPHS = [
+  f'In area {i} of the platform you will design, build and operate the services behind '
+  f'feature {i}, from the first design review to on-call, with the {i} engineers on that team.'
+  for i in range(16)
+]
+
+_POSTING = f"""<!doctype html>
+<html>
+  <head>
+    <title>Backend Engineer</title>
+    <link rel="stylesheet" href="/static/board.css">
+    <link rel="stylesheet" href="/static/theme.css">
+  </head>
+  <body>
+    <img src="/img/logo.png" alt="logo">
+    <h1>Backend Engineer</h1>
+    {''.join(f'<p>{paragraph}</p>' for paragraph in _PARAGRAPHS)}
+    {''.join(f'<img src="/img/photo-{i}.png" alt="office">' for i in range(IMAGES))}
+  </body>
+</html>
+"""
+
+_HEAVY = """<!doctype html>
+<html>
+  <head>
+    <title>Careers</title>
+    <link rel="stylesheet" href="/static/fonts.css">
+    <script src="http://localhost:__PORT__/tracker.js"></script>
+  </head>
+  <body>
+    <video src="/media/culture.mp4" preload="auto" autoplay muted></video>
+    __IMAGES__
+    <div id="root"></div>
+    <script>
+      document.getElementById('root').innerHTML =
+        '<h1>Backend Engineer</h1>' + __PARAGRAPHS__.map(p => `<p>${p}</p>`).join('');
+    </script>
+  </body>
+</html>
+"""
+
+_ETAG = '"v1"'
+
+_FONTS_CSS = ''.join(
+  f'@font-face {{ font-family: brand{i}; src: url(/fonts/brand-{i}.woff2); }} '
+  f'h{i + 1} {{ font-family: brand{i}; }} '
+  for i in range(4)
+).encode()
+
+_SPA = """<!doctype html>
+<html>
+  <head><title>Careers</title></head>
+  <body>
+    <div id="root"></div>
+    <script>
+      document.getElementById('root').innerHTML =
+        '<h1>Backend Engineer</h1>' + __PARAGRAPHS__.map(p => `<p>${p}</p>`).join('');
+    </script>
+  </body>
+</html>
+""".replace('__PARAGRAPHS__', json.dumps(_PARAGRAPHS))
+
+
+class _FixtureHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  bytes_served = 0
+  lock = threading.Lock()
+
+  def do_GET(self) -> None:
+    time.sleep(ROUND_TRIP)
+    cache_headers: dict[str, str] = {}
+    if self.path.startswith('/heavy/'):
+      body = (
+        _HEAVY.replace('__PORT__', str(self.server.server_address[1]))
+        .replace('__IMAGES__', ''.join(f'<img src="/img/team-{i}.jpg">' for i in range(IMAGES)))
+        .replace('__PARAGRAPHS__', json.dumps(_PARAGRAPHS))
+        .encode()
+      )
+      content_type = 'text/html; charset=utf-8'
+    elif self.path == '/static/fonts.css':
+      body, content_type = _FONTS_CSS, 'text/css'
+    elif self.path.startswith('/fonts/'):
+      body, content_type = bytes(100_000), 'font/woff2'
+    elif self.path.startswith('/media/'):
+      body, content_type = bytes(2_000_000), 'video/mp4'
+    elif self.path == '/tracker.js':
+      body, content_type = b'/* analytics */' + b' ' * 50_000, 'text/javascript'
+    elif self.path.startswith('/board/'):
+      body, content_type = _POSTING.encode(), 'text/html; charset=utf-8'
+    elif self.path.startswith('/spa/'):
+      body, content_type = _SPA.encode(), 'text/html; charset=utf-8'
+    elif self.path.startswith('/static/'):
+      if self.headers.get('If-None-Match') == _ETAG:
+        self.send_response(304)
+        self.send_header('ETag', _ETAG)
+        self.end_headers()
+        return
+      body, content_type = b'body { background: url(../img/bg.png); }' * 200, 'text/css'
+      cache_headers = {'ETag': _ETAG, 'Cache-Control': 'no-cache'}
+    elif self.path.startswith('/img/'):
+      body, content_type = bytes(8192), 'image/png'
+      cache_headers = {'Cache-Control': 'max-age=3600'}
+    else:
+      self.send_response(404)
+      self.send_header('Content-Length', '0')
+      self.end_headers()
+      return
+
+    self.send_response(200)
+    self.send_header('Content-Type', content_type)
+    self.send_header('Content-Length', str(len(body)))
+    for name, value in cache_headers.items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
+    with _FixtureHandler.lock:
+      _FixtureHandler.bytes_served += len(body)
+
+  def log_message(self, format: str, *args) -> None:
+    pass
+
+
+async def _run(label: str, base_url: str, path: str, **ingestion) -> None:
+  for name, value in ingestion.items():
+    setattr(settings.config.ingestion, name, value)
+  _FixtureHandler.bytes_served = 0
+  service = ScrapingService()
+  service.start()
+  before = service.asset_cache_stats()
+  try:
+    start = time.perf_counter()
+    for i in range(PAGES):
+      result = await service.fetch_and_clean(HttpUrl(f'{base_url}{path}{i}'))
+    elapsed = (time.perf_counter() - start) / PAGES
+  except ServiceError as e:
+    print(f'  {label:<24} skipped: {str(e).splitlines()[0]}')
+    return
+  finally:
+    await service.close()
+
+  stats = service.stats()
+  cache = service.asset_cache_stats()
+  if cache and before:
+    # The cache outlives the service, so count this row's share only
+    cache = {name: cache[name] - before[name] for name in ('hits', 'revalidated')}
+  print(
+    f'  {label:<24} {elapsed * 1000:7.1f} ms/page  {len(result.content):5d} chars  '
+    f'{_FixtureHandler.bytes_served / PAGES / 1024:7.0f} KiB/page  '
+    f'http {stats["http"]}  fallback {stats["browser_fallback"]}  browser {stats["browser"]}  '
+    f'blocked {stats["blocked_requests"]}'
+    + (f'  cached {cache["hits"]} ({cache["revalidated"]} revalidated)' if cache else '')
+  )
+
+
+async def main() -> None:
+  server = ThreadingHTTPServer(('127.0.0.1', 0), _FixtureHandler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  base_url = f'http://127.0.0.1:{server.server_address[1]}'
+  default_types = settings.ingestion.blocked_resource_types
+  print(f'{PAGES} pages each, {IMAGES + 1} images and 2 stylesheets per posting')
+  cache_dir = tempfile.TemporaryDirectory()
+  settings.config.paths.asset_cache_path = f'{cache_dir.name}/assets.sqlite3'
+  settings.config.ingestion.asset_cache_mb = 0
+
+  try:
+    await _run('posting, http first', base_url, '/board/jobs/', http_first=True)
+    await _run('posting, browser only', base_url, '/board/jobs/', http_first=False)
+    await _run('single-page app, http', base_url, '/spa/jobs/', http_first=True)
+    await _run('single-page app, browser', base_url, '/spa/jobs/', http_first=False)
+
+    # The tracker is served from localhost, which only the blocking row lists
+    blocking = {'blocked_hosts': 'localhost', 'blocked_resource_types': default_types}
+    no_blocking = {'blocked_hosts': '', 'blocked_resource_types': ''}
+    await _run('heavy page, blocking', base_url, '/heavy/jobs/', http_first=False, **blocking)
+    await _run('heavy page, no blocking', base_url, '/heavy/jobs/', http_first=False, **no_blocking)
+
+    # Every posting links the same assets; the second row starts with them all cached
+    await _run(
+      'posting, asset cache', base_url, '/board/jobs/', http_first=True, asset_cache_mb=128
+    )
+    await _run('posting, warm asset cache', base_url, '/board/more/', http_first=True)
+  finally:
+    server.shutdown()
+    settings.config.ingestion.asset_cache_mb = 0
+    cache_dir.cleanup()
+
+
+if __name__ == '__main__':
+  asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Serializing a listing whose applications have long status histories: computed fields that
+re-sort the events on every access versus the presorted, memoized Application.
+
+Run from backend/:
+  python -m benchmarks.bench_timeline
+"""
+
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from uuid import UUID, uuid4
+
+from pydantic import Field, computed_field, field_validator
+
+from app.schemas import Application, Listing, StatusEnum, StatusEvent
+
+APPLICATIONS = 50
+EVENTS = 40
+ROUNDS = 20
+
+
+class _UnsortedApplication(Application):
+  """The previous Application: events kept as given, three sorts per serialization."""
+
+  @field_validator('status_events')
+  @classmethod
+  def _sort_status_events(cls, events: list[StatusEvent]) -> list[StatusEvent]:
+    return events
+
+  @computed_field
+  def current_status(self) -> StatusEnum:
+    sorted_events = sorted(self.status_events, key=lambda e: e.created_at)
+    return sorted_events[-1].status
+
+  @computed_field
+  def current_stage(self) -> int:
+    sorted_events = sorted(self.status_events, key=lambda e: e.created_at)
+    return sorted_events[-1].stage
+
+  @computed_field
+  def timeline(self) -> list[StatusEvent]:
+    sorted_events = sorted(self.status_events, key=lambda e: e.created_at)
+    current_status = sorted_events[-1]
+    ceiling_priority = self._get_event_priority(current_status)
+
+    history = []
+    last_kept_priority = -1
+    for event in sorted_events:
+      priority = self._get_event_priority(event)
+      if priority > ceiling_priority:
+        continue
+      if priority > last_kept_priority:
+        history.append(event)
+        last_kept_priority = priority
+
+    if not history or history[-1].id != current_status.id:
+      history.append(current_status)
+    return history
+
+
+class _UnsortedListing(Listing):
+  applications: list[_UnsortedApplication] = Field(default_factory=list)
+
+
+def _build(listing_type: type[Listing]) -> Listing:
+  rng = random.Random(0)
+  start = datetime(2025, 1, 1, tzinfo=UTC)
+  statuses = list(StatusEnum)
+  listing_id = uuid4()
+  applications = []
+  for _ in range(APPLICATIONS):
+    events = [
+      {
+        'id': UUID(int=rng.getrandbits(128)),
+        'status': rng.choice(statuses).value,
+        'stage': rng.randint(0, 3),
+        'created_at': start + timedelta(hours=rng.randint(0, 10_000)),
+      }
+      for _ in range(EVENTS)
+    ]
+    applications.append({'listing_id': listing_id, 'status_events': events})
+
+  return listing_type.model_validate(
+    {
+      'id': listing_id,
+      'url': 'https://example.com/jobs/1',
+      'title': 'Backend Engineer',
+      'company': 'Example',
+      'domain': 'example.com',
+      'description': 'Build things.',
+      'applications': applications,
+    }
+  )
+
+
+def _time(listing: Listing) -> float:
+  start = time.perf_counter()
+  for _ in range(ROUNDS):
+    listing.model_dump(mode='json', by_alias=True)
+  return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main() -> None:
+  before_listing = _build(_UnsortedListing)
+  after_listing = _build(Listing)
+  pairs = zip(before_listing.applications, after_listing.applications, strict=True)
+  for before_app, after_app in pairs:
+    assert [e.id for e in before_app.timeline] == [e.id for e in after_app.timeline]
+
+  # Pay the one-time timeline computation outside the measured loop, as a response would
+  # after the first access
+  after_listing.model_dump(mode='json')
+
+  before = _time(before_listing)
+  after = _time(after_listing)
+  print(f'Listing with {APPLICATIONS} applications x {EVENTS} status events')
+  print(f'  sort on every access: {before:8.2f} ms/serialization')
+  print(f'  presorted, memoized:  {after:8.2f} ms/serialization')
+
+
+if __name__ == '__main__':
+  main()
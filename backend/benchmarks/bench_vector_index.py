@@ -0,0 +1,132 @@
+"""
+Chroma's HNSW index versus the exact numpy store: recall@k, query latency and the cost of
+opening an existing index.
+
+Embeddings are precomputed random vectors with some cluster structure, served by a lookup
+embedding function, so only the index is measured.
+
+Run from backend/:
+  python -m benchmarks.bench_vector_index
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import chromadb
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from app.repositories.vector_stores import ChromaVectorStore, NumpyVectorStore, VectorStore
+
+DOCUMENTS = 5000
+DIMENSIONS = 384
+QUERIES = 200
+K = 10
+
+
+class _LookupEmbeddingFunction(EmbeddingFunction[Documents]):
+  def __init__(self, vectors: dict[str, np.ndarray]):
+    self.vectors = vectors
+
+  def __call__(self, input: Documents) -> Embeddings:
+    return [self.vectors[text] for text in input]
+
+  @staticmethod
+  def name() -> str:
+    return 'bench-lookup'
+
+  def get_config(self) -> dict[str, Any]:
+    return {}
+
+
+def _dataset() -> tuple[list[str], list[str], dict[str, np.ndarray], np.ndarray]:
+  rng = np.random.default_rng(0)
+  centers = rng.normal(size=(50, DIMENSIONS))
+  docs = centers[rng.integers(0, 50, DOCUMENTS)] + rng.normal(
+    scale=0.8, size=(DOCUMENTS, DIMENSIONS)
+  )
+  queries = centers[rng.integers(0, 50, QUERIES)] + rng.normal(
+    scale=0.8, size=(QUERIES, DIMENSIONS)
+  )
+  docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+  queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+  doc_texts = [f'doc-{i}' for i in range(DOCUMENTS)]
+  query_texts = [f'query-{i}' for i in range(QUERIES)]
+  vectors = {text: v.astype(np.float32) for text, v in zip(doc_texts, docs, strict=True)}
+  vectors.update({text: v.astype(np.float32) for text, v in zip(query_texts, queries, strict=True)})
+
+  truth = np.argsort(-(queries @ docs.T), axis=1)[:, :K]
+  return doc_texts, query_texts, vectors, truth
+
+
+def _fill(store: VectorStore, doc_texts: list[str]) -> None:
+  for start in range(0, len(doc_texts), 1000):
+    chunk = doc_texts[start : start + 1000]
+    store.add(chunk, chunk, [{'n': start + i} for i in range(len(chunk))])
+  if isinstance(store, NumpyVectorStore):
+    store.flush()
+
+
+def _measure(label: str, open_store, query_texts: list[str], truth: np.ndarray) -> None:
+  start = time.perf_counter()
+  store = open_store()
+  store.query(query_texts[:1], K)
+  startup = time.perf_counter() - start
+
+  latencies = []
+  hits = 0
+  for i, query in enumerate(query_texts):
+    start = time.perf_counter()
+    (results,) = store.query([query], K)
+    latencies.append(time.perf_counter() - start)
+    found = {int(metadata['n']) for _doc, metadata, _score in results}
+    hits += len(found & set(truth[i].tolist()))
+
+  p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+  recall = hits / (len(query_texts) * K)
+  print(
+    f'  {label:<16} recall@{K} {recall:6.3f}  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  '
+    f'open+first query {startup * 1000:7.1f} ms'
+  )
+
+
+def main() -> None:
+  doc_texts, query_texts, vectors, truth = _dataset()
+  embedding_function = _LookupEmbeddingFunction(vectors)
+
+  print(f'{DOCUMENTS} documents x {DIMENSIONS} dims, {QUERIES} single-query searches')
+  with tempfile.TemporaryDirectory() as tmp:
+    chroma_path = str(Path(tmp) / 'chroma')
+    client = chromadb.PersistentClient(path=chroma_path)
+    collection = client.create_collection(
+      'bench', embedding_function=embedding_function, metadata={'hnsw:space': 'cosine'}
+    )
+    _fill(ChromaVectorStore(collection), doc_texts)
+    del collection, client
+
+    def open_chroma() -> VectorStore:
+      client = chromadb.PersistentClient(path=chroma_path)
+      return ChromaVectorStore(
+        client.get_collection('bench', embedding_function=embedding_function)
+      )
+
+    _measure('chroma (hnsw)', open_chroma, query_texts, truth)
+
+    for precision in ('float32', 'float16', 'int8'):
+      directory = str(Path(tmp) / f'numpy-{precision}')
+      _fill(NumpyVectorStore(directory, embedding_function, precision), doc_texts)
+      _measure(
+        f'numpy {precision}',
+        lambda directory=directory, precision=precision: NumpyVectorStore(
+          directory, embedding_function, precision
+        ),
+        query_texts,
+        truth,
+      )
+
+
+if __name__ == '__main__':
+  main()
@@ -9,7 +9,6 @@ from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.main import create_app
-from app.seed import create_tables
 
 app = create_app()
 
@@ -44,8 +43,6 @@ def open_browser():
 
 
 if __name__ == '__main__':
-  create_tables()
-
   if getattr(sys, 'frozen', False):
     Timer(1.5, open_browser).start()
 